@@ -1,19 +1,23 @@
 import os
+import uuid
+import asyncio
 import secrets
 import hashlib
 import logging
 from datetime import datetime, timezone, timedelta
-from typing import Optional, Dict, Tuple
-from collections import defaultdict
+from typing import Optional, Tuple
+
+import jwt
+
+from auth_store import AuthStore, MemoryAuthStore, ExpiryMap
 
 # Configure logging - NO passwords in logs
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("auth_service")
 
-# In-Memory stores (für Production sollte Redis verwendet werden)
-_active_tokens: Dict[str, datetime] = {}
-_login_attempts: Dict[str, list] = defaultdict(list)  # IP -> list of timestamps
-_locked_ips: Dict[str, datetime] = {}  # IP -> lockout until
+# How often revocations of other workers are pulled from the store
+AUTH_REVOCATION_SYNC_SECONDS = int(os.environ.get('AUTH_REVOCATION_SYNC_SECONDS', '5'))
+TOKEN_ALGORITHM = "HS256"
 
 
 class AuthService:
@@ -21,8 +25,11 @@ class AuthService:
     Secure Authentication Service with:
     - Rate limiting (5 attempts per 15 minutes)
     - IP-based lockout after failed attempts
-    - Secure token generation
+    - Signed, expiring tokens (JWT), verified without any storage access
+    - Revocation via a small in-memory set of unexpired token ids
     - Login event logging (IP + timestamp only, no passwords)
+    Signing key, revocations and attempts live in an AuthStore (shared
+    between workers with the mongo/redis backend, see auth_store.py).
     """
     
     # Rate limiting config
@@ -30,7 +37,7 @@ class AuthService:
     LOCKOUT_MINUTES = 15
     ATTEMPT_WINDOW_MINUTES = 15
     
-    def __init__(self):
+    def __init__(self, store: Optional[AuthStore] = None):
         # Admin password from ENV only - no default fallback in production
         self.admin_password = os.environ.get('ADMIN_PASSWORD')
         if not self.admin_password:
@@ -38,50 +45,77 @@ class AuthService:
             self.admin_password = os.environ.get('ADMIN_PASSWORD_FALLBACK', 'change-me-immediately')
         
         self.token_expiry_hours = int(os.environ.get('TOKEN_EXPIRY_HOURS', '24'))
-        self.jwt_secret = os.environ.get('JWT_SECRET', secrets.token_urlsafe(32))
+        # Without JWT_SECRET the key comes from the store at startup (shared by all workers)
+        self._configured_secret = os.environ.get('JWT_SECRET')
+        self.jwt_secret = self._configured_secret or secrets.token_urlsafe(32)
+        # Process-local until the app configures a shared store at startup
+        self.store = store or MemoryAuthStore()
+        # Revoked token ids -> expiry timestamp (dropped once the token expired)
+        self._revoked = ExpiryMap()
+        self._sync_task: Optional[asyncio.Task] = None
+    
+    async def start(self, store: AuthStore) -> None:
+        """Use the shared store, load key and revocations (called from the app lifespan)"""
+        self.store = store
+        if not self._configured_secret:
+            self.jwt_secret = await store.get_or_create_signing_key()
+        await self.sync_revocations()
+        if not self._sync_task or self._sync_task.done():
+            self._sync_task = asyncio.create_task(self._sync_loop(), name="auth-revocation-sync")
+    
+    async def stop(self) -> None:
+        if self._sync_task:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+            self._sync_task = None
+        await self.store.close()
     
-    def _clean_old_attempts(self, ip: str) -> None:
-        """Remove login attempts older than the window"""
-        cutoff = datetime.now(timezone.utc) - timedelta(minutes=self.ATTEMPT_WINDOW_MINUTES)
-        _login_attempts[ip] = [t for t in _login_attempts[ip] if t > cutoff]
+    async def sync_revocations(self) -> None:
+        """Replaces the local revocation set with the store's (expired ids drop out)"""
+        revoked = ExpiryMap()
+        for jti, expires_at in (await self.store.list_revocations()).items():
+            revoked.set(jti, expires_at.timestamp())
+        self._revoked = revoked
     
-    def _is_ip_locked(self, ip: str) -> Tuple[bool, Optional[int]]:
+    async def _sync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(AUTH_REVOCATION_SYNC_SECONDS)
+            try:
+                await self.sync_revocations()
+            except Exception as e:
+                logger.error(f"Revocation sync failed: {e}")
+    
+    async def _is_ip_locked(self, ip: str) -> Tuple[bool, Optional[int]]:
         """Check if IP is currently locked out"""
-        if ip in _locked_ips:
-            lockout_until = _locked_ips[ip]
-            if datetime.now(timezone.utc) < lockout_until:
-                remaining_seconds = int((lockout_until - datetime.now(timezone.utc)).total_seconds())
-                return True, remaining_seconds
-            else:
-                # Lockout expired
-                del _locked_ips[ip]
+        lockout_until = await self.store.get_lock(ip)
+        if lockout_until:
+            remaining_seconds = int((lockout_until - datetime.now(timezone.utc)).total_seconds())
+            return True, max(remaining_seconds, 0)
         return False, None
     
-    def _record_failed_attempt(self, ip: str) -> Tuple[bool, int]:
+    async def _record_failed_attempt(self, ip: str) -> Tuple[bool, int]:
         """
         Record a failed login attempt and check if lockout should be applied.
         Returns: (is_locked, attempts_remaining)
         """
-        self._clean_old_attempts(ip)
-        _login_attempts[ip].append(datetime.now(timezone.utc))
-        
-        attempt_count = len(_login_attempts[ip])
+        now = datetime.now(timezone.utc)
+        attempt_count = await self.store.record_attempt(ip, now, timedelta(minutes=self.ATTEMPT_WINDOW_MINUTES))
         attempts_remaining = self.MAX_ATTEMPTS - attempt_count
         
         if attempt_count >= self.MAX_ATTEMPTS:
             # Lock the IP
-            _locked_ips[ip] = datetime.now(timezone.utc) + timedelta(minutes=self.LOCKOUT_MINUTES)
+            await self.store.lock(ip, now + timedelta(minutes=self.LOCKOUT_MINUTES))
             logger.warning(f"IP locked due to too many failed attempts: {self._anonymize_ip(ip)}")
             return True, 0
         
         return False, attempts_remaining
     
-    def _clear_attempts(self, ip: str) -> None:
+    async def _clear_attempts(self, ip: str) -> None:
         """Clear login attempts after successful login"""
-        if ip in _login_attempts:
-            del _login_attempts[ip]
-        if ip in _locked_ips:
-            del _locked_ips[ip]
+        await self.store.clear_attempts(ip)
     
     def _anonymize_ip(self, ip: str) -> str:
         """Anonymize IP for logging (privacy)"""
@@ -92,24 +126,24 @@ class AuthService:
             return f"{parts[0]}.{parts[1]}.xxx.xxx"
         return ip[:8] + "..."
     
-    def check_rate_limit(self, ip: str) -> Tuple[bool, Optional[str]]:
+    async def check_rate_limit(self, ip: str) -> Tuple[bool, Optional[str]]:
         """
         Check if IP is rate limited.
         Returns: (is_allowed, error_message)
         """
-        is_locked, remaining_seconds = self._is_ip_locked(ip)
+        is_locked, remaining_seconds = await self._is_ip_locked(ip)
         if is_locked:
             minutes = remaining_seconds // 60 + 1
             return False, f"Zu viele Fehlversuche. Bitte warten Sie {minutes} Minute(n)."
         return True, None
     
-    def verify_password(self, password: str, ip: str = "unknown") -> Tuple[bool, Optional[str], int]:
+    async def verify_password(self, password: str, ip: str = "unknown") -> Tuple[bool, Optional[str], int]:
         """
         Verify admin password with rate limiting.
         Returns: (success, error_message, attempts_remaining)
         """
         # Check rate limit first
-        is_allowed, error_msg = self.check_rate_limit(ip)
+        is_allowed, error_msg = await self.check_rate_limit(ip)
         if not is_allowed:
             logger.info(f"Login blocked (rate limit): {self._anonymize_ip(ip)}")
             return False, error_msg, 0
@@ -118,11 +152,11 @@ class AuthService:
         is_valid = secrets.compare_digest(password, self.admin_password)
         
         if is_valid:
-            self._clear_attempts(ip)
+            await self._clear_attempts(ip)
             logger.info(f"Successful admin login: {self._anonymize_ip(ip)} at {datetime.now(timezone.utc).isoformat()}")
             return True, None, self.MAX_ATTEMPTS
         else:
-            is_locked, attempts_remaining = self._record_failed_attempt(ip)
+            is_locked, attempts_remaining = await self._record_failed_attempt(ip)
             logger.warning(f"Failed login attempt: {self._anonymize_ip(ip)} at {datetime.now(timezone.utc).isoformat()}")
             
             if is_locked:
@@ -131,46 +165,47 @@ class AuthService:
             return False, f"Falsches Passwort. {attempts_remaining} Versuche verbleibend.", attempts_remaining
     
     def generate_token(self) -> str:
-        """Generate a cryptographically secure auth token"""
-        token = secrets.token_urlsafe(32)
-        expiry = datetime.now(timezone.utc) + timedelta(hours=self.token_expiry_hours)
-        _active_tokens[token] = expiry
-        
-        # Clean up expired tokens periodically
-        self._cleanup_expired_tokens()
-        
-        return token
-    
-    def _cleanup_expired_tokens(self) -> None:
-        """Remove expired tokens from memory"""
+        """Generate a signed, expiring auth token"""
         now = datetime.now(timezone.utc)
-        expired = [t for t, exp in _active_tokens.items() if now > exp]
-        for token in expired:
-            del _active_tokens[token]
+        claims = {
+            "sub": "admin",
+            "jti": uuid.uuid4().hex,
+            "iat": now,
+            "exp": now + timedelta(hours=self.token_expiry_hours)
+        }
+        return jwt.encode(claims, self.jwt_secret, algorithm=TOKEN_ALGORITHM)
+    
+    def _decode(self, token: str, verify_exp: bool = True) -> Optional[dict]:
+        try:
+            return jwt.decode(
+                token,
+                self.jwt_secret,
+                algorithms=[TOKEN_ALGORITHM],
+                options={"require": ["exp", "jti"], "verify_exp": verify_exp}
+            )
+        except jwt.InvalidTokenError:
+            return None
     
     def verify_token(self, token: str) -> bool:
-        """Verify an auth token"""
-        if not token or token not in _active_tokens:
+        """Verify an auth token (signature, expiry, revocation - CPU only)"""
+        if not token:
             return False
-        
-        expiry = _active_tokens[token]
-        if datetime.now(timezone.utc) > expiry:
-            # Token expired
-            del _active_tokens[token]
+        claims = self._decode(token)
+        return claims is not None and claims["jti"] not in self._revoked
+    
+    async def invalidate_token(self, token: str) -> bool:
+        """Invalidate a token (logout); other workers pick it up on their next sync"""
+        claims = self._decode(token)
+        if claims is None or claims["jti"] in self._revoked:
             return False
-        
+        self._revoked.set(claims["jti"], claims["exp"])
+        await self.store.revoke(claims["jti"], datetime.fromtimestamp(claims["exp"], timezone.utc))
         return True
     
-    def invalidate_token(self, token: str) -> bool:
-        """Invalidate a token (logout)"""
-        if token in _active_tokens:
-            del _active_tokens[token]
-            return True
-        return False
-    
     def get_token_expiry(self, token: str) -> Optional[datetime]:
         """Get token expiry time"""
-        return _active_tokens.get(token)
+        claims = self._decode(token)
+        return datetime.fromtimestamp(claims["exp"], timezone.utc) if claims else None
 
 
 # Singleton instance
@@ -0,0 +1,330 @@
+"""
+Auth Store - gemeinsamer Speicher für Token-Sperrliste, Signaturschlüssel und Login-Rate-Limits
+Backends: In-Memory (ein Prozess), MongoDB (TTL-Indexe) und Redis
+(optional, `pip install redis`). Auswahl über AUTH_STORE=memory|mongo|redis;
+mit mongo oder redis sehen alle Worker/Hosts denselben Schlüssel und dieselben Sperren.
+"""
+
+import os
+import math
+import heapq
+import secrets
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+AUTH_REDIS_PREFIX = 'oceancolor:auth:'
+# Upper bound for IPs tracked in memory (attempt counters and lockouts, LRU)
+AUTH_MAX_TRACKED_IPS = int(os.environ.get('AUTH_MAX_TRACKED_IPS', '10000'))
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Motor returns naive datetimes (UTC)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class ExpiryMap:
+    """
+    key -> expiry timestamp with time-ordered expiry (min-heap) and an
+    optional LRU cap. purge() only looks at the heap top, so expiring
+    entries costs O(log n) each and nothing while none is due.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._heap: List[Tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def set(self, key: str, expires_at: float) -> None:
+        self._entries[key] = expires_at
+        self._entries.move_to_end(key)
+        heapq.heappush(self._heap, (expires_at, key))
+        if self.max_entries is not None:
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        # Stale heap entries (overwritten or evicted keys) are dropped lazily;
+        # rebuild once they dominate so the heap stays O(len)
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [(exp, k) for k, exp in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def get(self, key: str, now: float) -> Optional[float]:
+        self.purge(now)
+        return self._entries.get(key)
+
+    def pop(self, key: str) -> Optional[float]:
+        return self._entries.pop(key, None)
+
+    def purge(self, now: float) -> None:
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._heap)
+            if self._entries.get(key) == expires_at:
+                del self._entries[key]
+
+    def items(self, now: float) -> List[Tuple[str, float]]:
+        self.purge(now)
+        return list(self._entries.items())
+
+
+class SlidingWindowCounter:
+    """
+    Approximate sliding-window counts per key: current and previous fixed
+    window, the previous one weighted by its remaining overlap (rounded up,
+    so a burst across the window boundary is never undercounted). Constant
+    memory per key, LRU cap on keys; idle keys fall off the LRU front.
+    """
+
+    def __init__(self, max_keys: int = AUTH_MAX_TRACKED_IPS):
+        self.max_keys = max_keys
+        # key -> [window index, count current window, count previous window]
+        self._counters: "OrderedDict[str, list]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def add(self, key: str, now: float, window_seconds: float) -> int:
+        """Counts one event, returns the (estimated) events within the last window"""
+        index = int(now // window_seconds)
+        counter = self._counters.get(key)
+        if counter is None or counter[0] < index - 1:
+            counter = [index, 0, 0]
+        elif counter[0] == index - 1:
+            counter = [index, 0, counter[1]]
+        counter[1] += 1
+        self._counters[key] = counter
+        self._counters.move_to_end(key)
+        self._evict(index)
+
+        overlap = 1.0 - (now / window_seconds - index)
+        return counter[1] + math.ceil(counter[2] * overlap)
+
+    def reset(self, key: str) -> None:
+        self._counters.pop(key, None)
+
+    def _evict(self, index: int) -> None:
+        # Front = least recently counted: drop while full or outside both windows
+        while self._counters:
+            key, counter = next(iter(self._counters.items()))
+            if len(self._counters) <= self.max_keys and counter[0] >= index - 1:
+                break
+            del self._counters[key]
+
+
+class AuthStore:
+    """
+    Storage interface used by AuthService.
+    All methods are async so shared backends need no blocking I/O.
+    """
+
+    async def get_or_create_signing_key(self) -> str:
+        """Token signing key shared by all workers (created once)"""
+        raise NotImplementedError
+
+    async def revoke(self, jti: str, expires_at: datetime) -> None:
+        """Revokes a token id until the token would expire anyway"""
+        raise NotImplementedError
+
+    async def list_revocations(self) -> Dict[str, datetime]:
+        """All revoked token ids that have not expired yet"""
+        raise NotImplementedError
+
+    async def record_attempt(self, ip: str, now: datetime, window: timedelta) -> int:
+        """Adds a failed attempt, returns the attempts within the window (including it)"""
+        raise NotImplementedError
+
+    async def lock(self, ip: str, until: datetime) -> None:
+        raise NotImplementedError
+
+    async def get_lock(self, ip: str) -> Optional[datetime]:
+        """Lockout end if the IP is currently locked"""
+        raise NotImplementedError
+
+    async def clear_attempts(self, ip: str) -> None:
+        """Removes attempts and lockout (successful login)"""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryAuthStore(AuthStore):
+    """
+    Process-local store (single worker, development).
+    Bounded memory: attempt counters and lockouts are capped at
+    max_tracked_ips; revocations only live until the token expires.
+    """
+
+    def __init__(self, max_tracked_ips: int = AUTH_MAX_TRACKED_IPS):
+        self._signing_key = secrets.token_urlsafe(32)
+        # Never evicted by size - a revocation must hold until expiry
+        self._revocations = ExpiryMap()
+        self._attempts = SlidingWindowCounter(max_tracked_ips)
+        self._locks = ExpiryMap(max_tracked_ips)
+
+    async def get_or_create_signing_key(self) -> str:
+        return self._signing_key
+
+    async def revoke(self, jti: str, expires_at: datetime) -> None:
+        self._revocations.set(jti, expires_at.timestamp())
+
+    async def list_revocations(self) -> Dict[str, datetime]:
+        now = datetime.now(timezone.utc).timestamp()
+        return {jti: datetime.fromtimestamp(exp, timezone.utc) for jti, exp in self._revocations.items(now)}
+
+    async def record_attempt(self, ip: str, now: datetime, window: timedelta) -> int:
+        return self._attempts.add(ip, now.timestamp(), window.total_seconds())
+
+    async def lock(self, ip: str, until: datetime) -> None:
+        self._locks.set(ip, until.timestamp())
+
+    async def get_lock(self, ip: str) -> Optional[datetime]:
+        until = self._locks.get(ip, datetime.now(timezone.utc).timestamp())
+        return datetime.fromtimestamp(until, timezone.utc) if until is not None else None
+
+    async def clear_attempts(self, ip: str) -> None:
+        self._attempts.reset(ip)
+        self._locks.pop(ip)
+
+
+class MongoAuthStore(AuthStore):
+    """
+    Shared store in MongoDB. Expiry via TTL indexes (see db_indexes.py);
+    the TTL monitor runs about once a minute, so reads check the time too.
+    """
+
+    def __init__(self, db):
+        self.keys = db.auth_keys
+        self.revocations = db.auth_revocations
+        self.attempts = db.auth_login_attempts
+        self.locks = db.auth_lockouts
+
+    async def get_or_create_signing_key(self) -> str:
+        # First worker wins, all others read its key
+        await self.keys.update_one(
+            {"id": "token_signing_key"},
+            {"$setOnInsert": {"secret": secrets.token_urlsafe(32), "created_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+        doc = await self.keys.find_one({"id": "token_signing_key"}, {"_id": 0, "secret": 1})
+        return doc["secret"]
+
+    async def revoke(self, jti: str, expires_at: datetime) -> None:
+        await self.revocations.update_one({"jti": jti}, {"$set": {"expires_at": expires_at}}, upsert=True)
+
+    async def list_revocations(self) -> Dict[str, datetime]:
+        cursor = self.revocations.find({"expires_at": {"$gt": datetime.now(timezone.utc)}}, {"_id": 0})
+        return {doc["jti"]: _as_utc(doc["expires_at"]) async for doc in cursor}
+
+    async def record_attempt(self, ip: str, now: datetime, window: timedelta) -> int:
+        await self.attempts.insert_one({"ip": ip, "at": now, "expires_at": now + window})
+        return await self.attempts.count_documents({"ip": ip, "at": {"$gt": now - window}})
+
+    async def lock(self, ip: str, until: datetime) -> None:
+        await self.locks.update_one({"ip": ip}, {"$set": {"until": until}}, upsert=True)
+
+    async def get_lock(self, ip: str) -> Optional[datetime]:
+        doc = await self.locks.find_one({"ip": ip}, {"_id": 0, "until": 1})
+        if not doc:
+            return None
+        until = _as_utc(doc["until"])
+        return until if datetime.now(timezone.utc) < until else None
+
+    async def clear_attempts(self, ip: str) -> None:
+        await self.attempts.delete_many({"ip": ip})
+        await self.locks.delete_one({"ip": ip})
+
+
+class RedisAuthStore(AuthStore):
+    """
+    Shared store for any Redis-protocol server (Redis, Valkey, KeyDB).
+    Keys expire on their own; attempts are a sorted set per IP.
+    Tests can pass a fakeredis client instead of a URL.
+    """
+
+    def __init__(self, url: Optional[str] = None, client=None, prefix: str = AUTH_REDIS_PREFIX):
+        if client is None:
+            try:
+                from redis import asyncio as redis_asyncio
+            except ImportError as e:
+                raise RuntimeError("AUTH_STORE=redis requires the redis package (pip install redis)") from e
+            client = redis_asyncio.from_url(url or os.environ.get('AUTH_REDIS_URL', 'redis://localhost:6379/0'))
+        self.redis = client
+        self.prefix = prefix
+
+    def _key(self, kind: str, value: str) -> str:
+        return f"{self.prefix}{kind}:{value}"
+
+    @staticmethod
+    def _ttl_ms(until: datetime) -> int:
+        return max(int((until - datetime.now(timezone.utc)).total_seconds() * 1000), 1)
+
+    async def get_or_create_signing_key(self) -> str:
+        key = self._key("keys", "token_signing_key")
+        await self.redis.set(key, secrets.token_urlsafe(32), nx=True)
+        value = await self.redis.get(key)
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    async def revoke(self, jti: str, expires_at: datetime) -> None:
+        # One sorted set, scored by expiry
+        key = self._key("revocations", "jti")
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(key, {jti: expires_at.timestamp()})
+            pipe.zremrangebyscore(key, "-inf", datetime.now(timezone.utc).timestamp())
+            await pipe.execute()
+
+    async def list_revocations(self) -> Dict[str, datetime]:
+        entries = await self.redis.zrangebyscore(
+            self._key("revocations", "jti"), datetime.now(timezone.utc).timestamp(), "+inf", withscores=True
+        )
+        return {
+            (jti.decode("utf-8") if isinstance(jti, bytes) else jti): datetime.fromtimestamp(score, timezone.utc)
+            for jti, score in entries
+        }
+
+    async def record_attempt(self, ip: str, now: datetime, window: timedelta) -> int:
+        key = self._key("attempts", ip)
+        score = now.timestamp()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(key, {f"{score}:{secrets.token_hex(4)}": score})
+            pipe.zremrangebyscore(key, "-inf", score - window.total_seconds())
+            pipe.zcard(key)
+            pipe.pexpire(key, int(window.total_seconds() * 1000))
+            _, _, count, _ = await pipe.execute()
+        return count
+
+    async def lock(self, ip: str, until: datetime) -> None:
+        await self.redis.set(self._key("lock", ip), until.timestamp(), px=self._ttl_ms(until))
+
+    async def get_lock(self, ip: str) -> Optional[datetime]:
+        value = await self.redis.get(self._key("lock", ip))
+        return datetime.fromtimestamp(float(value), timezone.utc) if value is not None else None
+
+    async def clear_attempts(self, ip: str) -> None:
+        await self.redis.delete(self._key("attempts", ip), self._key("lock", ip))
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+def create_auth_store(db, backend: Optional[str] = None) -> AuthStore:
+    """Store for the configured backend (AUTH_STORE, read at startup after .env)"""
+    backend = backend or os.environ.get('AUTH_STORE', 'memory')
+    if backend == "mongo":
+        store = MongoAuthStore(db)
+    elif backend == "redis":
+        store = RedisAuthStore()
+    elif backend == "memory":
+        store = MemoryAuthStore()
+    else:
+        raise ValueError(f"Unknown AUTH_STORE: {backend}")
+    logger.info(f"Auth store: {backend}")
+    return store
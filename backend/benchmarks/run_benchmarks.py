@@ -0,0 +1,355 @@
+"""
+Benchmarks - Hot Paths für Preisberechnung, Leads und Referenzen
+Läuft in-process gegen die ASGI-App mit einer lokalen Mongo-Attrappe
+(mongomock-motor), optional gegen eine echte MongoDB (BENCH_MONGO_URL).
+
+Aufruf (aus backend/):
+    python benchmarks/run_benchmarks.py                      # alle Benchmarks
+    python benchmarks/run_benchmarks.py --quick --only lead  # Auswahl, weniger Iterationen
+    python benchmarks/run_benchmarks.py --baseline benchmarks/results/main.json --threshold 0.2
+
+Ergebnisse werden als JSON gespeichert (--output). Mit --baseline wird
+verglichen; Exit-Code 1, wenn eine Kennzahl um mehr als --threshold
+schlechter ist.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import subprocess
+import tracemalloc
+from io import BytesIO
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Metric -> True if higher is better
+METRICS = {
+    "ops_per_sec": True,
+    "p50_ms": False,
+    "p99_ms": False,
+    "peak_memory_kb": False,
+}
+# Memory differences below this are noise
+MIN_MEMORY_DELTA_KB = 256
+ADMIN_PASSWORD = "benchmark"
+
+
+def _configure_environment() -> None:
+    """Must run before the app modules are imported (they connect at import time)"""
+    os.environ["ADMIN_PASSWORD"] = ADMIN_PASSWORD
+    # All requests come from one client; measure the handlers, not the limiter
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    os.environ.setdefault("DB_NAME", "oceancolor_benchmark")
+    mongo_url = os.environ.get("BENCH_MONGO_URL")
+    if mongo_url:
+        os.environ["MONGO_URL"] = mongo_url
+        return
+
+    try:
+        import mongomock_motor
+    except ImportError:
+        sys.exit("mongomock-motor is required for the local Mongo stand-in (or set BENCH_MONGO_URL)")
+    import motor.motor_asyncio
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost")
+    motor.motor_asyncio.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
+
+
+class Benchmark:
+    """One measured operation; `run` is sync or async, `setup` prepares data once"""
+
+    def __init__(self, name: str, run: Callable, iterations: int, setup: Optional[Callable[[], Awaitable]] = None):
+        self.name = name
+        self.run = run
+        self.iterations = iterations
+        self.setup = setup
+
+
+async def _call(run: Callable, i: int) -> None:
+    result = run(i)
+    if asyncio.iscoroutine(result):
+        await result
+
+
+async def measure(benchmark: Benchmark, scale: float) -> dict:
+    """Timing pass (without tracemalloc overhead), then a shorter memory pass"""
+    iterations = max(int(benchmark.iterations * scale), 5)
+    if benchmark.setup:
+        await benchmark.setup()
+
+    for i in range(min(iterations // 10 + 1, 20)):
+        await _call(benchmark.run, i)
+
+    latencies = np.empty(iterations)
+    started = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        await _call(benchmark.run, i)
+        latencies[i] = time.perf_counter() - t0
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline_memory, _ = tracemalloc.get_traced_memory()
+    for i in range(max(iterations // 10, 5)):
+        await _call(benchmark.run, i)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / elapsed, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 4),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 4),
+        "peak_memory_kb": round((peak_memory - baseline_memory) / 1024, 1),
+    }
+
+
+# ============= BENCHMARK DEFINITIONS =============
+
+def _price_requests(count: int = 200) -> list:
+    from pricing_models import PriceCalculationRequest
+
+    rng = np.random.default_rng(42)
+    leistungen = ["waende-decken", "lackierung", "tapezieren", "spachteln", "schimmel", "boden", "epoxid"]
+    requests = []
+    for i in range(count):
+        chosen = [l for l in leistungen if rng.random() < 0.35] or ["waende-decken"]
+        requests.append(PriceCalculationRequest(
+            plz="20095",
+            objektart="wohnung",
+            leistungen=chosen,
+            groesse_typ="raeume" if i % 2 else "flaeche",
+            anzahl_raeume=int(rng.integers(1, 10)),
+            wandflaeche_qm=round(float(rng.uniform(20, 600)), 1),
+            boden_flaeche_qm=round(float(rng.uniform(5, 120)), 1),
+            epoxid_flaeche_qm=round(float(rng.uniform(5, 80)), 1),
+            raumhoehe=["normal", "hoch", "sehr-hoch"][i % 3],
+            zustand=["normal", "altbau", "renovierung"][i % 3],
+            farbe=["weiss", "bunt", "farbig"][i % 3],
+            spachtelstufe=["keine", "q2", "q3", "q4"][i % 4],
+        ))
+    return requests
+
+
+def _lead_payload(i: int) -> dict:
+    return {
+        "plz": "20095",
+        "objektart": "wohnung",
+        "leistungen": ["waende-decken", "spachteln"],
+        "groesseOption": "raeume",
+        "anzahlRaeume": str(i % 8 + 1),
+        "zustand": "normal",
+        "farbe": "weiss",
+        "spachtelstufe": "q2",
+        "zusatzoptionen": [],
+        "name": f"Benchmark Kunde {i}",
+        "telefon": "040 123456",
+        "email": f"kunde{i}@example.com",
+        "geschaetzterPreis": "1200€ - 1450€",
+    }
+
+
+def _test_image(width: int = 3000, height: int = 2000) -> bytes:
+    """Photo-like JPEG (gradient + noise), typical upload size"""
+    from PIL import Image
+
+    rng = np.random.default_rng(7)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = np.stack([np.broadcast_to(x, (height, width)), np.broadcast_to(y, (height, width)),
+                     np.full((height, width), 128, dtype=np.float32)], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    output = BytesIO()
+    Image.fromarray(pixels, "RGB").save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+def build_benchmarks(http, db, references_db, token: str, seed_leads: int) -> List[Benchmark]:
+    from models import Lead
+    from lead_search import with_search_keys
+    from pricing_models import PricingConfig
+    from pricing_calculator import PricingCalculator
+    from media_service import media_service
+
+    price_requests = _price_requests()
+    cached_calculator = PricingCalculator(PricingConfig())
+    uncached_calculator = PricingCalculator(PricingConfig(), cache_size=0)
+    admin_headers = {"Authorization": f"Bearer {token}"}
+    image_data: dict = {}
+
+    async def seed_leads_collection():
+        await db.leads.delete_many({})
+        docs = []
+        for i in range(seed_leads):
+            payload = _lead_payload(i)
+            docs.append(with_search_keys(Lead(
+                plz=payload["plz"], objektart=payload["objektart"], leistungen=payload["leistungen"],
+                groesse_typ="raeume", anzahl_raeume=i % 8 + 1, raumhoehe="normal", zustand="normal",
+                farbe="weiss", spachtelstufe="q2", name=payload["name"], telefon=payload["telefon"],
+                email=payload["email"], preis_min=1200, preis_max=1450
+            ).dict()))
+        if docs:
+            await db.leads.insert_many(docs)
+
+    async def seed_references():
+        await references_db.references.delete_many({})
+        now = datetime.now(timezone.utc).isoformat()
+        await references_db.references.insert_many([
+            {
+                "id": f"ref-{i}", "company": f"Firma {i}", "title": f"Projekt {i}",
+                "description": "Innenanstrich und Spachtelarbeiten " * 5, "category": "Gewerbe",
+                "location": "Hamburg", "services": ["waende-decken", "spachteln"], "featured": i % 5 == 0,
+                "active": True, "order": i, "image": f"/media/references/ref-{i}.webp",
+                "image_webp": f"/media/references/ref-{i}.webp", "image_fallback": f"/media/references/ref-{i}.jpg",
+                "created_at": now, "updated_at": now,
+            }
+            for i in range(60)
+        ])
+
+    async def prepare_image():
+        image_data["jpeg"] = await asyncio.to_thread(_test_image)
+
+    async def create_lead_simple(i):
+        response = await http.post("/api/leads", data={"data": json.dumps(_lead_payload(i))})
+        assert response.status_code == 200, response.text
+
+    async def create_lead_structured(i):
+        payload = _lead_payload(i)
+        response = await http.post("/api/leads", data={
+            "calculator_data": json.dumps({
+                "plz": payload["plz"], "objektart": payload["objektart"], "leistungen": payload["leistungen"],
+                "groesseOption": "raeume", "anzahlRaeume": i % 8 + 1, "zustand": "normal",
+                "farbe": "weiss", "spachtelstufe": "q2",
+            }),
+            "contact_data": json.dumps({"name": payload["name"], "telefon": payload["telefon"], "email": payload["email"]}),
+            "price_data": json.dumps({"min": 1200, "max": 1450}),
+        })
+        assert response.status_code == 200, response.text
+
+    async def get_all_leads(i):
+        response = await http.get("/api/admin/leads", headers=admin_headers)
+        assert response.status_code == 200, response.text
+
+    async def get_references(i):
+        response = await http.get("/api/references")
+        assert response.status_code == 200, response.text
+
+    return [
+        Benchmark("pricing.calculate_price", lambda i: cached_calculator.calculate_price(price_requests[i % len(price_requests)]), 20000),
+        Benchmark("pricing.calculate_price_uncached", lambda i: uncached_calculator.calculate_price(price_requests[i % len(price_requests)]), 20000),
+        Benchmark("leads.create_lead_simple", create_lead_simple, 300),
+        Benchmark("leads.create_lead_structured", create_lead_structured, 300),
+        Benchmark("leads.get_all_leads", get_all_leads, 100, setup=seed_leads_collection),
+        Benchmark("references.get_references", get_references, 300, setup=seed_references),
+        Benchmark("media.process_image_jpeg", lambda i: media_service._process_image(image_data["jpeg"], "image/jpeg"), 10, setup=prepare_image),
+        Benchmark("media.process_image_webp", lambda i: media_service._process_image(image_data["jpeg"], "image/jpeg", convert_to_webp=True), 10, setup=prepare_image),
+    ]
+
+
+# ============= RUN & COMPARE =============
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """Returns a list of regressions (empty if none exceeds the threshold)"""
+    regressions = []
+    for name, current in results["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if not previous:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            if metric == "peak_memory_kb" and abs(new - old) < MIN_MEMORY_DELTA_KB:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            if worse > threshold:
+                regressions.append(f"{name}: {metric} {old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    import httpx
+    import server
+    import references_routes
+
+    # Request logs of httpx and the app would dominate the output
+    logging.disable(logging.INFO)
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as http:
+        login = await http.post("/api/admin/login", json={"password": ADMIN_PASSWORD})
+        token = login.json()["token"]
+
+        benchmarks = build_benchmarks(http, server.db, references_routes.db, token, args.seed_leads)
+        results = {}
+        for benchmark in benchmarks:
+            if args.only and not any(part in benchmark.name for part in args.only):
+                continue
+            results[benchmark.name] = await measure(benchmark, 0.2 if args.quick else 1.0)
+            r = results[benchmark.name]
+            print(f"{benchmark.name:36s} {r['ops_per_sec']:>12,.1f} ops/s  p50 {r['p50_ms']:>9.3f} ms  "
+                  f"p99 {r['p99_ms']:>9.3f} ms  peak {r['peak_memory_kb']:>10,.1f} KB")
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "mongo": "real" if os.environ.get("BENCH_MONGO_URL") else "mongomock",
+        "benchmarks": results,
+    }
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Ocean Color backend benchmarks")
+    parser.add_argument("--output", default=str(BACKEND_DIR / "benchmarks" / "results" / "latest.json"))
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative regression (0.25 = 25%%)")
+    parser.add_argument("--only", nargs="*", help="Run benchmarks whose name contains one of these")
+    parser.add_argument("--quick", action="store_true", help="20%% of the iterations")
+    parser.add_argument("--seed-leads", type=int, default=2000, help="Leads in the collection for get_all_leads")
+    args = parser.parse_args(argv)
+
+    _configure_environment()
+    results = asyncio.run(run(args))
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    print(f"\nResults written to {output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions above {args.threshold:.0%} (baseline {baseline.get('commit')}):")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nNo regressions above {args.threshold:.0%} (baseline {baseline.get('commit')})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
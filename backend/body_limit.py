@@ -0,0 +1,82 @@
+"""
+Body Size Limit - Obergrenze für Upload-Requests, bevor der Body gelesen wird
+Als ASGI-Middleware vor dem Routing: Starlettes Multipart-Parser spoolt sonst
+den kompletten Body in eine Temp-Datei, bevor der Handler irgendetwas prüfen kann.
+"""
+
+import json
+import logging
+from typing import Dict, Tuple
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# Multipart boundaries, headers and small form fields on top of the file limit
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class BodySizeLimitMiddleware:
+    """
+    ASGI middleware: caps the request body for (method, path) pairs.
+    - Content-Length above the limit: 413 right away, nothing is read
+    - Chunked / understated bodies: counted while streaming, the read
+      fails with 413 as soon as the limit is passed
+    limits: {("POST", "/api/references/upload-image"): max_bytes}
+    """
+
+    def __init__(self, app, limits: Dict[Tuple[str, str], int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limits.get((scope["method"], scope["path"]))
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Anfrage zu groß (max. {limit // (1024 * 1024)}MB)"
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    declared = 0
+                if declared > limit:
+                    logger.warning(f"Request body too large: {scope['method']} {scope['path']} ({declared} bytes)")
+                    await self._reject(send, detail)
+                    return
+                break
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    logger.warning(f"Request body too large: {scope['method']} {scope['path']} (> {limit} bytes)")
+                    # Raised inside body parsing -> FastAPI answers with this 413
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    async def _reject(send, detail: str) -> None:
+        body = json.dumps({"detail": detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close")
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,189 @@
+"""
+DB Indexes - Index-Bootstrap beim Start und Index-Audit der Hot Queries
+Aufruf als CLI: python db_indexes.py [--ensure] [--audit]
+"""
+
+import os
+import sys
+import asyncio
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import List
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+
+# Required indexes per collection (idempotent: create_index is a no-op if it exists)
+REQUIRED_INDEXES = {
+    "leads": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="status_created_at_id"),
+        IndexModel([("search_keys", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="search_keys_created_at_id"),
+        # Only leads whose notification is not queued yet (outbox sweep)
+        IndexModel([("notification_pending_since", ASCENDING)], name="notification_pending_since", sparse=True),
+    ],
+    "references": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("order", ASCENDING)], name="order"),
+        IndexModel([("active", ASCENDING), ("order", ASCENDING)], name="active_order"),
+        IndexModel([("category", ASCENDING)], name="category"),
+    ],
+    "pricing_config": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+    "pricing_config_versions": [
+        IndexModel([("version", DESCENDING)], name="version_unique", unique=True),
+    ],
+    "email_outbox": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # One notification per lead (request and sweep may both enqueue)
+        IndexModel([("lead_id", ASCENDING)], name="lead_id_unique", unique=True, sparse=True),
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt_at"),
+        IndexModel([("status", ASCENDING), ("locked_until", ASCENDING)], name="status_locked_until"),
+        # Delivered messages are kept for 30 days
+        IndexModel([("sent_at", ASCENDING)], name="sent_at_ttl", expireAfterSeconds=30 * 24 * 3600),
+    ],
+    # Shared auth store (AUTH_STORE=mongo), expired documents are removed by TTL
+    "auth_keys": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+    "auth_revocations": [
+        IndexModel([("jti", ASCENDING)], name="jti_unique", unique=True),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "auth_login_attempts": [
+        IndexModel([("ip", ASCENDING), ("at", ASCENDING)], name="ip_at"),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "auth_lockouts": [
+        IndexModel([("ip", ASCENDING)], name="ip_unique", unique=True),
+        IndexModel([("until", ASCENDING)], name="until_ttl", expireAfterSeconds=0),
+    ],
+}
+
+
+# Hot queries issued by the routers: (name, collection, filter, sort)
+HOT_QUERIES = [
+    ("lead by id", "leads", {"id": "LEAD-00000000000000"}, None),
+    ("admin lead list", "leads", {}, [("created_at", -1), ("id", -1)]),
+    ("admin lead list by status", "leads", {"status": "neu"}, [("created_at", -1), ("id", -1)]),
+    ("admin lead search", "leads", {"search_keys": {"$regex": "^mue"}}, [("created_at", -1), ("id", -1)]),
+    ("lead export by date", "leads", {"created_at": {"$gte": datetime(1970, 1, 1)}}, [("created_at", -1), ("id", -1)]),
+    ("reference by id", "references", {"id": "00000000-0000-0000-0000-000000000000"}, None),
+    ("reference list", "references", {}, [("order", 1)]),
+    ("active reference list", "references", {"active": True}, [("order", 1)]),
+    ("references by category", "references", {"category": "Gewerbe"}, None),
+    ("pricing config", "pricing_config", {"id": "pricing_config"}, None),
+    ("pricing config version", "pricing_config_versions", {"version": 0}, None),
+    ("pricing config history", "pricing_config_versions", {}, [("version", -1)]),
+    ("leads awaiting notification", "leads", {"notification_pending_since": {"$lte": datetime(1970, 1, 1)}}, None),
+    ("due outbox messages", "email_outbox", {"status": "pending", "next_attempt_at": {"$lte": datetime(1970, 1, 1)}}, [("next_attempt_at", 1)]),
+]
+
+_INDEX_STAGES = {"IXSCAN", "IDHACK", "EXPRESS_IXSCAN", "COUNT_SCAN", "DISTINCT_SCAN"}
+
+
+async def ensure_indexes(db) -> dict:
+    """
+    Creates all required indexes. Safe to run on every startup.
+    A failing index (e.g. duplicate keys for a unique index) is logged
+    and skipped so the API still starts.
+    Returns: {collection: [created or existing index names]}
+    """
+    ensured = {}
+
+    for collection_name, indexes in REQUIRED_INDEXES.items():
+        collection = db[collection_name]
+        ensured[collection_name] = []
+
+        for index in indexes:
+            try:
+                name = await collection.create_indexes([index])
+                ensured[collection_name].extend(name)
+            except OperationFailure as e:
+                logger.error(f"Index {collection_name}.{index.document['name']} could not be created: {e}")
+
+    logger.info(f"Indexes ensured: {ensured}")
+    return ensured
+
+
+def _collect_plan_stages(plan, stages: List[str], index_names: List[str]) -> None:
+    """Walks an explain plan tree and collects stage and index names"""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        if "indexName" in plan:
+            index_names.append(plan["indexName"])
+        for value in plan.values():
+            _collect_plan_stages(value, stages, index_names)
+    elif isinstance(plan, list):
+        for item in plan:
+            _collect_plan_stages(item, stages, index_names)
+
+
+async def audit_query_plans(db) -> List[dict]:
+    """
+    Runs explain() on the hot queries and reports the winning plan.
+    A query is flagged if its plan contains a COLLSCAN or no index stage.
+    """
+    reports = []
+
+    for name, collection_name, query, sort in HOT_QUERIES:
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+
+        stages: List[str] = []
+        index_names: List[str] = []
+        try:
+            explain = await cursor.explain()
+            _collect_plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}), stages, index_names)
+        except OperationFailure as e:
+            logger.error(f"Explain failed for '{name}': {e}")
+
+        uses_index = "COLLSCAN" not in stages and any(stage in _INDEX_STAGES for stage in stages)
+        reports.append({
+            "query": name,
+            "collection": collection_name,
+            "uses_index": uses_index,
+            "indexes": sorted(set(index_names)),
+            "stages": stages
+        })
+
+        if not uses_index:
+            logger.warning(f"Query '{name}' on {collection_name} does not use an index: {stages}")
+
+    return reports
+
+
+async def _main(argv: List[str]) -> int:
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    try:
+        if "--ensure" in argv or "--audit" not in argv:
+            for collection_name, names in (await ensure_indexes(db)).items():
+                print(f"{collection_name}: {', '.join(names)}")
+
+        if "--audit" in argv:
+            reports = await audit_query_plans(db)
+            for report in reports:
+                marker = "OK  " if report["uses_index"] else "SCAN"
+                print(f"[{marker}] {report['collection']}: {report['query']} -> {', '.join(report['indexes']) or '-'}")
+            return 0 if all(report["uses_index"] for report in reports) else 1
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
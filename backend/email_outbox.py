@@ -0,0 +1,292 @@
+"""
+Email Outbox - dauerhafte Warteschlange für Benachrichtigungen
+Leads schreiben nur in die Outbox, ein Hintergrund-Worker versendet
+mit Retry, exponentiellem Backoff und Dead-Lettering.
+Jeder Lead trägt bis zum Einreihen eine Markierung (notification_pending_since);
+fehlt danach die Outbox-Nachricht (Absturz, DB-Fehler), reiht der Worker sie nach.
+"""
+
+import os
+import uuid
+import random
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from email_service import email_service
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '8'))
+OUTBOX_BACKOFF_BASE_SECONDS = int(os.environ.get('OUTBOX_BACKOFF_BASE_SECONDS', '30'))
+OUTBOX_BACKOFF_MAX_SECONDS = int(os.environ.get('OUTBOX_BACKOFF_MAX_SECONDS', '3600'))
+OUTBOX_POLL_SECONDS = int(os.environ.get('OUTBOX_POLL_SECONDS', '10'))
+# A claimed message is reclaimed after this time (worker crashed mid-send)
+OUTBOX_LEASE_SECONDS = 120
+# Upper bound for leads bundled into one digest email
+DIGEST_MAX_LEADS = 100
+# Leads still marked after this time are queued by the worker's sweep
+# (the request that created them has crashed or failed to enqueue)
+OUTBOX_SWEEP_GRACE_SECONDS = int(os.environ.get('OUTBOX_SWEEP_GRACE_SECONDS', '60'))
+OUTBOX_SWEEP_BATCH = 100
+
+# Message status values
+STATUS_PENDING = "pending"
+STATUS_SENDING = "sending"
+STATUS_SENT = "sent"
+STATUS_DEAD = "dead"
+
+KIND_LEAD_NOTIFICATION = "lead_notification"
+
+# Lead field: set in the same insert as the lead, removed once the outbox message exists
+LEAD_NOTIFICATION_PENDING = "notification_pending_since"
+
+
+def get_outbox_collection(db):
+    return db.email_outbox
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with jitter: base * 2^(attempts-1), capped"""
+    delay = min(OUTBOX_BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)), OUTBOX_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def with_notification_pending(lead_doc: dict) -> dict:
+    """Lead document carrying its pending notification (one atomic insert)"""
+    return {**lead_doc, LEAD_NOTIFICATION_PENDING: datetime.utcnow()}
+
+
+async def enqueue_lead_notification(db, lead_data: dict) -> str:
+    """
+    Writes a lead notification to the outbox, clears the lead's pending
+    mark and wakes the worker. Idempotent per lead (request and sweep may both run).
+    """
+    now = datetime.utcnow()
+    # Digest mode: hold the message until the end of the current window
+    next_attempt_at = email_service.digest_window_end(now) if email_service.digest_minutes else now
+    message = {
+        "id": str(uuid.uuid4()),
+        "kind": KIND_LEAD_NOTIFICATION,
+        "payload": {k: v for k, v in lead_data.items() if k not in ("search_keys", LEAD_NOTIFICATION_PENDING)},
+        "status": STATUS_PENDING,
+        "attempts": 0,
+        "next_attempt_at": next_attempt_at,
+        "locked_until": None,
+        "last_error": None,
+        "created_at": now,
+        "updated_at": now,
+        "sent_at": None
+    }
+    outbox = get_outbox_collection(db)
+    try:
+        stored = await outbox.find_one_and_update(
+            {"lead_id": lead_data["id"], "kind": KIND_LEAD_NOTIFICATION},
+            {"$setOnInsert": {**message, "lead_id": lead_data["id"]}},
+            upsert=True,
+            projection={"_id": 0, "id": 1},
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # Concurrent upsert for the same lead (lead_id_unique) - already queued
+        stored = await outbox.find_one({"lead_id": lead_data["id"], "kind": KIND_LEAD_NOTIFICATION}, {"_id": 0, "id": 1})
+    await db.leads.update_one({"id": lead_data["id"]}, {"$unset": {LEAD_NOTIFICATION_PENDING: ""}})
+    outbox_worker.notify()
+    return stored["id"]
+
+
+async def sweep_pending_notifications(db, now: Optional[datetime] = None) -> int:
+    """Queues notifications of leads still marked after the grace period"""
+    cutoff = (now or datetime.utcnow()) - timedelta(seconds=OUTBOX_SWEEP_GRACE_SECONDS)
+    leads = await db.leads.find(
+        {LEAD_NOTIFICATION_PENDING: {"$lte": cutoff}},
+        {"_id": 0, "search_keys": 0}
+    ).to_list(OUTBOX_SWEEP_BATCH)
+    for lead in leads:
+        await enqueue_lead_notification(db, lead)
+        logger.warning(f"Lead notification queued by sweep: {lead['id']}")
+    return len(leads)
+
+
+class EmailOutboxWorker:
+    """
+    Background worker delivering outbox messages off the request path.
+    Messages are claimed atomically, so several API workers can run it.
+    """
+
+    def __init__(self):
+        self._db = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def start(self, db) -> None:
+        """Start the worker loop (called from the app lifespan)"""
+        if self._task and not self._task.done():
+            return
+        self._db = db
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="email-outbox-worker")
+        logger.info("Email outbox worker started")
+
+    async def stop(self) -> None:
+        """Stop the worker; unsent messages stay in the outbox"""
+        self._stopping = True
+        if self._wakeup:
+            self._wakeup.set()
+        if self._task:
+            try:
+                await asyncio.wait_for(self._task, timeout=15)
+            except asyncio.TimeoutError:
+                self._task.cancel()
+            self._task = None
+        await asyncio.to_thread(email_service.close)
+        logger.info("Email outbox worker stopped")
+
+    def notify(self) -> None:
+        """Wake the worker after a new message was enqueued"""
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await sweep_pending_notifications(self._db)
+            except Exception as e:
+                logger.error(f"Email outbox sweep error: {e}")
+            try:
+                # Drain everything that is due, then wait for new work
+                while not self._stopping and await self.process_next():
+                    pass
+            except Exception as e:
+                logger.error(f"Email outbox worker error: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                # Idle: keep pooled SMTP sessions warm
+                await asyncio.to_thread(email_service.keepalive)
+            self._wakeup.clear()
+
+    async def _claim(self, kind: Optional[str] = None) -> Optional[dict]:
+        """Atomically claim one due message (pending or with an expired lease)"""
+        now = datetime.utcnow()
+        query = {"$or": [
+            {"status": STATUS_PENDING, "next_attempt_at": {"$lte": now}},
+            {"status": STATUS_SENDING, "locked_until": {"$lt": now}}
+        ]}
+        if kind:
+            query["kind"] = kind
+        return await get_outbox_collection(self._db).find_one_and_update(
+            query,
+            {
+                "$set": {
+                    "status": STATUS_SENDING,
+                    "locked_until": now + timedelta(seconds=OUTBOX_LEASE_SECONDS),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _deliver(self, message: dict) -> bool:
+        """Sends the message in a thread, smtplib blocks"""
+        if message["kind"] == KIND_LEAD_NOTIFICATION:
+            return await asyncio.to_thread(email_service.send_lead_notification, message["payload"])
+        raise ValueError(f"Unknown outbox message kind: {message['kind']}")
+
+    async def process_next(self) -> bool:
+        """Deliver one due message (or one digest). Returns False if nothing was due."""
+        message = await self._claim()
+        if not message:
+            return False
+
+        if email_service.digest_minutes and message["kind"] == KIND_LEAD_NOTIFICATION:
+            return await self._process_digest(message)
+
+        error = None
+        try:
+            delivered = await self._deliver(message)
+            if not delivered:
+                error = "Delivery failed"
+        except Exception as e:
+            error = str(e)
+
+        await self._record_result(message, error)
+        return True
+
+    async def _process_digest(self, first: dict) -> bool:
+        """Bundle all due lead notifications into a single email"""
+        messages = [first]
+        while len(messages) < DIGEST_MAX_LEADS:
+            message = await self._claim(kind=KIND_LEAD_NOTIFICATION)
+            if not message:
+                break
+            messages.append(message)
+
+        error = None
+        try:
+            payloads = [message["payload"] for message in messages]
+            if not await asyncio.to_thread(email_service.send_lead_digest, payloads):
+                error = "Delivery failed"
+        except Exception as e:
+            error = str(e)
+
+        for message in messages:
+            await self._record_result(message, error)
+        return True
+
+    async def _record_result(self, message: dict, error: Optional[str]) -> None:
+        """Mark a claimed message as sent, retry later, or dead-letter it"""
+        outbox = get_outbox_collection(self._db)
+        now = datetime.utcnow()
+
+        if error is None:
+            await outbox.update_one(
+                {"id": message["id"]},
+                {"$set": {"status": STATUS_SENT, "sent_at": now, "locked_until": None, "last_error": None, "updated_at": now}}
+            )
+            logger.info(f"Outbox message delivered: {message['id']}")
+        elif message["attempts"] >= OUTBOX_MAX_ATTEMPTS:
+            await outbox.update_one(
+                {"id": message["id"]},
+                {"$set": {"status": STATUS_DEAD, "locked_until": None, "last_error": error, "updated_at": now}}
+            )
+            logger.error(f"Outbox message dead-lettered after {message['attempts']} attempts: {message['id']} ({error})")
+        else:
+            delay = backoff_seconds(message["attempts"])
+            await outbox.update_one(
+                {"id": message["id"]},
+                {"$set": {
+                    "status": STATUS_PENDING,
+                    "next_attempt_at": now + timedelta(seconds=delay),
+                    "locked_until": None,
+                    "last_error": error,
+                    "updated_at": now
+                }}
+            )
+            logger.warning(f"Outbox message {message['id']} failed (attempt {message['attempts']}), retry in {delay:.0f}s: {error}")
+
+
+async def retry_dead_message(db, message_id: str) -> bool:
+    """Moves a dead-lettered message back to pending"""
+    now = datetime.utcnow()
+    result = await get_outbox_collection(db).update_one(
+        {"id": message_id, "status": STATUS_DEAD},
+        {"$set": {"status": STATUS_PENDING, "attempts": 0, "next_attempt_at": now, "updated_at": now}}
+    )
+    if result.modified_count:
+        outbox_worker.notify()
+    return result.modified_count > 0
+
+
+# Singleton instance
+outbox_worker = EmailOutboxWorker()
@@ -1,8 +1,12 @@
 import os
+import time
 import smtplib
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import List
+from typing import Callable, List, Tuple
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
@@ -14,6 +18,117 @@ load_dotenv(ROOT_DIR / '.env')
 logger = logging.getLogger(__name__)
 
 
+class SMTPConnectionPool:
+    """
+    Small pool of authenticated SMTP sessions (thread-safe).
+    Idle sessions are checked with NOOP before reuse and dropped
+    after max_idle_seconds, before the server closes them itself.
+    """
+    
+    def __init__(
+        self,
+        connect: Callable[[], smtplib.SMTP],
+        size: int = 2,
+        keepalive_seconds: int = 60,
+        max_idle_seconds: int = 240
+    ):
+        self._connect = connect
+        self.keepalive_seconds = keepalive_seconds
+        self.max_idle_seconds = max_idle_seconds
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+    
+    @staticmethod
+    def _is_alive(server: smtplib.SMTP) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+    
+    @staticmethod
+    def _quit(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+    
+    def _take_idle(self) -> smtplib.SMTP:
+        """Returns a usable idle session or None"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                server, last_used = self._idle.pop()
+            
+            idle_for = time.monotonic() - last_used
+            if idle_for > self.max_idle_seconds:
+                self._quit(server)
+            elif idle_for > self.keepalive_seconds and not self._is_alive(server):
+                self._quit(server)
+            else:
+                return server
+    
+    def acquire(self) -> smtplib.SMTP:
+        """Borrow a session (blocks while all sessions are in use)"""
+        self._slots.acquire()
+        try:
+            return self._take_idle() or self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+    
+    def release(self, server: smtplib.SMTP, broken: bool = False) -> None:
+        """Return a session; broken sessions are closed instead of reused"""
+        try:
+            if broken:
+                self._quit(server)
+            else:
+                with self._lock:
+                    self._idle.append((server, time.monotonic()))
+        finally:
+            self._slots.release()
+    
+    @contextmanager
+    def session(self):
+        server = self.acquire()
+        broken = False
+        try:
+            yield server
+        except BaseException:
+            broken = True
+            raise
+        finally:
+            self.release(server, broken=broken)
+    
+    def keepalive(self) -> None:
+        """NOOP idle sessions that have been quiet for a while, drop dead ones"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        
+        alive = []
+        now = time.monotonic()
+        for server, last_used in idle:
+            if now - last_used > self.max_idle_seconds:
+                self._quit(server)
+            elif now - last_used > self.keepalive_seconds:
+                if self._is_alive(server):
+                    alive.append((server, now))
+                else:
+                    self._quit(server)
+            else:
+                alive.append((server, last_used))
+        
+        with self._lock:
+            self._idle.extend(alive)
+    
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._quit(server)
+
+
 class EmailService:
     def __init__(self):
         # IONOS SMTP Configuration
@@ -25,6 +140,15 @@ class EmailService:
         self.admin_email = os.environ.get('ADMIN_EMAIL', 'info@ocean-maler.de')
         self.use_tls = os.environ.get('SMTP_USE_TLS', 'true').lower() == 'true'
         
+        # Session pool + digest mode (0 = one email per lead)
+        self.digest_minutes = int(os.environ.get('EMAIL_DIGEST_MINUTES', '0'))
+        self._pool = SMTPConnectionPool(
+            self._connect,
+            size=int(os.environ.get('SMTP_POOL_SIZE', '2')),
+            keepalive_seconds=int(os.environ.get('SMTP_KEEPALIVE_SECONDS', '60')),
+            max_idle_seconds=int(os.environ.get('SMTP_MAX_IDLE_SECONDS', '240'))
+        )
+        
         # Check if SMTP is properly configured
         self.smtp_configured = bool(self.smtp_user and self.smtp_password)
         
@@ -34,39 +158,36 @@ class EmailService:
         else:
             logger.info(f"SMTP configured: {self.smtp_host}:{self.smtp_port} (TLS: {self.use_tls})")
         
-    def send_lead_notification(self, lead_data: dict) -> bool:
-        """
-        Sendet E-Mail-Benachrichtigung für neuen Lead über IONOS SMTP
-        """
-        try:
-            subject = f"Neue Anfrage – Angebotsrechner – {lead_data['plz']} – {lead_data['objektart'].title()}"
-            
-            # Leistungen formatieren
-            leistungen_text = "\n    • ".join([
-                self._format_leistung(l) for l in lead_data['leistungen']
+    def _build_lead_message(self, lead_data: dict) -> Tuple[str, str]:
+        """Baut Betreff und Text der Lead-Benachrichtigung"""
+        subject = f"Neue Anfrage – Angebotsrechner – {lead_data['plz']} – {lead_data['objektart'].title()}"
+        
+        # Leistungen formatieren
+        leistungen_text = "\n    • ".join([
+            self._format_leistung(l) for l in lead_data['leistungen']
+        ])
+        
+        # Zusatzoptionen formatieren
+        zusatzoptionen_text = "Keine"
+        if lead_data.get('zusatzoptionen'):
+            zusatzoptionen_text = "\n    • ".join([
+                self._format_zusatzoption(z) for z in lead_data['zusatzoptionen']
             ])
-            
-            # Zusatzoptionen formatieren
-            zusatzoptionen_text = "Keine"
-            if lead_data.get('zusatzoptionen'):
-                zusatzoptionen_text = "\n    • ".join([
-                    self._format_zusatzoption(z) for z in lead_data['zusatzoptionen']
-                ])
-            
-            # Größe formatieren
-            if lead_data['groesse_typ'] == 'raeume':
-                groesse_text = f"{lead_data['anzahl_raeume']} Räume"
-            else:
-                groesse_text = f"{lead_data['wandflaeche_qm']} m² Wandfläche"
-            
-            # Fotos formatieren
-            foto_text = "Keine Fotos hochgeladen"
-            if lead_data.get('foto_urls'):
-                foto_links = "\n    ".join([f"• {url}" for url in lead_data['foto_urls']])
-                foto_text = f"\n    {foto_links}"
-            
-            # E-Mail Body
-            body = f"""
+        
+        # Größe formatieren
+        if lead_data['groesse_typ'] == 'raeume':
+            groesse_text = f"{lead_data['anzahl_raeume']} Räume"
+        else:
+            groesse_text = f"{lead_data['wandflaeche_qm']} m² Wandfläche"
+        
+        # Fotos formatieren
+        foto_text = "Keine Fotos hochgeladen"
+        if lead_data.get('foto_urls'):
+            foto_links = "\n    ".join([f"• {url}" for url in lead_data['foto_urls']])
+            foto_text = f"\n    {foto_links}"
+        
+        # E-Mail Body
+        body = f"""
 Neue Anfrage über den Angebotsrechner
 
 ═══════════════════════════════════════════════
@@ -101,12 +222,12 @@ E-Mail:           {lead_data['email']}
 Rückruf gewünscht: {lead_data.get('rueckruf_zeit', 'Nicht angegeben')}
 
 """
-            
-            # Add bemerkung if present
-            if lead_data.get('bemerkung'):
-                body += f"Bemerkung:\n{lead_data['bemerkung']}\n\n"
-            
-            body += f"""═══════════════════════════════════════════════
+        
+        # Add bemerkung if present
+        if lead_data.get('bemerkung'):
+            body += f"Bemerkung:\n{lead_data['bemerkung']}\n\n"
+        
+        body += f"""═══════════════════════════════════════════════
 FOTOS
 ═══════════════════════════════════════════════
 {foto_text}
@@ -118,7 +239,54 @@ Erstellt: {lead_data['created_at'].strftime('%d.%m.%Y %H:%M')} Uhr
 
 Diese Anfrage wurde über den Angebotsrechner auf oceancolor.de erstellt.
 """
-            
+        
+        return subject, body
+    
+    def send_lead_notification(self, lead_data: dict) -> bool:
+        """
+        Sendet E-Mail-Benachrichtigung für neuen Lead über IONOS SMTP
+        """
+        try:
+            subject, body = self._build_lead_message(lead_data)
+        except Exception as e:
+            logger.error(f"Failed to send email: {str(e)}")
+            self._log_fallback('Unknown', 'Error creating email body')
+            return False
+        
+        return self._deliver(subject, body)
+    
+    def send_lead_digest(self, leads: List[dict]) -> bool:
+        """
+        Sendet eine Sammel-E-Mail für mehrere Leads (Digest-Modus)
+        """
+        if len(leads) == 1:
+            return self.send_lead_notification(leads[0])
+        
+        try:
+            bodies = [self._build_lead_message(lead)[1] for lead in leads]
+            plz_list = ", ".join(sorted({lead['plz'] for lead in leads}))
+            subject = f"Neue Anfragen – Angebotsrechner – {len(leads)} Leads – {plz_list}"[:200]
+            body = f"{len(leads)} neue Anfragen über den Angebotsrechner\n\n"
+            body += "\n\n".join(
+                f"###############################################\nANFRAGE {index} VON {len(leads)}\n###############################################\n{lead_body}"
+                for index, lead_body in enumerate(bodies, start=1)
+            )
+        except Exception as e:
+            logger.error(f"Failed to build digest email: {str(e)}")
+            self._log_fallback('Unknown', 'Error creating email body')
+            return False
+        
+        return self._deliver(subject, body)
+    
+    def digest_window_end(self, now: datetime) -> datetime:
+        """End of the digest window containing `now` (windows aligned to the hour)"""
+        window = timedelta(minutes=self.digest_minutes)
+        start = now.replace(minute=0, second=0, microsecond=0)
+        return start + window * ((now - start) // window + 1)
+    
+    def _deliver(self, subject: str, body: str) -> bool:
+        """Sendet Betreff/Text an ADMIN_EMAIL oder loggt, wenn SMTP fehlt"""
+        try:
             # Wenn SMTP nicht konfiguriert ist, nur loggen
             if not self.smtp_configured:
                 logger.info("="*50)
@@ -139,24 +307,10 @@ Diese Anfrage wurde über den Angebotsrechner auf oceancolor.de erstellt.
             
             msg.attach(MIMEText(body, 'plain', 'utf-8'))
             
-            # IONOS SMTP mit STARTTLS
+            # IONOS SMTP über gepoolte Session
             try:
-                with smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=10) as server:
-                    server.set_debuglevel(0)  # Set to 1 for debugging
-                    
-                    if self.use_tls:
-                        # STARTTLS für IONOS
-                        server.starttls()
-                        logger.info("STARTTLS initiated")
-                    
-                    # Login
-                    server.login(self.smtp_user, self.smtp_password)
-                    logger.info(f"SMTP login successful as {self.smtp_user}")
-                    
-                    # Send
-                    server.send_message(msg)
-                    logger.info(f"✓ Lead notification email sent to {self.admin_email}")
-                
+                self._send_message(msg)
+                logger.info(f"✓ Lead notification email sent to {self.admin_email}")
                 return True
                 
             except smtplib.SMTPAuthenticationError as e:
@@ -176,6 +330,52 @@ Diese Anfrage wurde über den Angebotsrechner auf oceancolor.de erstellt.
                              body if 'body' in locals() else 'Error creating email body')
             return False
     
+    def _connect(self) -> smtplib.SMTP:
+        """Öffnet eine neue, angemeldete SMTP-Session"""
+        server = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=10)
+        try:
+            server.set_debuglevel(0)  # Set to 1 for debugging
+            
+            if self.use_tls:
+                # STARTTLS für IONOS
+                server.starttls()
+                logger.info("STARTTLS initiated")
+            
+            # Login
+            server.login(self.smtp_user, self.smtp_password)
+            logger.info(f"SMTP login successful as {self.smtp_user}")
+            return server
+        except BaseException:
+            server.close()
+            raise
+    
+    def _send_message(self, msg) -> None:
+        """Send over a pooled session, retry once if the session went stale"""
+        for attempt in range(2):
+            server = self._pool.acquire()
+            try:
+                server.send_message(msg)
+            except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+                self._pool.release(server, broken=True)
+                if attempt:
+                    raise
+                logger.info(f"SMTP session lost ({e}), reconnecting")
+            except BaseException:
+                self._pool.release(server, broken=True)
+                raise
+            else:
+                self._pool.release(server)
+                return
+    
+    def keepalive(self) -> None:
+        """Keep pooled SMTP sessions alive (blocking, call off the event loop)"""
+        if self.smtp_configured:
+            self._pool.keepalive()
+    
+    def close(self) -> None:
+        """Close all pooled SMTP sessions"""
+        self._pool.close_all()
+    
     def _log_fallback(self, subject: str, body: str):
         """Fallback: Log email wenn Versand fehlschlägt"""
         logger.info("="*50)
@@ -0,0 +1,49 @@
+"""
+Lead IDs - zeitlich sortierbare, kollisionsfreie Lead-IDs
+Format: LEAD-<YYYYMMDDHHMMSSmmm>-<Zähler 4-stellig><Zufall 4 Hex>
+"""
+
+import secrets
+import threading
+import time
+from datetime import datetime, timezone
+
+_MAX_COUNTER = 9999
+
+
+class LeadIdGenerator:
+    """
+    Monotonic within a process (millisecond timestamp + counter),
+    random suffix keeps IDs from parallel workers apart.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._counter = 0
+
+    def generate(self) -> str:
+        with self._lock:
+            now_ms = int(time.time() * 1000)
+            if now_ms <= self._last_ms:
+                # Same millisecond (or clock stepped back): keep counting on the last timestamp
+                now_ms = self._last_ms
+                self._counter += 1
+                if self._counter > _MAX_COUNTER:
+                    now_ms += 1
+                    self._counter = 0
+            else:
+                self._counter = 0
+            self._last_ms = now_ms
+            counter = self._counter
+
+        stamp = datetime.fromtimestamp(now_ms / 1000, tz=timezone.utc)
+        return f"LEAD-{stamp:%Y%m%d%H%M%S}{now_ms % 1000:03d}-{counter:04d}{secrets.token_hex(2).upper()}"
+
+
+_generator = LeadIdGenerator()
+
+
+def generate_lead_id() -> str:
+    """New unique lead ID"""
+    return _generator.generate()
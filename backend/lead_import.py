@@ -0,0 +1,194 @@
+"""
+Lead Import - Massenimport von Leads aus NDJSON oder CSV
+Validiert in Batches gegen models.Lead und schreibt mit unordered insert_many
+"""
+
+import csv
+import codecs
+import json
+import asyncio
+import logging
+from typing import Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+from models import Lead
+from lead_ids import generate_lead_id
+from lead_search import with_search_keys
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+FORMAT_NDJSON = "ndjson"
+FORMAT_CSV = "csv"
+
+# CSV columns holding comma-separated lists
+_LIST_FIELDS = {"leistungen", "zusatzoptionen", "foto_urls"}
+# Never taken from the input
+_IGNORED_FIELDS = {"_id", "id", "search_keys"}
+# Excel "CSV" exports on German Windows are Windows-1252, not UTF-8
+FALLBACK_ENCODING = "cp1252"
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """Guess the import format from file name / content type"""
+    name = (filename or "").lower()
+    ctype = (content_type or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in ctype or "jsonl" in ctype:
+        return FORMAT_NDJSON
+    if name.endswith(".csv") or "csv" in ctype:
+        return FORMAT_CSV
+    return None
+
+
+def _normalize_csv_row(row: dict) -> dict:
+    """Empty cells -> missing, list columns -> lists"""
+    normalized = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        key = key.strip()
+        if isinstance(value, str):
+            value = value.strip()
+            if value == "":
+                continue
+            if key in _LIST_FIELDS:
+                value = [part.strip() for part in value.split(",") if part.strip()]
+        normalized[key] = value
+    return normalized
+
+
+def _decode_lines(stream) -> Iterator[str]:
+    """
+    Text lines from a binary stream: UTF-8 until the first line that is not,
+    then Windows-1252 for the rest. Lines before the switch were valid UTF-8
+    and therefore (practically) plain ASCII, which decodes the same in both.
+    Never raises UnicodeDecodeError, so a bad byte cannot abort an import halfway.
+    """
+    encoding = "utf-8"
+    for line_number, line in enumerate(iter(stream.readline, b""), start=1):
+        if line_number == 1 and line.startswith(codecs.BOM_UTF8):
+            line = line[len(codecs.BOM_UTF8):]
+        if encoding == "utf-8":
+            try:
+                yield line.decode("utf-8")
+                continue
+            except UnicodeDecodeError:
+                logger.info(f"Import is not UTF-8 (line {line_number}), decoding as {FALLBACK_ENCODING}")
+                encoding = FALLBACK_ENCODING
+        yield line.decode(encoding, errors="replace")
+
+
+def iter_import_rows(stream, fmt: str) -> Iterator[Tuple[int, object]]:
+    """
+    Yields (row_number, row) from a binary stream. Rows that cannot be
+    parsed are yielded as an Exception instead of a dict.
+    """
+    text = _decode_lines(stream)
+
+    if fmt == FORMAT_CSV:
+        reader = csv.DictReader(text)
+        # Row 1 is the header
+        row_number = 1
+        while True:
+            row_number += 1
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                # e.g. NUL bytes; the reader continues with the next line
+                yield row_number, ValueError(str(e))
+                continue
+            yield row_number, _normalize_csv_row(row)
+
+    for row_number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("JSON object expected")
+            yield row_number, row
+        except ValueError as e:
+            yield row_number, e
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+def read_batch(rows: Iterator[Tuple[int, object]], batch_size: int = IMPORT_BATCH_SIZE) -> Tuple[List[Tuple[int, dict]], List[dict], bool]:
+    """
+    Reads and validates up to batch_size rows (blocking, run in a thread).
+    Returns: (valid [(row_number, lead_doc)], errors, exhausted)
+    """
+    valid = []
+    errors = []
+
+    for row_number, row in rows:
+        if isinstance(row, Exception):
+            errors.append({"row": row_number, "error": f"Invalid row: {row}"})
+        else:
+            data = {k: v for k, v in row.items() if k not in _IGNORED_FIELDS}
+            data.setdefault("lead_type", "import")
+            try:
+                lead = Lead(**data, id=generate_lead_id())
+                valid.append((row_number, with_search_keys(lead.dict())))
+            except ValidationError as e:
+                errors.append({"row": row_number, "error": _format_validation_error(e)})
+
+        if len(valid) + len(errors) >= batch_size:
+            return valid, errors, False
+
+    return valid, errors, True
+
+
+async def import_leads(leads_collection, stream, fmt: str) -> dict:
+    """
+    Imports all rows from the stream. Parsing/validation runs in a thread,
+    writes use unordered insert_many per batch.
+    """
+    rows = iter_import_rows(stream, fmt)
+    imported = 0
+    failed = 0
+    errors: List[dict] = []
+
+    def report(new_errors: List[dict]) -> None:
+        nonlocal failed
+        failed += len(new_errors)
+        errors.extend(new_errors[:MAX_REPORTED_ERRORS - len(errors)])
+
+    exhausted = False
+    while not exhausted:
+        valid, batch_errors, exhausted = await asyncio.to_thread(read_batch, rows)
+        report(batch_errors)
+        if not valid:
+            continue
+
+        try:
+            result = await leads_collection.insert_many([doc for _, doc in valid], ordered=False)
+            imported += len(result.inserted_ids)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            imported += e.details.get("nInserted", len(valid) - len(write_errors))
+            report([
+                {"row": valid[err["index"]][0], "error": err.get("errmsg", "Write failed")}
+                for err in write_errors
+            ])
+
+    logger.info(f"Lead import finished: {imported} imported, {failed} failed")
+    return {
+        "imported": imported,
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors)
+    }
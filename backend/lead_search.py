@@ -0,0 +1,104 @@
+"""
+Lead Search - normalisierte Suchschlüssel für die Admin-Suche
+Ersetzt unverankerte $regex-Suchen durch indizierte Präfix-Suche
+"""
+
+import re
+import unicodedata
+import logging
+from typing import List, Optional
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+# Field on the lead document holding the search keys
+SEARCH_KEYS_FIELD = "search_keys"
+
+# Limits for user input
+MAX_SEARCH_TERMS = 5
+MAX_TERM_LENGTH = 50
+
+_TOKEN_SPLIT = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_text(value) -> str:
+    """Lowercase, fold accents/umlauts (ü -> u, ß -> ss)"""
+    text = unicodedata.normalize('NFKD', str(value or '').casefold())
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokenize(value) -> List[str]:
+    """Split normalized text into alphanumeric tokens"""
+    return [token[:MAX_TERM_LENGTH] for token in _TOKEN_SPLIT.split(normalize_text(value)) if token]
+
+
+def build_search_keys(lead: dict) -> List[str]:
+    """
+    Builds the search keys for a lead:
+    PLZ, name parts, email local part + domain parts, phone digits
+    """
+    keys = []
+    keys.extend(tokenize(lead.get('plz')))
+    keys.extend(tokenize(lead.get('name')))
+
+    email = str(lead.get('email') or '')
+    local, _, domain = email.partition('@')
+    keys.extend(tokenize(local))
+    keys.extend(tokenize(domain))
+
+    phone_digits = re.sub(r'\D', '', str(lead.get('telefon') or ''))
+    if phone_digits:
+        keys.append(phone_digits)
+
+    # Deduplicate, keep order
+    return list(dict.fromkeys(keys))
+
+
+def with_search_keys(lead: dict) -> dict:
+    """Returns the lead document with up-to-date search keys"""
+    lead[SEARCH_KEYS_FIELD] = build_search_keys(lead)
+    return lead
+
+
+def build_search_query(search: str) -> Optional[dict]:
+    """
+    Translates admin search input into an index-friendly query.
+    Every term must prefix-match one of the search keys (anchored, escaped).
+    """
+    terms = tokenize(search)[:MAX_SEARCH_TERMS]
+    if not terms:
+        return None
+
+    clauses = [
+        {SEARCH_KEYS_FIELD: {'$regex': f'^{re.escape(term)}'}}
+        for term in terms
+    ]
+    return clauses[0] if len(clauses) == 1 else {'$and': clauses}
+
+
+async def backfill_search_keys(leads_collection, batch_size: int = 500) -> int:
+    """Adds search keys to leads stored before search keys existed"""
+    updated = 0
+    operations = []
+    cursor = leads_collection.find(
+        {SEARCH_KEYS_FIELD: {'$exists': False}},
+        {'_id': 1, 'plz': 1, 'name': 1, 'email': 1, 'telefon': 1}
+    ).batch_size(batch_size)
+
+    async for lead in cursor:
+        operations.append(UpdateOne(
+            {'_id': lead['_id']},
+            {'$set': {SEARCH_KEYS_FIELD: build_search_keys(lead)}}
+        ))
+        if len(operations) >= batch_size:
+            await leads_collection.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+
+    if operations:
+        await leads_collection.bulk_write(operations, ordered=False)
+        updated += len(operations)
+
+    if updated:
+        logger.info(f"Search keys backfilled for {updated} leads")
+    return updated
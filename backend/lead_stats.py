@@ -0,0 +1,173 @@
+"""
+Lead Stats - Dashboard-Statistiken in einer Aggregation
+Status-Zähler, Zeitreihen (Tag/Woche) und Preisbänder, im Prozess gecacht
+"""
+
+import asyncio
+import time
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, get_args
+
+from models import LeadStatus
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+STATS_DAYS = 30
+STATS_WEEKS = 12
+# Upper bound for staleness when another worker wrote the lead
+STATS_CACHE_TTL_SECONDS = 60
+# Price bands on preis_max (EUR), last band is open-ended
+PRICE_BAND_BOUNDARIES = [0, 500, 1000, 2500, 5000, 10000]
+
+LEAD_STATUSES = list(get_args(LeadStatus))
+
+
+def _build_pipeline(now: datetime) -> list:
+    """Single $facet aggregation for all dashboard numbers"""
+    day_start = datetime(now.year, now.month, now.day) - timedelta(days=STATS_DAYS - 1)
+    week_start = datetime(now.year, now.month, now.day) - timedelta(days=now.weekday(), weeks=STATS_WEEKS - 1)
+
+    return [
+        {"$facet": {
+            "by_status": [
+                {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+            ],
+            "per_day": [
+                {"$match": {"created_at": {"$gte": day_start}}},
+                {"$group": {
+                    "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+                    "count": {"$sum": 1}
+                }}
+            ],
+            "per_week": [
+                {"$match": {"created_at": {"$gte": week_start}}},
+                {"$group": {
+                    "_id": {"$dateToString": {"format": "%G-W%V", "date": "$created_at"}},
+                    "count": {"$sum": 1}
+                }}
+            ],
+            "price_bands": [
+                {"$bucket": {
+                    "groupBy": "$preis_max",
+                    "boundaries": PRICE_BAND_BOUNDARIES,
+                    "default": "open",
+                    "output": {
+                        "count": {"$sum": 1},
+                        "preis_min": {"$sum": "$preis_min"},
+                        "preis_max": {"$sum": "$preis_max"}
+                    }
+                }}
+            ],
+            "price_totals": [
+                {"$group": {
+                    "_id": None,
+                    "preis_min": {"$sum": "$preis_min"},
+                    "preis_max": {"$sum": "$preis_max"}
+                }}
+            ]
+        }}
+    ]
+
+
+def _band_label(lower, index: int) -> str:
+    if lower == "open":
+        return f"{PRICE_BAND_BOUNDARIES[-1]}+"
+    return f"{lower}-{PRICE_BAND_BOUNDARIES[index + 1]}"
+
+
+def _shape_result(facets: dict, now: datetime) -> dict:
+    """Converts the raw $facet output into the dashboard response"""
+    stats = {status: 0 for status in LEAD_STATUSES}
+    total = 0
+    for row in facets.get("by_status", []):
+        total += row["count"]
+        if row["_id"] in stats:
+            stats[row["_id"]] = row["count"]
+    stats["total"] = total
+
+    # Zeitreihen lückenlos auffüllen (Tage/Wochen ohne Leads = 0)
+    today = datetime(now.year, now.month, now.day)
+    day_counts = {row["_id"]: row["count"] for row in facets.get("per_day", [])}
+    stats["per_day"] = [
+        {"date": day, "count": day_counts.get(day, 0)}
+        for day in (
+            (today - timedelta(days=offset)).strftime("%Y-%m-%d")
+            for offset in range(STATS_DAYS - 1, -1, -1)
+        )
+    ]
+
+    week_counts = {row["_id"]: row["count"] for row in facets.get("per_week", [])}
+    monday = today - timedelta(days=today.weekday())
+    stats["per_week"] = [
+        {"week": week, "count": week_counts.get(week, 0)}
+        for week in (
+            (monday - timedelta(weeks=offset)).strftime("%G-W%V")
+            for offset in range(STATS_WEEKS - 1, -1, -1)
+        )
+    ]
+
+    bands = {row["_id"]: row for row in facets.get("price_bands", [])}
+    stats["price_bands"] = []
+    for index, lower in enumerate(PRICE_BAND_BOUNDARIES[:-1] + ["open"]):
+        row = bands.get(lower, {})
+        stats["price_bands"].append({
+            "band": _band_label(lower, index),
+            "count": row.get("count", 0),
+            "preis_min": round(row.get("preis_min", 0), 2),
+            "preis_max": round(row.get("preis_max", 0), 2)
+        })
+
+    totals = (facets.get("price_totals") or [{}])[0]
+    stats["preis_min_total"] = round(totals.get("preis_min", 0), 2)
+    stats["preis_max_total"] = round(totals.get("preis_max", 0), 2)
+
+    return stats
+
+
+async def compute_lead_stats(leads_collection) -> dict:
+    """Runs the dashboard aggregation (one round trip)"""
+    now = datetime.utcnow()
+    result = await leads_collection.aggregate(_build_pipeline(now)).to_list(1)
+    return _shape_result(result[0] if result else {}, now)
+
+
+class LeadStatsCache:
+    """
+    In-process cache for dashboard stats.
+    Invalidated on local lead writes; TTL bounds staleness across workers.
+    """
+
+    def __init__(self, ttl_seconds: int = STATS_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._stats: Optional[dict] = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        """Drop cached stats (called after create_lead / update_lead)"""
+        self._generation += 1
+        self._stats = None
+
+    async def get(self, leads_collection) -> dict:
+        """Return cached stats or recompute them once for concurrent callers"""
+        if self._stats is not None and time.monotonic() < self._expires_at:
+            return self._stats
+
+        async with self._lock:
+            if self._stats is not None and time.monotonic() < self._expires_at:
+                return self._stats
+
+            generation = self._generation
+            stats = await compute_lead_stats(leads_collection)
+            # Only cache if no write invalidated us while aggregating
+            if generation == self._generation:
+                self._stats = stats
+                self._expires_at = time.monotonic() + self.ttl_seconds
+            return stats
+
+
+# Singleton instance
+lead_stats_cache = LeadStatsCache()
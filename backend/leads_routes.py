@@ -1,14 +1,20 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Header, Query, Request
-from fastapi.responses import StreamingResponse
-from typing import List, Optional
+from fastapi.responses import Response, StreamingResponse
+from typing import List, Optional, Tuple
+import asyncio
+import base64
+import binascii
 import json
 import os
-import shutil
+import re
+import threading
+import uuid
 from pathlib import Path
 import logging
-from datetime import datetime
+from datetime import datetime, date, time, timedelta
 import csv
 import io
+import zlib
 
 from models import (
     LeadCreate, 
@@ -22,15 +28,31 @@ from pricing_models import (
     PricingConfig,
     PricingConfigUpdate,
     PriceCalculationRequest,
-    PriceCalculationResponse
+    PriceCalculationResponse,
+    BatchPriceCalculationRequest
 )
 from pricing_calculator import (
-    PricingCalculator,
     get_pricing_config,
-    update_pricing_config
+    update_pricing_config,
+    rollback_pricing_config,
+    list_pricing_config_versions,
+    PricingConfigConflict,
+    pricing_config_cache,
+    pricing_response_cache,
+    price_request_etag,
+    etag_matches
 )
-from email_service import email_service
+from email_outbox import enqueue_lead_notification, with_notification_pending, get_outbox_collection, retry_dead_message
 from auth_service import auth_service
+from lead_stats import lead_stats_cache
+from lead_search import with_search_keys, build_search_query
+from db_indexes import ensure_indexes, audit_query_plans
+from lead_ids import generate_lead_id
+from lead_import import detect_format, import_leads
+from pricing_batch import BatchPricingCalculator
+from pricing_simulation import apply_config_update, simulate_repricing
+from pricing_rules import rules_bundle_cache, find_rules_bundle
+from rate_limit import request_client_ip
 
 logger = logging.getLogger(__name__)
 
@@ -40,36 +62,178 @@ router = APIRouter(prefix="/api")
 UPLOAD_DIR = Path("/app/backend/uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
 
+# Upload limits (lead photos)
+MAX_UPLOAD_FILES = 5
+MAX_UPLOAD_FILE_BYTES = 15 * 1024 * 1024
+MAX_UPLOAD_REQUEST_BYTES = 50 * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# Batch price calculation
+MAX_PRICE_BATCH_SIZE = 50000
+
+
+# Admin lead list: page size limits
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Admin lead list: only the fields the overview table needs.
+# The full document (bemerkung, foto_urls, admin_notizen, ...) is served by get_lead_by_id.
+LEAD_SUMMARY_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "status": 1,
+    "created_at": 1,
+    "plz": 1,
+    "objektart": 1,
+    "leistungen": 1,
+    "groesse_typ": 1,
+    "anzahl_raeume": 1,
+    "wandflaeche_qm": 1,
+    "name": 1,
+    "telefon": 1,
+    "email": 1,
+    "preis_min": 1,
+    "preis_max": 1,
+    "distanceFromHamburg": 1,
+    "isOutsideServiceArea": 1
+}
+
+# CSV export: Mongo batch size and size of each streamed chunk
+EXPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+EXPORT_CSV_HEADER = [
+    'Lead ID', 'Status', 'Erstellt', 'PLZ', 'Objektart', 'Leistungen',
+    'Größe', 'Raumhöhe', 'Zustand', 'Farbe', 'Spachtelstufe',
+    'Preis Min', 'Preis Max', 'Name', 'Telefon', 'E-Mail', 'Rückruf Zeit'
+]
+
+EXPORT_PROJECTION = {
+    "_id": 0,
+    "id": 1, "status": 1, "created_at": 1, "plz": 1, "objektart": 1,
+    "leistungen": 1, "groesse_typ": 1, "anzahl_raeume": 1, "wandflaeche_qm": 1,
+    "raumhoehe": 1, "zustand": 1, "farbe": 1, "spachtelstufe": 1,
+    "preis_min": 1, "preis_max": 1, "name": 1, "telefon": 1, "email": 1,
+    "rueckruf_zeit": 1
+}
+
 
 # Helper: Get DB collection
 def get_leads_collection(db):
     return db.leads
 
 
+# Helper: Keyset pagination cursor over (created_at, id)
+def encode_lead_cursor(lead: dict) -> str:
+    """Erzeugt einen opaken Cursor aus created_at und id des letzten Leads"""
+    created_at = lead.get('created_at')
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    payload = json.dumps({"c": created_at, "i": lead.get('id')}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_lead_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Liest created_at und id aus einem Cursor, 400 bei ungültigem Cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(payload['c']), str(payload['i'])
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+class UploadTooLarge(Exception):
+    """Upload exceeds the per-file or per-request byte limit"""
+
+
+class _UploadBudget:
+    """Byte budget shared by all files of one request (thread-safe)"""
+    
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+    
+    def consume(self, size: int) -> None:
+        with self._lock:
+            self.used += size
+            if self.used > self.limit:
+                raise UploadTooLarge(f"Uploads zu groß (max. {self.limit // (1024 * 1024)} MB gesamt)")
+
+
+def _unique_upload_name(filename: str) -> str:
+    """Collision-free, path-safe file name: timestamp + random id + cleaned client name"""
+    base = re.sub(r'[^A-Za-z0-9._-]', '_', Path(filename).name).strip('._')[-100:] or "upload"
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{timestamp}_{uuid.uuid4().hex[:12]}_{base}"
+
+
+def _copy_upload(source, target: Path, budget: _UploadBudget) -> int:
+    """Copies one upload in chunks, enforcing the limits while streaming (runs in a thread)"""
+    written = 0
+    # "xb": never overwrite an existing file
+    with target.open("xb") as buffer:
+        while True:
+            chunk = source.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            written += len(chunk)
+            if written > MAX_UPLOAD_FILE_BYTES:
+                raise UploadTooLarge(f"Datei zu groß (max. {MAX_UPLOAD_FILE_BYTES // (1024 * 1024)} MB pro Datei)")
+            budget.consume(len(chunk))
+            buffer.write(chunk)
+    return written
+
+
 # Helper: Save uploaded files
 async def save_uploaded_files(files: List[UploadFile]) -> List[str]:
-    """Speichert hochgeladene Dateien und gibt URLs zurück"""
-    file_urls = []
+    """
+    Speichert hochgeladene Dateien und gibt URLs zurück.
+    Files are written concurrently in the thread pool; on any error
+    (including size limits -> 413) all files of the request are removed.
+    """
+    files = [file for file in files if file.filename]
     
+    # Reject early when the client announced the size
     for file in files:
-        if file.filename:
-            # Generiere einzigartigen Dateinamen
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            safe_filename = f"{timestamp}_{file.filename}"
-            
-            file_path = UPLOAD_DIR / safe_filename
-            
-            # Speichere Datei
-            with file_path.open("wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            
-            # URL für Frontend (relative path)
-            file_url = f"/uploads/{safe_filename}"
-            file_urls.append(file_url)
-            
-            logger.info(f"File saved: {safe_filename}")
+        if file.size is not None and file.size > MAX_UPLOAD_FILE_BYTES:
+            raise HTTPException(status_code=413, detail=f"Datei zu groß (max. {MAX_UPLOAD_FILE_BYTES // (1024 * 1024)} MB pro Datei)")
+    
+    budget = _UploadBudget(MAX_UPLOAD_REQUEST_BYTES)
+    targets = [UPLOAD_DIR / _unique_upload_name(file.filename) for file in files]
+    
+    results = await asyncio.gather(
+        *(asyncio.to_thread(_copy_upload, file.file, target, budget) for file, target in zip(files, targets)),
+        return_exceptions=True
+    )
     
-    return file_urls
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        for target in targets:
+            target.unlink(missing_ok=True)
+        too_large = next((error for error in errors if isinstance(error, UploadTooLarge)), None)
+        if too_large:
+            raise HTTPException(status_code=413, detail=str(too_large))
+        raise errors[0]
+    
+    for target, size in zip(targets, results):
+        logger.info(f"File saved: {target.name} ({size} bytes)")
+    
+    # URL für Frontend (relative path)
+    return [f"/uploads/{target.name}" for target in targets]
+
+
+async def _queue_lead_notification(db, lead: Lead) -> None:
+    """
+    Queue the notification right away. The lead is already stored with its
+    pending mark, so if this fails the outbox sweep queues it later - the lead
+    must not be reported as failed (the client would submit it twice).
+    """
+    try:
+        await enqueue_lead_notification(db, lead.dict())
+    except Exception as e:
+        logger.error(f"Failed to queue email notification for {lead.id}, left to the outbox sweep: {e}")
 
 
 @router.post("/leads", response_model=LeadResponse)
@@ -111,7 +275,7 @@ async def create_lead(
             if foto and foto.filename:
                 foto_urls = await save_uploaded_files([foto])
             
-            lead_id = f"LEAD-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            lead_id = generate_lead_id()
             
             lead = Lead(
                 id=lead_id,
@@ -121,6 +285,8 @@ async def create_lead(
                 groesse_typ=lead_data.get('groesseOption', 'raeume'),
                 anzahl_raeume=int(lead_data.get('anzahlRaeume') or 0) if lead_data.get('anzahlRaeume') else None,
                 wandflaeche_qm=float(lead_data.get('wandflaeche') or 0) if lead_data.get('wandflaeche') else None,
+                boden_flaeche_qm=float(lead_data.get('bodenFlaeche')) if lead_data.get('bodenFlaeche') else None,
+                epoxid_flaeche_qm=float(lead_data.get('epoxidFlaeche')) if lead_data.get('epoxidFlaeche') else None,
                 raumhoehe='normal',
                 zustand=lead_data.get('zustand', 'normal'),
                 farbe=lead_data.get('farbe', 'weiss'),
@@ -141,13 +307,11 @@ async def create_lead(
             # Save to database
             from server import db
             leads_collection = get_leads_collection(db)
-            await leads_collection.insert_one(lead.dict())
+            await leads_collection.insert_one(with_notification_pending(with_search_keys(lead.dict())))
+            lead_stats_cache.invalidate()
             
-            # Send email notification
-            try:
-                email_service.send_lead_notification(lead.dict())
-            except Exception as e:
-                logger.error(f"Failed to send email notification: {e}")
+            # Queue email notification (delivered by the outbox worker)
+            await _queue_lead_notification(db, lead)
             
             logger.info(f"Lead created (simple format): {lead_id}")
             
@@ -164,15 +328,15 @@ async def create_lead(
             price_data_obj = json.loads(price_data)
             
             # Validate file count
-            if files and len(files) > 5:
-                raise HTTPException(status_code=400, detail="Maximum 5 files allowed")
+            if files and len(files) > MAX_UPLOAD_FILES:
+                raise HTTPException(status_code=400, detail=f"Maximum {MAX_UPLOAD_FILES} files allowed")
             
             # Save uploaded files
             foto_urls = []
             if files:
                 foto_urls = await save_uploaded_files(files)
             
-            lead_id = f"LEAD-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            lead_id = generate_lead_id()
             
             lead = Lead(
                 id=lead_id,
@@ -182,6 +346,8 @@ async def create_lead(
                 groesse_typ=calc_data['groesseOption'],
                 anzahl_raeume=calc_data.get('anzahlRaeume'),
                 wandflaeche_qm=calc_data.get('wandflaeche'),
+                boden_flaeche_qm=calc_data.get('bodenFlaeche'),
+                epoxid_flaeche_qm=calc_data.get('epoxidFlaeche'),
                 raumhoehe=calc_data.get('raumhoehe', 'normal'),
                 zustand=calc_data['zustand'],
                 farbe=calc_data['farbe'],
@@ -201,12 +367,10 @@ async def create_lead(
             
             from server import db
             leads_collection = get_leads_collection(db)
-            await leads_collection.insert_one(lead.dict())
+            await leads_collection.insert_one(with_notification_pending(with_search_keys(lead.dict())))
+            lead_stats_cache.invalidate()
             
-            try:
-                email_service.send_lead_notification(lead.dict())
-            except Exception as e:
-                logger.error(f"Failed to send email notification: {e}")
+            await _queue_lead_notification(db, lead)
             
             logger.info(f"Lead created (structured format): {lead_id}")
             
@@ -218,6 +382,8 @@ async def create_lead(
         
         raise HTTPException(status_code=400, detail="Invalid request format")
         
+    except HTTPException:
+        raise
     except json.JSONDecodeError as e:
         logger.error(f"Invalid JSON data: {e}")
         raise HTTPException(status_code=400, detail="Invalid JSON data")
@@ -236,15 +402,12 @@ async def admin_login(request: AdminLoginRequest, req: Request):
     - Logs login attempts (IP anonymized, no passwords)
     """
     # Get client IP
-    client_ip = req.client.host if req.client else "unknown"
-    forwarded_for = req.headers.get("X-Forwarded-For")
-    if forwarded_for:
-        client_ip = forwarded_for.split(",")[0].strip()
+    ip = request_client_ip(req)
     
     # Verify password with rate limiting
-    success, error_msg, attempts_remaining = auth_service.verify_password(
+    success, error_msg, attempts_remaining = await auth_service.verify_password(
         request.password, 
-        ip=client_ip
+        ip=ip
     )
     
     if not success:
@@ -264,7 +427,7 @@ async def admin_login(request: AdminLoginRequest, req: Request):
     )
 
 
-def verify_admin_token(authorization: Optional[str] = Header(None)):
+async def verify_admin_token(authorization: Optional[str] = Header(None)):
     """Dependency to verify admin token"""
     if not authorization:
         raise HTTPException(status_code=401, detail="Authorization header missing")
@@ -281,58 +444,126 @@ def verify_admin_token(authorization: Optional[str] = Header(None)):
     return token
 
 
+@router.post("/admin/logout")
+async def admin_logout(authorization: str = Header(None)):
+    """Logout: revokes the token on all workers"""
+    token = await verify_admin_token(authorization)
+    await auth_service.invalidate_token(token)
+    return {"success": True, "message": "Abgemeldet"}
+
+
 @router.get("/admin/leads")
 async def get_all_leads(
     status: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     authorization: str = Header(None)
 ):
-    """Get all leads with optional filtering"""
-    verify_admin_token(authorization)
+    """
+    Get leads with optional filtering, newest first.
+    
+    Keyset pagination on (created_at, id): pass `next_cursor` from the
+    previous response as `cursor` to fetch the next page. Returns a
+    summary projection; use /admin/leads/{lead_id} for the full lead.
+    """
+    await verify_admin_token(authorization)
     
     try:
         from server import db
         leads_collection = get_leads_collection(db)
         
         # Build query
-        query = {}
+        conditions = []
         if status:
-            query['status'] = status
+            conditions.append({'status': status})
         if search:
-            # Search in PLZ, name, email
-            query['$or'] = [
-                {'plz': {'$regex': search, '$options': 'i'}},
-                {'name': {'$regex': search, '$options': 'i'}},
-                {'email': {'$regex': search, '$options': 'i'}}
-            ]
+            # Prefix search on indexed search keys (PLZ, name, email, phone)
+            search_query = build_search_query(search)
+            if search_query:
+                conditions.append(search_query)
+        if cursor:
+            # Continue strictly after the last lead of the previous page
+            cursor_created_at, cursor_id = decode_lead_cursor(cursor)
+            conditions.append({'$or': [
+                {'created_at': {'$lt': cursor_created_at}},
+                {'created_at': cursor_created_at, 'id': {'$lt': cursor_id}}
+            ]})
         
-        # Get leads sorted by created_at desc, exclude MongoDB _id
-        leads = await leads_collection.find(query, {"_id": 0}).sort('created_at', -1).to_list(1000)
+        query = {'$and': conditions} if len(conditions) > 1 else (conditions[0] if conditions else {})
+        
+        # Fetch one extra lead to know whether another page exists
+        leads = await leads_collection.find(query, LEAD_SUMMARY_PROJECTION) \
+            .sort([('created_at', -1), ('id', -1)]) \
+            .limit(page_size + 1) \
+            .to_list(page_size + 1)
+        
+        has_more = len(leads) > page_size
+        leads = leads[:page_size]
+        next_cursor = encode_lead_cursor(leads[-1]) if has_more else None
         
         return {
             "success": True,
             "count": len(leads),
-            "leads": leads
+            "leads": leads,
+            "has_more": has_more,
+            "next_cursor": next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching leads: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/admin/leads/import")
+async def import_leads_endpoint(
+    file: UploadFile = File(...),
+    format: Optional[str] = Form(None),
+    authorization: str = Header(None)
+):
+    """
+    Bulk import leads from NDJSON (one JSON object per line) or CSV
+    (header row with Lead field names, lists comma-separated).
+    Every row gets a new lead ID; returns per-row errors.
+    """
+    await verify_admin_token(authorization)
+    
+    fmt = (format or detect_format(file.filename, file.content_type) or "").lower()
+    if fmt not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="Unknown format, use ndjson or csv")
+    
+    try:
+        from server import db
+        leads_collection = get_leads_collection(db)
+        
+        result = await import_leads(leads_collection, file.file, fmt)
+        lead_stats_cache.invalidate()
+        
+        return {
+            "success": True,
+            **result
+        }
+        
+    except Exception as e:
+        logger.error(f"Error importing leads: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/admin/leads/{lead_id}")
 async def get_lead_by_id(
     lead_id: str,
     authorization: str = Header(None)
 ):
     """Get single lead by ID"""
-    verify_admin_token(authorization)
+    await verify_admin_token(authorization)
     
     try:
         from server import db
         leads_collection = get_leads_collection(db)
         
-        lead = await leads_collection.find_one({"id": lead_id}, {"_id": 0})
+        lead = await leads_collection.find_one({"id": lead_id}, {"_id": 0, "search_keys": 0})
         
         if not lead:
             raise HTTPException(status_code=404, detail="Lead not found")
@@ -356,7 +587,7 @@ async def update_lead(
     authorization: str = Header(None)
 ):
     """Update lead status or notes"""
-    verify_admin_token(authorization)
+    await verify_admin_token(authorization)
     
     try:
         from server import db
@@ -380,6 +611,8 @@ async def update_lead(
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Lead not found")
         
+        lead_stats_cache.invalidate()
+        
         return {
             "success": True,
             "message": "Lead updated successfully"
@@ -392,63 +625,123 @@ async def update_lead(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _format_export_row(lead: dict) -> list:
+    """Formatiert einen Lead als CSV-Zeile"""
+    leistungen = ', '.join(lead.get('leistungen', []))
+    groesse = f"{lead.get('anzahl_raeume', '')} Räume" if lead.get('groesse_typ') == 'raeume' else f"{lead.get('wandflaeche_qm', '')} m²"
+    
+    return [
+        lead.get('id', ''),
+        lead.get('status', ''),
+        lead.get('created_at', ''),
+        lead.get('plz', ''),
+        lead.get('objektart', ''),
+        leistungen,
+        groesse,
+        lead.get('raumhoehe', ''),
+        lead.get('zustand', ''),
+        lead.get('farbe', ''),
+        lead.get('spachtelstufe', ''),
+        lead.get('preis_min', ''),
+        lead.get('preis_max', ''),
+        lead.get('name', ''),
+        lead.get('telefon', ''),
+        lead.get('email', ''),
+        lead.get('rueckruf_zeit', '')
+    ]
+
+
+async def _stream_leads_csv(cursor, compress: bool = False):
+    """
+    Yields the CSV export chunk by chunk while iterating the Mongo cursor.
+    Only one chunk (~EXPORT_CHUNK_BYTES) is held in memory at a time.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # wbits=31 -> gzip container
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    
+    def drain() -> bytes:
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate(0)
+        if compressor:
+            return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        return data
+    
+    try:
+        # Header first so the client receives bytes immediately
+        writer.writerow(EXPORT_CSV_HEADER)
+        yield drain()
+        
+        async for lead in cursor:
+            writer.writerow(_format_export_row(lead))
+            if buffer.tell() >= EXPORT_CHUNK_BYTES:
+                yield drain()
+        
+        chunk = drain()
+        if compressor:
+            chunk += compressor.flush()
+        if chunk:
+            yield chunk
+    except Exception as e:
+        # Headers are already sent, so the error can only be logged
+        logger.error(f"Error streaming lead export: {e}")
+        raise
+    finally:
+        await cursor.close()
+
+
+def _lead_filter_query(status: Optional[str], date_from: Optional[date], date_to: Optional[date]) -> dict:
+    """Mongo filter for status and date range (inclusive, by created_at)"""
+    query = {}
+    if status:
+        query['status'] = status
+    if date_from or date_to:
+        query['created_at'] = {}
+        if date_from:
+            query['created_at']['$gte'] = datetime.combine(date_from, time.min)
+        if date_to:
+            query['created_at']['$lt'] = datetime.combine(date_to + timedelta(days=1), time.min)
+    return query
+
+
 @router.get("/admin/export")
 async def export_leads_csv(
+    status: Optional[str] = Query(None),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    gzip: bool = Query(False),
     authorization: str = Header(None)
 ):
-    """Export all leads as CSV"""
-    verify_admin_token(authorization)
+    """
+    Export leads as CSV (streamed).
+    Optional filters: status, date_from/date_to (inclusive, YYYY-MM-DD).
+    gzip=true compresses the stream on the fly.
+    """
+    await verify_admin_token(authorization)
     
     try:
         from server import db
         leads_collection = get_leads_collection(db)
         
-        leads = await leads_collection.find({}, {"_id": 0}).sort('created_at', -1).to_list(1000)
-        
-        # Create CSV in memory
-        output = io.StringIO()
-        writer = csv.writer(output)
+        query = _lead_filter_query(status, date_from, date_to)
+        cursor = leads_collection.find(query, EXPORT_PROJECTION) \
+            .sort([('created_at', -1), ('id', -1)]) \
+            .batch_size(EXPORT_BATCH_SIZE)
         
-        # Header
-        writer.writerow([
-            'Lead ID', 'Status', 'Erstellt', 'PLZ', 'Objektart', 'Leistungen',
-            'Größe', 'Raumhöhe', 'Zustand', 'Farbe', 'Spachtelstufe',
-            'Preis Min', 'Preis Max', 'Name', 'Telefon', 'E-Mail', 'Rückruf Zeit'
-        ])
-        
-        # Data
-        for lead in leads:
-            leistungen = ', '.join(lead.get('leistungen', []))
-            groesse = f"{lead.get('anzahl_raeume', '')} Räume" if lead.get('groesse_typ') == 'raeume' else f"{lead.get('wandflaeche_qm', '')} m²"
-            
-            writer.writerow([
-                lead.get('id', ''),
-                lead.get('status', ''),
-                lead.get('created_at', ''),
-                lead.get('plz', ''),
-                lead.get('objektart', ''),
-                leistungen,
-                groesse,
-                lead.get('raumhoehe', ''),
-                lead.get('zustand', ''),
-                lead.get('farbe', ''),
-                lead.get('spachtelstufe', ''),
-                lead.get('preis_min', ''),
-                lead.get('preis_max', ''),
-                lead.get('name', ''),
-                lead.get('telefon', ''),
-                lead.get('email', ''),
-                lead.get('rueckruf_zeit', '')
-            ])
-        
-        output.seek(0)
+        filename = f"leads_export_{datetime.now().strftime('%Y%m%d')}.csv"
+        headers = {}
+        media_type = "text/csv; charset=utf-8"
+        if gzip:
+            filename += ".gz"
+            media_type = "application/gzip"
+        headers["Content-Disposition"] = f"attachment; filename={filename}"
         
         return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="text/csv",
-            headers={
-                "Content-Disposition": f"attachment; filename=leads_export_{datetime.now().strftime('%Y%m%d')}.csv"
-            }
+            _stream_leads_csv(cursor, compress=gzip),
+            media_type=media_type,
+            headers=headers
         )
         
     except Exception as e:
@@ -460,26 +753,21 @@ async def export_leads_csv(
 async def get_admin_stats(
     authorization: str = Header(None)
 ):
-    """Get dashboard statistics"""
-    verify_admin_token(authorization)
+    """
+    Get dashboard statistics: counts per status, leads per day/week
+    and price-band totals. Computed in one aggregation and cached.
+    """
+    await verify_admin_token(authorization)
     
     try:
         from server import db
         leads_collection = get_leads_collection(db)
         
-        total_leads = await leads_collection.count_documents({})
-        new_leads = await leads_collection.count_documents({"status": "neu"})
-        kontaktiert = await leads_collection.count_documents({"status": "kontaktiert"})
-        gewonnen = await leads_collection.count_documents({"status": "gewonnen"})
+        stats = await lead_stats_cache.get(leads_collection)
         
         return {
             "success": True,
-            "stats": {
-                "total": total_leads,
-                "neu": new_leads,
-                "kontaktiert": kontaktiert,
-                "gewonnen": gewonnen
-            }
+            "stats": stats
         }
         
     except Exception as e:
@@ -487,41 +775,238 @@ async def get_admin_stats(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/admin/indexes")
+async def get_index_audit(
+    ensure: bool = Query(False),
+    authorization: str = Header(None)
+):
+    """
+    Run explain() on the hot queries and report which ones do not use an index.
+    ensure=true creates missing indexes first.
+    """
+    await verify_admin_token(authorization)
+    
+    try:
+        from server import db
+        
+        ensured = await ensure_indexes(db) if ensure else None
+        reports = await audit_query_plans(db)
+        
+        return {
+            "success": True,
+            "ensured": ensured,
+            "all_indexed": all(report["uses_index"] for report in reports),
+            "queries": reports
+        }
+        
+    except Exception as e:
+        logger.error(f"Error auditing indexes: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/admin/outbox")
+async def get_outbox_status(
+    authorization: str = Header(None)
+):
+    """Email outbox: message counts per status and dead-lettered messages"""
+    await verify_admin_token(authorization)
+    
+    try:
+        from server import db
+        outbox = get_outbox_collection(db)
+        
+        counts = {
+            row["_id"]: row["count"]
+            async for row in outbox.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}])
+        }
+        dead = await outbox.find(
+            {"status": "dead"},
+            {"_id": 0, "id": 1, "kind": 1, "attempts": 1, "last_error": 1, "created_at": 1, "payload.id": 1}
+        ).sort("created_at", -1).to_list(100)
+        
+        return {
+            "success": True,
+            "counts": counts,
+            "dead": dead
+        }
+        
+    except Exception as e:
+        logger.error(f"Error fetching outbox status: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/admin/outbox/{message_id}/retry")
+async def retry_outbox_message(
+    message_id: str,
+    authorization: str = Header(None)
+):
+    """Re-queue a dead-lettered email"""
+    await verify_admin_token(authorization)
+    
+    from server import db
+    if not await retry_dead_message(db, message_id):
+        raise HTTPException(status_code=404, detail="Message not found or not dead-lettered")
+    
+    return {
+        "success": True,
+        "message": "Message re-queued"
+    }
+
+
 # ============= PRICING ENDPOINTS =============
 
 @router.post("/calculate-price", response_model=PriceCalculationResponse)
-async def calculate_price(request: PriceCalculationRequest):
+async def calculate_price(
+    request: PriceCalculationRequest,
+    if_none_match: Optional[str] = Header(None)
+):
     """
     Berechnet Preisspanne basierend auf konfigurierbaren Regeln
+    Antwortet mit ETag; bei passendem If-None-Match mit 304.
+    Browsers never send If-None-Match on POST by themselves, so the 304 only
+    helps API clients that keep the ETag. The website calculator does not call
+    this endpoint: it evaluates the rules bundle locally (GET /api/pricing/rules,
+    revalidated by the browser); repeated requests here are served by the
+    quote and response caches.
     """
     try:
         from server import db
         
-        # Hole aktuelle Preiskonfiguration
-        config = await get_pricing_config(db)
+        # Rechner mit gecachter Preiskonfiguration (kein DB-Zugriff im Normalfall)
+        calculator = await pricing_config_cache.get_calculator(db)
         
-        # Berechne Preis
-        calculator = PricingCalculator(config)
-        result = calculator.calculate_price(request)
+        etag = price_request_etag(request, calculator.config.version)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
         
-        return PriceCalculationResponse(
-            success=True,
-            preis_min=result["preis_min"],
-            preis_max=result["preis_max"],
-            berechnungsdetails=result["berechnungsdetails"]
-        )
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        
+        body = pricing_response_cache.get(etag)
+        if body is None:
+            # Berechne Preis
+            result = calculator.calculate_price(request)
+            
+            body = PriceCalculationResponse(
+                success=True,
+                preis_min=result["preis_min"],
+                preis_max=result["preis_max"],
+                berechnungsdetails=result["berechnungsdetails"]
+            ).model_dump_json().encode("utf-8")
+            pricing_response_cache.put(etag, body)
+        
+        return Response(content=body, media_type="application/json", headers=headers)
         
     except Exception as e:
         logger.error(f"Price calculation error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/calculate-price/batch")
+async def calculate_price_batch(
+    request: BatchPriceCalculationRequest,
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Berechnet Preisspannen für viele Anfragen in einem Durchlauf (Admin only).
+    Ergebnisse sind identisch mit /calculate-price.
+    """
+    await verify_admin_token(authorization)
+
+    if len(request.requests) > MAX_PRICE_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximal {MAX_PRICE_BATCH_SIZE} Anfragen pro Batch"
+        )
+
+    try:
+        from server import db
+
+        config = await pricing_config_cache.get(db)
+        calculator = BatchPricingCalculator(config)
+
+        # Vectorized pricing is CPU-bound, keep it off the event loop
+        results = await asyncio.to_thread(calculator.calculate_prices, request.requests)
+
+        return {
+            "success": True,
+            "count": len(results),
+            "config_version": config.version,
+            "results": [
+                {"success": True, **result} if result is not None
+                else {"success": False, "error": "Fläche fehlt (anzahl_raeume bzw. wandflaeche_qm)"}
+                for result in results
+            ]
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch price calculation error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/pricing/rules")
+async def get_pricing_rules(if_none_match: Optional[str] = Header(None)):
+    """
+    Aktuelles Preisregel-Bundle für die Berechnung im Browser.
+    Revalidierung über ETag; die unveränderliche Kopie liegt unter
+    /pricing/rules/{hash}.
+    """
+    try:
+        from server import db
+        
+        config = await pricing_config_cache.get(db)
+        rules_hash, body = rules_bundle_cache.get(config)
+        headers = {
+            "ETag": f'"{rules_hash}"',
+            "Cache-Control": "public, no-cache",
+            "Content-Location": f"/api/pricing/rules/{rules_hash}"
+        }
+        
+        if etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+        
+    except Exception as e:
+        logger.error(f"Error fetching pricing rules: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/pricing/rules/{rules_hash}")
+async def get_pricing_rules_by_hash(rules_hash: str):
+    """Preisregel-Bundle nach Content-Hash (immutable, lange cachebar), auch ältere Versionen"""
+    try:
+        from server import db
+        
+        config = await pricing_config_cache.get(db)
+        current_hash, body = rules_bundle_cache.get(config)
+        if rules_hash != current_hash:
+            body = await find_rules_bundle(db, rules_hash)
+            if body is None:
+                raise HTTPException(status_code=404, detail="Pricing rules version not found")
+        
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={
+                "ETag": f'"{rules_hash}"',
+                "Cache-Control": "public, max-age=31536000, immutable"
+            }
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching pricing rules: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/admin/pricing")
 async def get_pricing_config_endpoint(
     authorization: str = Header(None)
 ):
     """Get current pricing configuration"""
-    verify_admin_token(authorization)
+    await verify_admin_token(authorization)
     
     try:
         from server import db
@@ -543,7 +1028,7 @@ async def update_pricing_config_endpoint(
     authorization: str = Header(None)
 ):
     """Update pricing configuration"""
-    verify_admin_token(authorization)
+    await verify_admin_token(authorization)
     
     try:
         from server import db
@@ -554,18 +1039,111 @@ async def update_pricing_config_endpoint(
         if not update_dict:
             raise HTTPException(status_code=400, detail="No updates provided")
         
-        success = await update_pricing_config(db, update_dict)
+        config = await update_pricing_config(db, update_dict)
         
-        if success:
-            return {
-                "success": True,
-                "message": "Preiskonfiguration aktualisiert"
-            }
-        else:
-            raise HTTPException(status_code=500, detail="Update failed")
+        return {
+            "success": True,
+            "message": "Preiskonfiguration aktualisiert",
+            "version": config.version
+        }
         
+    except PricingConfigConflict:
+        raise HTTPException(status_code=409, detail="Pricing config was changed concurrently, please retry")
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error updating pricing config: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/admin/pricing/versions")
+async def get_pricing_config_versions(
+    limit: int = Query(50, ge=1, le=500),
+    authorization: str = Header(None)
+):
+    """Versionshistorie der Preiskonfiguration (neueste zuerst)"""
+    await verify_admin_token(authorization)
+    
+    try:
+        from server import db
+        
+        return {
+            "success": True,
+            **await list_pricing_config_versions(db, limit)
+        }
+        
+    except Exception as e:
+        logger.error(f"Error fetching pricing config versions: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/admin/pricing/versions/{version}/activate")
+async def activate_pricing_config_version(
+    version: int,
+    authorization: str = Header(None)
+):
+    """Rollback: aktiviert eine bestehende Version wieder"""
+    await verify_admin_token(authorization)
+    
+    try:
+        from server import db
+        
+        config = await rollback_pricing_config(db, version)
+        if not config:
+            raise HTTPException(status_code=404, detail="Pricing config version not found")
+        
+        return {
+            "success": True,
+            "message": f"Preiskonfiguration Version {version} aktiviert",
+            "version": config.version
+        }
+        
+    except PricingConfigConflict:
+        raise HTTPException(status_code=409, detail="Pricing config was changed concurrently, please retry")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error activating pricing config version: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/admin/pricing/simulate")
+async def simulate_pricing_config_endpoint(
+    updates: PricingConfigUpdate,
+    status: Optional[str] = Query(None),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    authorization: str = Header(None)
+):
+    """
+    What-if: re-price stored leads with the proposed config (nothing is saved).
+    Optional filters as for the export: status, date_from/date_to.
+    """
+    await verify_admin_token(authorization)
+    
+    try:
+        from server import db
+        
+        update_dict = {k: v for k, v in updates.dict().items() if v is not None}
+        current = await get_pricing_config(db)
+        proposed = apply_config_update(current, update_dict)
+        
+        result = await simulate_repricing(
+            get_leads_collection(db),
+            current,
+            proposed,
+            _lead_filter_query(status, date_from, date_to)
+        )
+        
+        return {
+            "success": True,
+            "config_version": current.version,
+            "changes": update_dict,
+            **result
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error simulating pricing config: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
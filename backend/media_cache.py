@@ -0,0 +1,179 @@
+"""
+Media Cache - On-demand Resizing für Bilder ohne vorgenerierte Varianten
+(Legacy /uploads/, Lead-Fotos, ältere Referenzen).
+Jede Variante wird einmal gerendert und liegt danach in einem Disk-Cache
+mit LRU-Eviction nach Gesamtgröße.
+"""
+
+import os
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from media_service import media_service, MEDIA_ROOT, MEDIA_VARIANT_WIDTHS
+
+logger = logging.getLogger(__name__)
+
+# Whitelist: only these widths are rendered (bounds the work per source image)
+MEDIA_RESIZE_WIDTHS = sorted(
+    int(w) for w in os.environ.get('MEDIA_RESIZE_WIDTHS', ','.join(map(str, MEDIA_VARIANT_WIDTHS))).split(',') if w.strip()
+)
+MEDIA_RESIZE_CACHE_DIR = Path(os.environ.get('MEDIA_RESIZE_CACHE_DIR', '/app/backend/media_cache'))
+MEDIA_RESIZE_CACHE_MB = int(os.environ.get('MEDIA_RESIZE_CACHE_MB', '512'))
+# Files handed to a response are not evicted for this long (FileResponse opens them later)
+MEDIA_RESIZE_PIN_SECONDS = 60
+
+# First path segment -> directory with the originals (same as the static mounts)
+SOURCE_ROOTS = {
+    'uploads': Path('/app/backend/uploads'),
+    'media': MEDIA_ROOT,
+}
+# Output format follows the source extension
+RESIZE_FORMATS = {'jpg': 'JPEG', 'jpeg': 'JPEG', 'png': 'PNG', 'webp': 'WEBP', 'gif': 'GIF'}
+
+
+class ResizeCache:
+    """
+    Disk cache for resized images.
+    - Key: source path + mtime + size + width (a replaced source gets a new entry,
+      the old one ages out)
+    - LRU by total bytes; recency kept in memory and in the file mtime (restarts)
+    - Concurrent requests for the same variant share one render
+    - Recently served files are pinned, so a response never points to an
+      evicted file (the budget may be exceeded briefly)
+    """
+
+    def __init__(self, cache_dir: Path = MEDIA_RESIZE_CACHE_DIR, max_bytes: int = MEDIA_RESIZE_CACHE_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        # filename -> size, oldest first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._loaded = False
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # filename -> pinned until (monotonic)
+        self._pinned: Dict[str, float] = {}
+
+    def _load(self) -> None:
+        """Index existing cache files once, least recently used first"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        files = []
+        for path in self.cache_dir.iterdir():
+            if path.is_file() and not path.name.endswith('.tmp'):
+                stat = path.stat()
+                files.append((stat.st_mtime, path.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._total_bytes += size
+        self._loaded = True
+        self._evict()
+
+    def _pin(self, name: str) -> None:
+        now = time.monotonic()
+        if len(self._pinned) > len(self._entries) + 100:
+            self._pinned = {pinned: until for pinned, until in self._pinned.items() if until > now}
+        self._pinned[name] = now + MEDIA_RESIZE_PIN_SECONDS
+
+    def _evict(self) -> None:
+        if self._total_bytes <= self.max_bytes:
+            return
+        now = time.monotonic()
+        self._pinned = {name: until for name, until in self._pinned.items() if until > now}
+        # Oldest first, skipping files that may still be streaming
+        for name in list(self._entries):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if name in self._pinned:
+                continue
+            size = self._entries.pop(name)
+            self._total_bytes -= size
+            try:
+                (self.cache_dir / name).unlink()
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Failed to evict {name}: {e}")
+
+    def _add(self, name: str, size: int) -> None:
+        self._entries[name] = size
+        self._total_bytes += size
+        self._evict()
+
+    def stats(self) -> dict:
+        if not self._loaded:
+            self._load()
+        return {
+            'count': len(self._entries),
+            'total_size_bytes': self._total_bytes,
+            'max_size_bytes': self.max_bytes
+        }
+
+    def resolve_source(self, path: str) -> Optional[Path]:
+        """Maps 'uploads/x.jpg' / 'media/references/x.jpg' to the file, None if not allowed"""
+        prefix, _, rest = path.partition('/')
+        root = SOURCE_ROOTS.get(prefix)
+        if root is None or not rest:
+            return None
+        root = root.resolve()
+        source = (root / rest).resolve()
+        # No path traversal out of the media directories
+        if not source.is_relative_to(root) or not source.is_file():
+            return None
+        if source.suffix.lstrip('.').lower() not in RESIZE_FORMATS:
+            return None
+        return source
+
+    async def get(self, path: str, width: int) -> Optional[Path]:
+        """Cached variant of `path` at `width` (rendered on first request), None if the source is unknown"""
+        if not self._loaded:
+            self._load()
+
+        source = self.resolve_source(path)
+        if source is None:
+            return None
+
+        stat = source.stat()
+        extension = source.suffix.lstrip('.').lower()
+        key = hashlib.sha1(f"{source}:{stat.st_mtime_ns}:{stat.st_size}:{width}".encode()).hexdigest()
+        name = f"{key}.{extension}"
+        target = self.cache_dir / name
+
+        if name in self._entries:
+            if target.exists():
+                self._entries.move_to_end(name)
+                self._pin(name)
+                try:
+                    os.utime(target)
+                except OSError:
+                    pass
+                return target
+            # Removed from disk behind our back
+            self._total_bytes -= self._entries.pop(name)
+
+        task = self._inflight.get(name)
+        if task is None:
+            task = asyncio.ensure_future(self._render(source, width, RESIZE_FORMATS[extension], name))
+            self._inflight[name] = task
+            task.add_done_callback(lambda _: self._inflight.pop(name, None))
+        # shield: a disconnecting client does not cancel the render for the others
+        return await asyncio.shield(task)
+
+    async def _render(self, source: Path, width: int, output_format: str, name: str) -> Path:
+        data = await media_service.render_resized(str(source), width, output_format)
+        target = self.cache_dir / name
+        tmp_path = self.cache_dir / f"{name}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, target)
+        self._pin(name)
+        self._add(name, len(data))
+        logger.info(f"Resized variant cached: {source.name} @ {width}px ({len(data)} bytes)")
+        return target
+
+
+# Singleton instance
+resize_cache = ResizeCache()
@@ -0,0 +1,38 @@
+"""
+Media Routes - verkleinerte Bilder on demand: /media/r/{width}/{path}
+z.B. /media/r/800/uploads/foto.jpg oder /media/r/400/media/references/bild.webp
+"""
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+import logging
+
+from media_cache import resize_cache, MEDIA_RESIZE_WIDTHS
+
+logger = logging.getLogger(__name__)
+
+# Registered before the /media static mount, so /media/r/... is matched here
+router = APIRouter(prefix="/media/r", tags=["media"])
+
+# Variants change only with the source (new cache key), browsers may keep them a day
+CACHE_CONTROL = "public, max-age=86400"
+
+
+@router.get("/{width}/{path:path}")
+async def get_resized_image(width: int, path: str):
+    """Resized image (rendered once, then served from the disk cache)"""
+    if width not in MEDIA_RESIZE_WIDTHS:
+        raise HTTPException(status_code=404, detail=f"Bildbreite nicht verfügbar (erlaubt: {', '.join(map(str, MEDIA_RESIZE_WIDTHS))})")
+
+    try:
+        cached = await resize_cache.get(path, width)
+    except ValueError as e:
+        logger.warning(f"Resize failed for {path}: {e}")
+        raise HTTPException(status_code=422, detail="Bild konnte nicht verarbeitet werden")
+    except Exception as e:
+        logger.error(f"Resize error for {path}: {e}")
+        raise HTTPException(status_code=500, detail="Fehler beim Verkleinern des Bildes")
+
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Bild nicht gefunden")
+    return FileResponse(cached, headers={"Cache-Control": CACHE_CONTROL})
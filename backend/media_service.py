@@ -4,12 +4,17 @@ Unterstützt Komprimierung, Resizing und WebP-Konvertierung
 """
 
 import os
+import math
 import uuid
 import re
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from PIL import Image
+from PIL.JpegImagePlugin import JpegImageFile
 from io import BytesIO
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,6 +24,15 @@ MAX_WIDTH = 1600
 MAX_HEIGHT = 1200
 JPEG_QUALITY = 85
 WEBP_QUALITY = 80
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+# Decompression bomb guard: checked from the header, before any pixel is decoded.
+# 50 MP admits 48 MP phone photos (JPEGs decode reduced, see decode_image);
+# PNG/WebP/GIF decode in full, i.e. at most ~200 MB as RGBA.
+MEDIA_MAX_IMAGE_PIXELS = int(os.environ.get('MEDIA_MAX_IMAGE_PIXELS', '50000000'))
+# Responsive width ladder (srcset); widths above the stored image are skipped
+MEDIA_VARIANT_WIDTHS = sorted(int(w) for w in os.environ.get('MEDIA_VARIANT_WIDTHS', '400,800,1200,1600').split(',') if w.strip())
+# Worker processes for decoding/resizing/encoding (CPU-bound, off the event loop)
+MEDIA_PROCESS_WORKERS = int(os.environ.get('MEDIA_PROCESS_WORKERS', str(min(2, os.cpu_count() or 1))))
 
 # Media directory structure
 MEDIA_ROOT = Path("/app/backend/media")
@@ -29,15 +43,225 @@ MEDIA_ROOT.mkdir(parents=True, exist_ok=True)
 REFERENCES_DIR.mkdir(parents=True, exist_ok=True)
 
 
+FORMAT_MAP = {
+    'image/jpeg': ('JPEG', 'jpg'),
+    'image/png': ('PNG', 'png'),
+    'image/gif': ('GIF', 'gif'),
+    'image/webp': ('WEBP', 'webp'),
+}
+
+
+# Magic bytes -> MIME type (the client's content type is not trusted)
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+# Pillow formats per MIME type; multi-picture JPEGs (many phone cameras) open as MPO
+PIL_FORMATS = {'image/jpeg': {'JPEG', 'MPO'}, 'image/png': {'PNG'}, 'image/gif': {'GIF'}, 'image/webp': {'WEBP'}}
+
+
+def sniff_image(image_data: bytes) -> Tuple[str, int, int]:
+    """
+    Identify an image from its header only (magic bytes + lazy Image.open,
+    no pixel data decoded) and enforce the pixel cap.
+    Returns: (mime_type, width, height); raises ValueError otherwise.
+    """
+    header = bytes(image_data[:12])
+    mime_type = next((mime for signature, mime in IMAGE_SIGNATURES if header.startswith(signature)), None)
+    if mime_type is None and header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        mime_type = 'image/webp'
+    if mime_type is None:
+        raise ValueError("Ungültiges Bildformat (erlaubt: JPG, PNG, GIF, WebP)")
+
+    image = _open_image(image_data)
+    if image.format not in PIL_FORMATS[mime_type]:
+        raise ValueError("Ungültiges Bildformat (erlaubt: JPG, PNG, GIF, WebP)")
+    return mime_type, image.width, image.height
+
+
+def _open_image(image_data: bytes) -> Image.Image:
+    """Lazy Image.open (header only) with the pixel cap applied"""
+    try:
+        image = Image.open(BytesIO(image_data))
+    except Image.DecompressionBombError:
+        # Pillow's own limit (far above ours) already triggers in the header
+        raise ValueError(f"Bild zu groß (max. {MEDIA_MAX_IMAGE_PIXELS // 1_000_000} Megapixel)")
+    except Exception:
+        raise ValueError("Bilddatei ist beschädigt oder unvollständig")
+    width, height = image.size
+    if width * height > MEDIA_MAX_IMAGE_PIXELS:
+        raise ValueError(f"Bild zu groß ({width}×{height} Pixel, max. {MEDIA_MAX_IMAGE_PIXELS // 1_000_000} Megapixel)")
+    return image
+
+
+def resize_image(image: Image.Image, max_width: int = MAX_WIDTH, max_height: int = MAX_HEIGHT) -> Image.Image:
+    """
+    Resize image while maintaining aspect ratio
+    Only downscales, never upscales
+    """
+    original_width, original_height = image.size
+    
+    # Don't upscale
+    if original_width <= max_width and original_height <= max_height:
+        return image
+    
+    # Calculate new dimensions
+    ratio = min(max_width / original_width, max_height / original_height)
+    new_width = int(original_width * ratio)
+    new_height = int(original_height * ratio)
+    
+    # Use high-quality resampling
+    return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+
+
+def decode_image(image_data: bytes, max_width: int = MAX_WIDTH, max_height: int = MAX_HEIGHT) -> Image.Image:
+    """
+    Decode once into RGB/RGBA, so one LANCZOS resize serves all formats
+    (palette images would otherwise be resized with NEAREST).
+    The pixel cap is checked before decoding; JPEGs that are much larger than
+    the target box are decoded at a reduced DCT scale (1/2 .. 1/8, never below the target).
+    """
+    image = _open_image(image_data)
+    # MpoImageFile is a JpegImageFile as well
+    if isinstance(image, JpegImageFile):
+        ratio = min(max_width / image.width, max_height / image.height)
+        if ratio < 0.5:
+            image.draft(image.mode, (math.ceil(image.width * ratio), math.ceil(image.height * ratio)))
+    if image.mode == 'P':
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        # PNG output is quantized back to a palette after resizing (small files)
+        image.info['palette_source'] = True
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.mode else 'RGB')
+    return image
+
+
+def encode_image(image: Image.Image, output_format: str) -> bytes:
+    """Encode the (resized) image in one output format"""
+    if output_format == 'JPEG' and image.mode == 'RGBA':
+        # Create white background for transparency (no alpha channel support)
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[3])
+        image = background
+    elif output_format != 'PNG' and image.mode == 'RGBA':
+        image = image.convert('RGB')
+    elif output_format == 'PNG' and image.info.get('palette_source'):
+        method = Image.Quantize.FASTOCTREE if image.mode == 'RGBA' else Image.Quantize.MEDIANCUT
+        image = image.quantize(colors=256, method=method)
+    
+    output = BytesIO()
+    if output_format == 'JPEG':
+        image.save(output, format='JPEG', quality=JPEG_QUALITY, optimize=True)
+    elif output_format == 'WEBP':
+        image.save(output, format='WEBP', quality=WEBP_QUALITY, optimize=True)
+    elif output_format == 'PNG':
+        image.save(output, format='PNG', optimize=True)
+    else:
+        image.save(output, format=output_format)
+    return output.getvalue()
+
+
+def _encode_formats(image: Image.Image, output_formats: List[str]) -> dict:
+    outputs = {}
+    for index, output_format in enumerate(output_formats):
+        try:
+            outputs[output_format] = encode_image(image, output_format)
+        except Exception as e:
+            # Only the first format is required (e.g. WebP is an extra)
+            if index == 0:
+                raise
+            logger.warning(f"{output_format} generation failed, skipping: {e}")
+    return outputs
+
+
+def process_image(image_data: bytes, output_formats: List[str], widths: Optional[List[int]] = None) -> dict:
+    """
+    Decode, resize and encode all requested formats from one image.
+    The first format is required, further ones are optional.
+    `widths`: additional smaller variants (srcset), resized from the same image.
+    Module-level so it can run in the process pool.
+    Returns: {'width': int, 'height': int, 'outputs': {format: bytes},
+              'variants': [{'width': int, 'height': int, 'outputs': {format: bytes}}]}
+    """
+    try:
+        image = resize_image(decode_image(image_data))
+        width, height = image.size
+        variants = []
+        for variant_width in sorted(set(widths or [])):
+            if variant_width >= width:
+                continue
+            variant_height = max(round(height * variant_width / width), 1)
+            variant = image.resize((variant_width, variant_height), Image.Resampling.LANCZOS)
+            variants.append({
+                'width': variant_width,
+                'height': variant_height,
+                'outputs': _encode_formats(variant, output_formats)
+            })
+        return {
+            'width': width,
+            'height': height,
+            'outputs': _encode_formats(image, output_formats),
+            'variants': variants
+        }
+    except Exception as e:
+        logger.error(f"Image processing error: {e}")
+        raise ValueError(f"Bildverarbeitung fehlgeschlagen: {str(e)}")
+
+
+def render_resized(source_path: str, width: int, output_format: str) -> bytes:
+    """
+    Read one stored image, downscale it to `width` (never upscale) and encode it.
+    On-demand variants for images without pre-generated sizes (see media_cache.py).
+    """
+    try:
+        with open(source_path, 'rb') as f:
+            image = decode_image(f.read(), max_width=width, max_height=math.inf)
+        image = resize_image(image, max_width=width, max_height=image.height)
+        return encode_image(image, output_format)
+    except Exception as e:
+        logger.error(f"Image resize error: {e}")
+        raise ValueError(f"Bildverarbeitung fehlgeschlagen: {str(e)}")
+
+
 class MediaService:
     """Handles image upload, processing, and storage"""
     
     ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'webp'}
     ALLOWED_MIME_TYPES = {'image/jpeg', 'image/png', 'image/gif', 'image/webp'}
     
-    def __init__(self):
+    def __init__(self, max_workers: int = MEDIA_PROCESS_WORKERS):
         self.media_root = MEDIA_ROOT
         self.references_dir = REFERENCES_DIR
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Bounds queued uploads (each holds its file in memory)
+        self._slots = asyncio.Semaphore(max_workers * 2)
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: no fork of a process with running event loop/driver threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._pool
+    
+    def shutdown(self) -> None:
+        """Stop the worker processes (called from the app lifespan)"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+    
+    async def _run_in_pool(self, fn, *args):
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_pool(), fn, *args)
+    
+    async def render_resized(self, source_path: str, width: int, output_format: str) -> bytes:
+        """Resize a stored image in a worker process"""
+        return await self._run_in_pool(render_resized, source_path, width, output_format)
     
     def _sanitize_filename(self, filename: str) -> str:
         """Create a clean, SEO-friendly filename"""
@@ -61,33 +285,7 @@ class MediaService:
         if convert_to_webp:
             return ('WEBP', 'webp')
         
-        format_map = {
-            'image/jpeg': ('JPEG', 'jpg'),
-            'image/png': ('PNG', 'png'),
-            'image/gif': ('GIF', 'gif'),
-            'image/webp': ('WEBP', 'webp'),
-        }
-        
-        return format_map.get(content_type, ('JPEG', 'jpg'))
-    
-    def _resize_image(self, image: Image.Image, max_width: int = MAX_WIDTH, max_height: int = MAX_HEIGHT) -> Image.Image:
-        """
-        Resize image while maintaining aspect ratio
-        Only downscales, never upscales
-        """
-        original_width, original_height = image.size
-        
-        # Don't upscale
-        if original_width <= max_width and original_height <= max_height:
-            return image
-        
-        # Calculate new dimensions
-        ratio = min(max_width / original_width, max_height / original_height)
-        new_width = int(original_width * ratio)
-        new_height = int(original_height * ratio)
-        
-        # Use high-quality resampling
-        return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        return FORMAT_MAP.get(content_type, ('JPEG', 'jpg'))
     
     def _process_image(
         self, 
@@ -96,46 +294,12 @@ class MediaService:
         convert_to_webp: bool = False
     ) -> Tuple[bytes, str, str]:
         """
-        Process image: resize and optionally convert
+        Process image synchronously: resize and optionally convert
         Returns: (processed_bytes, format, extension)
         """
-        try:
-            # Open image
-            image = Image.open(BytesIO(image_data))
-            
-            # Convert RGBA to RGB for JPEG (no alpha channel support)
-            output_format, extension = self._get_image_format(content_type, convert_to_webp)
-            
-            if output_format == 'JPEG' and image.mode in ('RGBA', 'P'):
-                # Create white background for transparency
-                background = Image.new('RGB', image.size, (255, 255, 255))
-                if image.mode == 'P':
-                    image = image.convert('RGBA')
-                background.paste(image, mask=image.split()[3] if len(image.split()) == 4 else None)
-                image = background
-            elif output_format != 'PNG' and image.mode == 'RGBA':
-                image = image.convert('RGB')
-            
-            # Resize
-            image = self._resize_image(image)
-            
-            # Save to bytes
-            output = BytesIO()
-            
-            if output_format == 'JPEG':
-                image.save(output, format='JPEG', quality=JPEG_QUALITY, optimize=True)
-            elif output_format == 'WEBP':
-                image.save(output, format='WEBP', quality=WEBP_QUALITY, optimize=True)
-            elif output_format == 'PNG':
-                image.save(output, format='PNG', optimize=True)
-            else:
-                image.save(output, format=output_format)
-            
-            return output.getvalue(), output_format, extension
-            
-        except Exception as e:
-            logger.error(f"Image processing error: {e}")
-            raise ValueError(f"Bildverarbeitung fehlgeschlagen: {str(e)}")
+        output_format, extension = self._get_image_format(content_type, convert_to_webp)
+        processed = process_image(image_data, [output_format])
+        return processed['outputs'][output_format], output_format, extension
     
     async def upload_reference_image(
         self,
@@ -161,6 +325,14 @@ class MediaService:
         # Validate content type
         if content_type not in self.ALLOWED_MIME_TYPES:
             raise ValueError(f"Ungültiger Dateityp: {content_type}")
+        if len(file_data) > MAX_UPLOAD_BYTES:
+            raise ValueError(f"Datei zu groß (max. {MAX_UPLOAD_BYTES // (1024 * 1024)}MB)")
+        
+        # Header check before a worker decodes anything; the bytes decide the format
+        sniffed_type, _, _ = sniff_image(file_data)
+        if sniffed_type != content_type:
+            logger.info(f"Content type {content_type} does not match file content, using {sniffed_type}")
+            content_type = sniffed_type
         
         # Generate clean base filename
         base_name = self._sanitize_filename(original_filename)
@@ -183,16 +355,19 @@ class MediaService:
             'size': 0,
             'format': None,
             'width': 0,
-            'height': 0
+            'height': 0,
+            'variants': []
         }
         
-        # 1. Process and save original format (optimized)
-        original_data, original_format, original_ext = self._process_image(
-            file_data, 
-            content_type, 
-            convert_to_webp=False
-        )
+        # Decode, resize and encode all formats and widths once, in a worker process
+        original_format, original_ext = self._get_image_format(content_type)
+        output_formats = [original_format]
+        if generate_webp and original_format != 'WEBP':
+            output_formats.append('WEBP')
+        processed = await self._run_in_pool(process_image, file_data, output_formats, MEDIA_VARIANT_WIDTHS)
         
+        # 1. Save original format (optimized)
+        original_data = processed['outputs'][original_format]
         original_filename = f"{base_name}.{original_ext}"
         original_filepath = self.references_dir / original_filename
         
@@ -202,34 +377,49 @@ class MediaService:
         result['url_fallback'] = f"/media/references/{original_filename}"
         result['format'] = original_format.lower()
         result['size'] = len(original_data)
-        
-        # Get dimensions
-        img = Image.open(BytesIO(original_data))
-        result['width'] = img.size[0]
-        result['height'] = img.size[1]
+        result['width'] = processed['width']
+        result['height'] = processed['height']
         
         logger.info(f"Original saved: {original_filename} ({len(original_data)} bytes)")
         
-        # 2. Generate WebP version (if not already WebP)
-        if generate_webp and original_format.upper() != 'WEBP':
-            try:
-                webp_data, _, _ = self._process_image(
-                    file_data,
-                    content_type,
-                    convert_to_webp=True
-                )
-                
-                webp_filename = f"{base_name}.webp"
-                webp_filepath = self.references_dir / webp_filename
-                
-                with open(webp_filepath, 'wb') as f:
-                    f.write(webp_data)
-                
-                result['url_webp'] = f"/media/references/{webp_filename}"
-                logger.info(f"WebP saved: {webp_filename} ({len(webp_data)} bytes, {round((1 - len(webp_data)/len(original_data))*100)}% smaller)")
-                
-            except Exception as e:
-                logger.warning(f"WebP generation failed, using original only: {e}")
+        # 2. Save WebP version (if not already WebP)
+        webp_data = processed['outputs'].get('WEBP')
+        if webp_data and original_format != 'WEBP':
+            webp_filename = f"{base_name}.webp"
+            webp_filepath = self.references_dir / webp_filename
+            
+            with open(webp_filepath, 'wb') as f:
+                f.write(webp_data)
+            
+            result['url_webp'] = f"/media/references/{webp_filename}"
+            logger.info(f"WebP saved: {webp_filename} ({len(webp_data)} bytes, {round((1 - len(webp_data)/len(original_data))*100)}% smaller)")
+        
+        # 3. Smaller srcset variants: {base}-{width}w.{ext}
+        extensions = {original_format: original_ext, 'WEBP': 'webp'}
+        for variant in processed['variants']:
+            for output_format, data in variant['outputs'].items():
+                variant_filename = f"{base_name}-{variant['width']}w.{extensions[output_format]}"
+                with open(self.references_dir / variant_filename, 'wb') as f:
+                    f.write(data)
+                result['variants'].append({
+                    'url': f"/media/references/{variant_filename}",
+                    'format': output_format.lower(),
+                    'width': variant['width'],
+                    'height': variant['height']
+                })
+        
+        # Manifest also lists the full-size files, smallest first per format
+        for url, output_format in ((result['url_fallback'], original_format), (result['url_webp'], 'WEBP')):
+            if url and output_format in processed['outputs']:
+                result['variants'].append({
+                    'url': url,
+                    'format': output_format.lower(),
+                    'width': result['width'],
+                    'height': result['height']
+                })
+        result['variants'].sort(key=lambda v: (v['format'], v['width']))
+        if processed['variants']:
+            logger.info(f"Variants saved: {len(result['variants'])} files for widths {[v['width'] for v in processed['variants']]}")
         
         # Set primary URL (prefer WebP)
         result['url'] = result['url_webp'] if result['url_webp'] else result['url_fallback']
@@ -239,7 +429,7 @@ class MediaService:
     def delete_reference_image(self, url: str) -> bool:
         """
         Delete a reference image by its URL.
-        Also deletes associated WebP/fallback version if exists.
+        Also deletes associated WebP/fallback version and srcset variants if exist.
         """
         if not url or not url.startswith('/media/references/'):
             return False
@@ -281,6 +471,15 @@ class MediaService:
                 except Exception as e:
                     logger.warning(f"Failed to delete WebP: {e}")
         
+        # srcset variants of either format
+        variant_pattern = re.compile(rf"{re.escape(base_name)}-\d+w\.[a-z]+")
+        for variant_path in self.references_dir.glob(f"{base_name}-*w.*"):
+            if variant_pattern.fullmatch(variant_path.name):
+                try:
+                    variant_path.unlink()
+                except Exception as e:
+                    logger.warning(f"Failed to delete variant: {e}")
+        
         return deleted
     
     def get_media_stats(self) -> dict:
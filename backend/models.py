@@ -2,6 +2,10 @@ from pydantic import BaseModel, EmailStr, Field
 from typing import List, Optional, Literal
 from datetime import datetime
 
+from lead_ids import generate_lead_id
+
+LeadStatus = Literal["neu", "kontaktiert", "angebot", "gewonnen", "verloren"]
+
 
 class LeadCalculatorData(BaseModel):
     """Calculator-spezifische Daten"""
@@ -11,6 +15,8 @@ class LeadCalculatorData(BaseModel):
     groesse_typ: Literal["raeume", "flaeche"]
     anzahl_raeume: Optional[int] = None
     wandflaeche_qm: Optional[float] = None
+    boden_flaeche_qm: Optional[float] = None
+    epoxid_flaeche_qm: Optional[float] = None
     raumhoehe: Literal["niedrig", "normal", "hoch"]
     zustand: Literal["normal", "altbau", "renovierung"]
     farbe: Literal["weiss", "bunt"]
@@ -43,9 +49,9 @@ class LeadCreate(BaseModel):
 
 class Lead(BaseModel):
     """Vollständiges Lead Model für DB"""
-    id: str = Field(default_factory=lambda: str(datetime.now().timestamp()))
+    id: str = Field(default_factory=generate_lead_id)
     lead_type: str = "calculator"
-    status: Literal["neu", "kontaktiert", "angebot", "gewonnen", "verloren"] = "neu"
+    status: LeadStatus = "neu"
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     # Calculator Data
@@ -55,6 +61,9 @@ class Lead(BaseModel):
     groesse_typ: str
     anzahl_raeume: Optional[int] = None
     wandflaeche_qm: Optional[float] = None
+    # Floor areas for "boden"/"epoxid" (missing on leads stored before they were persisted)
+    boden_flaeche_qm: Optional[float] = None
+    epoxid_flaeche_qm: Optional[float] = None
     raumhoehe: str
     zustand: str
     farbe: str
@@ -104,7 +113,7 @@ class Lead(BaseModel):
 
 class LeadUpdate(BaseModel):
     """Update Model für Leads"""
-    status: Optional[Literal["neu", "kontaktiert", "angebot", "gewonnen", "verloren"]] = None
+    status: Optional[LeadStatus] = None
     admin_notizen: Optional[str] = None
 
 
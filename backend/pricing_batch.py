@@ -0,0 +1,197 @@
+"""
+Batch-Preisberechnung - vektorisiert mit NumPy
+Gleiche Formeln (und gleiche Rechenreihenfolge) wie PricingCalculator,
+damit die Ergebnisse bitgenau mit dem Einzelpfad übereinstimmen.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from pricing_models import PricingConfig, PriceCalculationRequest
+from pricing_calculator import (
+    QM_PRO_RAUM,
+    WAND_ANTEIL,
+    DECKE_ANTEIL,
+    FLAECHEN_PAUSCHALEN,
+    SCHIMMEL_PAUSCHALE,
+    BODEN_PREIS_QM,
+    BODEN_AUFSCHLAG_FARBIG,
+    EPOXID_PREIS_QM,
+    EPOXID_AUFSCHLAG_FARBIG,
+    ZUSCHLAG_RENOVIERUNG,
+    ZUSCHLAG_RAUMHOEHE_SEHR_HOCH
+)
+
+# Leistungen, die in die Berechnung eingehen
+PRICED_SERVICES = ("waende-decken", "lackierung", "tapezieren", "schimmel", "boden", "epoxid")
+
+
+def _as_float_array(values: Sequence[Optional[float]]) -> np.ndarray:
+    """None -> NaN"""
+    return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+
+def _equals(values: Sequence[Optional[str]], target: str) -> np.ndarray:
+    return np.array([value == target for value in values], dtype=bool)
+
+
+def round2(values: np.ndarray) -> List[float]:
+    """
+    Same as [round(v, 2) for v in values], without the per-element cost.
+    rint(v * 100) / 100 only differs from Python's correctly rounded
+    round() when v * 100 lies (almost) on a .5 boundary; those few
+    elements are rounded with round() instead.
+    """
+    scaled = values * 100.0
+    result = np.rint(scaled) / 100.0
+    near_half = np.abs(np.abs(scaled - np.floor(scaled)) - 0.5) <= 1e-9 * np.maximum(1.0, np.abs(scaled))
+    for i in np.flatnonzero(near_half).tolist():
+        result[i] = round(float(values[i]), 2)
+    return result.tolist()
+
+
+def requests_to_columns(requests: Sequence[PriceCalculationRequest]) -> Dict[str, object]:
+    """Turns a list of requests into the column layout used by calculate_columns"""
+    return {
+        "groesse_typ": [r.groesse_typ for r in requests],
+        "anzahl_raeume": [r.anzahl_raeume for r in requests],
+        "wandflaeche_qm": [r.wandflaeche_qm for r in requests],
+        "boden_flaeche_qm": [r.boden_flaeche_qm for r in requests],
+        "epoxid_flaeche_qm": [r.epoxid_flaeche_qm for r in requests],
+        "leistungen": [r.leistungen for r in requests],
+        "farbe": [r.farbe for r in requests],
+        "spachtelstufe": [r.spachtelstufe for r in requests],
+        "zustand": [r.zustand for r in requests],
+        "raumhoehe": [r.raumhoehe for r in requests],
+    }
+
+
+class BatchPricingCalculator:
+    """
+    Prices many requests in one pass over NumPy arrays.
+    Every step adds either the scalar term or 0.0 in the same order as
+    PricingCalculator, so the float results are identical.
+    """
+
+    def __init__(self, config: PricingConfig):
+        self.config = config
+
+    def calculate_columns(self, columns: Dict[str, object]) -> Dict[str, np.ndarray]:
+        """
+        columns: groesse_typ, anzahl_raeume, wandflaeche_qm, boden_flaeche_qm,
+        epoxid_flaeche_qm, leistungen (list per row), farbe, spachtelstufe,
+        zustand, raumhoehe.
+        Returns unrounded arrays plus a `valid` mask (rows the scalar
+        calculator would reject because the area is missing).
+        """
+        c = self.config
+        n = len(columns["groesse_typ"])
+        leistungen = columns["leistungen"]
+        has = {
+            service: np.fromiter((service in (row or ()) for row in leistungen), dtype=bool, count=n)
+            for service in PRICED_SERVICES
+        }
+        farbe = columns["farbe"]
+        bunt = _equals(farbe, "bunt")
+        farbig = _equals(farbe, "farbig")
+
+        # 1. Fläche
+        raeume = _equals(columns["groesse_typ"], "raeume")
+        anzahl_raeume = _as_float_array(columns["anzahl_raeume"])
+        wandflaeche = _as_float_array(columns["wandflaeche_qm"])
+        flaeche = np.where(raeume, anzahl_raeume * QM_PRO_RAUM, wandflaeche)
+        valid = ~np.isnan(flaeche)
+        flaeche = np.where(valid, flaeche, 0.0)
+
+        # 2. Arbeitskosten
+        preis_wand = np.where(bunt, c.wand_weiss + c.aufschlag_bunt, c.wand_weiss)
+        preis_decke = np.where(bunt, c.decke_weiss + c.aufschlag_bunt, c.decke_weiss)
+        kosten = np.zeros(n)
+        kosten = kosten + np.where(has["waende-decken"], (flaeche * WAND_ANTEIL * preis_wand) + (flaeche * DECKE_ANTEIL * preis_decke), 0.0)
+        for leistung, preis_qm in FLAECHEN_PAUSCHALEN:
+            kosten = kosten + np.where(has[leistung], flaeche * preis_qm, 0.0)
+        kosten = kosten + np.where(has["schimmel"], SCHIMMEL_PAUSCHALE, 0.0)
+
+        boden_flaeche = np.nan_to_num(_as_float_array(columns["boden_flaeche_qm"]), nan=0.0)
+        kosten = kosten + np.where(has["boden"], boden_flaeche * BODEN_PREIS_QM, 0.0)
+        kosten = kosten + np.where(has["boden"] & farbig, boden_flaeche * BODEN_AUFSCHLAG_FARBIG, 0.0)
+
+        epoxid_flaeche = np.nan_to_num(_as_float_array(columns["epoxid_flaeche_qm"]), nan=0.0)
+        kosten = kosten + np.where(has["epoxid"], epoxid_flaeche * EPOXID_PREIS_QM, 0.0)
+        kosten = kosten + np.where(has["epoxid"] & farbig, epoxid_flaeche * EPOXID_AUFSCHLAG_FARBIG, 0.0)
+        arbeitskosten = kosten
+
+        # 3. Spachtelkosten
+        spachtelstufe = columns["spachtelstufe"]
+        spachtel_rate = np.array(
+            [{"q2": c.spachtel_q2, "q3": c.spachtel_q3, "q4": c.spachtel_q4}.get(stufe, 0.0) for stufe in spachtelstufe],
+            dtype=np.float64
+        )
+        has_spachtel = np.array([stufe in ("q2", "q3", "q4") for stufe in spachtelstufe], dtype=bool)
+        spachtelkosten = np.where(has_spachtel, flaeche * spachtel_rate, 0.0)
+
+        # 4. Aufschläge
+        zustand = columns["zustand"]
+        raumhoehe = columns["raumhoehe"]
+        aufschlaege = np.zeros(n)
+        aufschlaege = aufschlaege + np.where(
+            _equals(zustand, "altbau"), arbeitskosten * c.zuschlag_altbau,
+            np.where(_equals(zustand, "renovierung"), arbeitskosten * ZUSCHLAG_RENOVIERUNG, 0.0)
+        )
+        aufschlaege = aufschlaege + np.where(
+            _equals(raumhoehe, "hoch"), arbeitskosten * c.zuschlag_raumhoehe_hoch,
+            np.where(_equals(raumhoehe, "sehr-hoch"), arbeitskosten * ZUSCHLAG_RAUMHOEHE_SEHR_HOCH, 0.0)
+        )
+
+        # 5.-7. Summe, Pauschale, Mindestauftrag
+        basispreis_vor_mindest = arbeitskosten + spachtelkosten + aufschlaege + c.interne_pauschale
+        basispreis = np.where(basispreis_vor_mindest < c.mindestauftrag, c.mindestauftrag, basispreis_vor_mindest)
+
+        # 8. Preisspanne
+        return {
+            "valid": valid,
+            "flaeche_qm": flaeche,
+            "arbeitskosten": arbeitskosten,
+            "spachtelkosten": spachtelkosten,
+            "aufschlaege": aufschlaege,
+            "basispreis_vor_mindest": basispreis_vor_mindest,
+            "basispreis": basispreis,
+            "preis_min": basispreis * c.spanne_min_faktor,
+            "preis_max": basispreis * c.spanne_max_faktor,
+        }
+
+    def calculate_prices(self, requests: Sequence[PriceCalculationRequest]) -> List[Optional[dict]]:
+        """
+        Same result dicts as PricingCalculator.calculate_price, one per request.
+        Rows with a missing area are returned as None.
+        """
+        arrays = self.calculate_columns(requests_to_columns(requests))
+
+        keys = ("flaeche_qm", "arbeitskosten", "spachtelkosten", "aufschlaege",
+                "basispreis_vor_mindest", "basispreis", "preis_min", "preis_max")
+        interne_pauschale = self.config.interne_pauschale
+        mindestauftrag = self.config.mindestauftrag
+
+        results = []
+        for valid, basispreis, *values in zip(arrays["valid"].tolist(), arrays["basispreis"].tolist(),
+                                              *(round2(arrays[key]) for key in keys)):
+            if not valid:
+                results.append(None)
+                continue
+            flaeche_qm, arbeitskosten, spachtelkosten, aufschlaege, vor_mindest, basispreis_final, preis_min, preis_max = values
+            results.append({
+                "preis_min": preis_min,
+                "preis_max": preis_max,
+                "berechnungsdetails": {
+                    "flaeche_qm": flaeche_qm,
+                    "arbeitskosten": arbeitskosten,
+                    "spachtelkosten": spachtelkosten,
+                    "aufschlaege": aufschlaege,
+                    "interne_pauschale": interne_pauschale,
+                    "basispreis_vor_mindest": vor_mindest,
+                    "basispreis_final": basispreis_final,
+                    "mindestauftrag_angewendet": basispreis == mindestauftrag
+                }
+            })
+        return results
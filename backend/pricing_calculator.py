@@ -1,16 +1,128 @@
 from pricing_models import PricingConfig, PriceCalculationRequest
+import os
+import json
+import time
+import hashlib
+import asyncio
 import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+from pymongo.errors import DuplicateKeyError
 
 logger = logging.getLogger(__name__)
 
+# Max. age of the cached pricing config before the version is re-checked
+PRICING_CACHE_TTL_SECONDS = int(os.environ.get('PRICING_CACHE_TTL_SECONDS', '30'))
+# Memoized quotes per calculator (LRU)
+PRICING_QUOTE_CACHE_SIZE = int(os.environ.get('PRICING_QUOTE_CACHE_SIZE', '4096'))
+# Pre-serialized /calculate-price responses (LRU, keyed by ETag)
+PRICING_RESPONSE_CACHE_SIZE = int(os.environ.get('PRICING_RESPONSE_CACHE_SIZE', '2048'))
+# Config versions kept in memory with their calculators (rollback stays warm)
+PRICING_CACHED_VERSIONS = int(os.environ.get('PRICING_CACHED_VERSIONS', '4'))
+
+
+# Feste Formelbestandteile (nicht in PricingConfig), auch Quelle für das Regel-Bundle
+# Durchschnittlich 30m² pro Raum (Wand + Decke kombiniert)
+QM_PRO_RAUM = 30.0
+# Annahme: 70% Wand, 30% Decke
+WAND_ANTEIL = 0.7
+DECKE_ANTEIL = 0.3
+# Leistungen mit Pauschalpreis pro m² (in Berechnungsreihenfolge)
+FLAECHEN_PAUSCHALEN = (
+    ("lackierung", 10.0),
+    ("tapezieren", 12.0),
+)
+SCHIMMEL_PAUSCHALE = 250.0
+# Bodenbelag 30€/m² (+5€ farbig), Epoxidharz 200€/m² (+25€ farbig)
+BODEN_PREIS_QM = 30.0
+BODEN_AUFSCHLAG_FARBIG = 5.0
+EPOXID_PREIS_QM = 200.0
+EPOXID_AUFSCHLAG_FARBIG = 25.0
+ZUSCHLAG_RENOVIERUNG = 0.25
+ZUSCHLAG_RAUMHOEHE_SEHR_HOCH = 0.20
+
+# Relevant for the price; everything else in leistungen is ignored
+PRICED_SERVICES = frozenset({"waende-decken", "lackierung", "tapezieren", "schimmel", "boden", "epoxid"})
+
+
+def normalize_price_request(request: PriceCalculationRequest) -> tuple:
+    """
+    Reduces a request to the inputs that influence the price, so that
+    equivalent requests (other PLZ, different order of leistungen, ...)
+    map to the same key.
+    """
+    leistungen = tuple(sorted(PRICED_SERVICES.intersection(request.leistungen)))
+    raeume = request.groesse_typ == "raeume"
+    return (
+        "raeume" if raeume else "flaeche",
+        request.anzahl_raeume if raeume else request.wandflaeche_qm,
+        leistungen,
+        (request.boden_flaeche_qm or 0) if "boden" in leistungen else None,
+        (request.epoxid_flaeche_qm or 0) if "epoxid" in leistungen else None,
+        request.farbe if request.farbe in ("bunt", "farbig") else None,
+        request.spachtelstufe if request.spachtelstufe in ("q2", "q3", "q4") else None,
+        request.zustand if request.zustand in ("altbau", "renovierung") else None,
+        request.raumhoehe if request.raumhoehe in ("hoch", "sehr-hoch") else None,
+    )
+
+
+def price_request_etag(request: PriceCalculationRequest, config_version: int) -> str:
+    """Stable ETag for a price calculation: normalized request + config version"""
+    payload = json.dumps([config_version, normalize_price_request(request)], separators=(",", ":"))
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+    return f'"p{config_version}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (list of tags, weak tags, *)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
 
 class PricingCalculator:
     """
     Preisberechnung basierend auf konfigurierbaren Regeln
+    Die Konfiguration wird einmal in Lookup-Tabellen übersetzt,
+    Ergebnisse werden in einem begrenzten LRU-Cache gehalten.
     """
     
-    def __init__(self, config: PricingConfig):
+    def __init__(self, config: PricingConfig, cache_size: int = PRICING_QUOTE_CACHE_SIZE):
         self.config = config
+        
+        # Wand/Decke €/m² je Farbe
+        self._preis_wand_decke = (config.wand_weiss, config.decke_weiss)
+        self._preis_wand_decke_bunt = (
+            config.wand_weiss + config.aufschlag_bunt,
+            config.decke_weiss + config.aufschlag_bunt
+        )
+        # Spachtelstufe -> €/m²
+        self._spachtel_rates = {
+            "q2": config.spachtel_q2,
+            "q3": config.spachtel_q3,
+            "q4": config.spachtel_q4
+        }
+        # Zustand / Raumhöhe -> Aufschlagsfaktor
+        self._zustand_faktoren = {
+            "altbau": config.zuschlag_altbau,
+            "renovierung": ZUSCHLAG_RENOVIERUNG
+        }
+        self._raumhoehe_faktoren = {
+            "hoch": config.zuschlag_raumhoehe_hoch,
+            "sehr-hoch": ZUSCHLAG_RAUMHOEHE_SEHR_HOCH
+        }
+        
+        self._cache_size = cache_size
+        self._cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._cache_lock = threading.Lock()
     
     def calculate_price(self, request: PriceCalculationRequest) -> dict:
         """
@@ -19,163 +131,372 @@ class PricingCalculator:
         Returns:
             dict mit keys: preis_min, preis_max, berechnungsdetails
         """
-        try:
-            # 1. Berechne Fläche
-            flaeche_qm = self._calculate_flaeche(request)
-            
-            # 2. Berechne Basis-Arbeitskosten
-            arbeitskosten = self._calculate_arbeitskosten(request, flaeche_qm)
-            
-            # 3. Spachtelkosten
-            spachtelkosten = self._calculate_spachtelkosten(request, flaeche_qm)
-            
-            # 4. Aufschläge (Zustand, Raumhöhe)
-            aufschlaege = self._calculate_aufschlaege(request, arbeitskosten)
-            
-            # 5. Summe bilden
-            basispreis = arbeitskosten + spachtelkosten + aufschlaege
-            
-            # 6. Interne Pauschale (unsichtbar)
-            basispreis += self.config.interne_pauschale
-            
-            # 7. Mindestauftrag
-            if basispreis < self.config.mindestauftrag:
-                basispreis = self.config.mindestauftrag
-            
-            # 8. Preisspanne berechnen
-            preis_min = round(basispreis * self.config.spanne_min_faktor, 2)
-            preis_max = round(basispreis * self.config.spanne_max_faktor, 2)
-            
-            # Berechnungsdetails für Admin
-            details = {
-                "flaeche_qm": round(flaeche_qm, 2),
-                "arbeitskosten": round(arbeitskosten, 2),
-                "spachtelkosten": round(spachtelkosten, 2),
-                "aufschlaege": round(aufschlaege, 2),
-                "interne_pauschale": self.config.interne_pauschale,
-                "basispreis_vor_mindest": round(arbeitskosten + spachtelkosten + aufschlaege + self.config.interne_pauschale, 2),
-                "basispreis_final": round(basispreis, 2),
-                "mindestauftrag_angewendet": basispreis == self.config.mindestauftrag
-            }
-            
-            return {
-                "preis_min": preis_min,
-                "preis_max": preis_max,
-                "berechnungsdetails": details
-            }
+        key = (self.config.version, normalize_price_request(request))
+        
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        
+        if cached is None:
+            try:
+                cached = self._calculate(key[1])
+            except Exception as e:
+                logger.error(f"Price calculation error: {e}")
+                raise
             
-        except Exception as e:
-            logger.error(f"Price calculation error: {e}")
-            raise
+            with self._cache_lock:
+                self._cache[key] = cached
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        
+        preis_min, preis_max, details = cached
+        return {
+            "preis_min": preis_min,
+            "preis_max": preis_max,
+            # Copy: callers must not be able to change cached results
+            "berechnungsdetails": dict(details)
+        }
     
-    def _calculate_flaeche(self, request: PriceCalculationRequest) -> float:
+    def _calculate(self, normalized: tuple) -> tuple:
+        """Berechnung für einen normalisierten Request (siehe normalize_price_request)"""
+        groesse_typ, menge, leistungen, boden_flaeche, epoxid_flaeche, farbe, spachtelstufe, zustand, raumhoehe = normalized
+        
+        # 1. Berechne Fläche
+        flaeche_qm = self._calculate_flaeche(groesse_typ, menge)
+        
+        # 2. Berechne Basis-Arbeitskosten
+        arbeitskosten = self._calculate_arbeitskosten(leistungen, farbe, flaeche_qm, boden_flaeche, epoxid_flaeche)
+        
+        # 3. Spachtelkosten
+        spachtelkosten = self._calculate_spachtelkosten(spachtelstufe, flaeche_qm)
+        
+        # 4. Aufschläge (Zustand, Raumhöhe)
+        aufschlaege = self._calculate_aufschlaege(zustand, raumhoehe, arbeitskosten)
+        
+        # 5. Summe bilden
+        basispreis = arbeitskosten + spachtelkosten + aufschlaege
+        
+        # 6. Interne Pauschale (unsichtbar)
+        basispreis += self.config.interne_pauschale
+        
+        # 7. Mindestauftrag
+        if basispreis < self.config.mindestauftrag:
+            basispreis = self.config.mindestauftrag
+        
+        # 8. Preisspanne berechnen
+        preis_min = round(basispreis * self.config.spanne_min_faktor, 2)
+        preis_max = round(basispreis * self.config.spanne_max_faktor, 2)
+        
+        # Berechnungsdetails für Admin
+        details = {
+            "flaeche_qm": round(flaeche_qm, 2),
+            "arbeitskosten": round(arbeitskosten, 2),
+            "spachtelkosten": round(spachtelkosten, 2),
+            "aufschlaege": round(aufschlaege, 2),
+            "interne_pauschale": self.config.interne_pauschale,
+            "basispreis_vor_mindest": round(arbeitskosten + spachtelkosten + aufschlaege + self.config.interne_pauschale, 2),
+            "basispreis_final": round(basispreis, 2),
+            "mindestauftrag_angewendet": basispreis == self.config.mindestauftrag
+        }
+        
+        return preis_min, preis_max, details
+    
+    def _calculate_flaeche(self, groesse_typ: str, menge) -> float:
         """Berechnet Gesamtfläche in m²"""
-        if request.groesse_typ == "raeume":
-            # Durchschnittlich 30m² pro Raum (Wand + Decke kombiniert)
-            return float(request.anzahl_raeume) * 30.0
+        if groesse_typ == "raeume":
+            return float(menge) * QM_PRO_RAUM
         else:
-            return float(request.wandflaeche_qm)
+            return float(menge)
     
-    def _calculate_arbeitskosten(self, request: PriceCalculationRequest, flaeche_qm: float) -> float:
+    def _calculate_arbeitskosten(self, leistungen: tuple, farbe: Optional[str], flaeche_qm: float,
+                                 boden_flaeche, epoxid_flaeche) -> float:
         """Berechnet Basis-Arbeitskosten für Wände und Decken"""
         kosten = 0.0
         
-        # Prüfe welche Leistungen ausgewählt wurden
-        if "waende-decken" in request.leistungen:
-            # Annahme: 70% Wand, 30% Decke
-            wand_anteil = flaeche_qm * 0.7
-            decke_anteil = flaeche_qm * 0.3
-            
-            # Basispreis
-            preis_wand = self.config.wand_weiss
-            preis_decke = self.config.decke_weiss
-            
-            # Aufschlag für bunt
-            if request.farbe == "bunt":
-                preis_wand += self.config.aufschlag_bunt
-                preis_decke += self.config.aufschlag_bunt
-            
-            kosten += (wand_anteil * preis_wand) + (decke_anteil * preis_decke)
+        if "waende-decken" in leistungen:
+            preis_wand, preis_decke = self._preis_wand_decke_bunt if farbe == "bunt" else self._preis_wand_decke
+            kosten += (flaeche_qm * WAND_ANTEIL * preis_wand) + (flaeche_qm * DECKE_ANTEIL * preis_decke)
         
         # Andere Leistungen haben Pauschalpreise (vereinfacht)
-        if "lackierung" in request.leistungen:
-            kosten += flaeche_qm * 10.0  # Pauschal
-        if "tapezieren" in request.leistungen:
-            kosten += flaeche_qm * 12.0  # Pauschal
-        if "spachteln" in request.leistungen:
-            # Wird separat über Spachtelstufe berechnet
-            pass
-        if "schimmel" in request.leistungen:
-            kosten += 250.0  # Pauschale für Schimmelsanierung
-        
-        # Bodenbelag - 30€ pro m² (verwendet boden_flaeche_qm)
-        if "boden" in request.leistungen:
-            boden_flaeche = request.boden_flaeche_qm or 0
-            kosten += boden_flaeche * 30.0
-            
-            # Aufschlag für farbigen Boden
-            if request.farbe == "farbig":
-                kosten += boden_flaeche * 5.0
-        
-        # Epoxidharzbodenbeschichtung - 200€ pro m²
-        if "epoxid" in request.leistungen:
-            epoxid_flaeche = request.epoxid_flaeche_qm or 0
-            kosten += epoxid_flaeche * 200.0
-            
-            # Aufschlag für farbiges Epoxid
-            if request.farbe == "farbig":
-                kosten += epoxid_flaeche * 25.0
+        for leistung, preis_qm in FLAECHEN_PAUSCHALEN:
+            if leistung in leistungen:
+                kosten += flaeche_qm * preis_qm
+        if "schimmel" in leistungen:
+            kosten += SCHIMMEL_PAUSCHALE
+        
+        # Bodenbelag
+        if boden_flaeche is not None:
+            kosten += boden_flaeche * BODEN_PREIS_QM
+            if farbe == "farbig":
+                kosten += boden_flaeche * BODEN_AUFSCHLAG_FARBIG
+        
+        # Epoxidharzbodenbeschichtung
+        if epoxid_flaeche is not None:
+            kosten += epoxid_flaeche * EPOXID_PREIS_QM
+            if farbe == "farbig":
+                kosten += epoxid_flaeche * EPOXID_AUFSCHLAG_FARBIG
         
         return kosten
     
-    def _calculate_spachtelkosten(self, request: PriceCalculationRequest, flaeche_qm: float) -> float:
+    def _calculate_spachtelkosten(self, spachtelstufe: Optional[str], flaeche_qm: float) -> float:
         """Berechnet Spachtelkosten basierend auf Stufe"""
-        if request.spachtelstufe == "keine" or request.spachtelstufe == "nicht-relevant":
-            return 0.0
-        elif request.spachtelstufe == "q2":
-            return flaeche_qm * self.config.spachtel_q2
-        elif request.spachtelstufe == "q3":
-            return flaeche_qm * self.config.spachtel_q3
-        elif request.spachtelstufe == "q4":
-            return flaeche_qm * self.config.spachtel_q4
-        return 0.0
-    
-    def _calculate_aufschlaege(self, request: PriceCalculationRequest, arbeitskosten: float) -> float:
+        rate = self._spachtel_rates.get(spachtelstufe)
+        return flaeche_qm * rate if rate is not None else 0.0
+    
+    def _calculate_aufschlaege(self, zustand: Optional[str], raumhoehe: Optional[str], arbeitskosten: float) -> float:
         """Berechnet prozentuale Aufschläge"""
         aufschlaege = 0.0
         
-        # Zustand Altbau
-        if request.zustand == "altbau":
-            aufschlaege += arbeitskosten * self.config.zuschlag_altbau
-        elif request.zustand == "renovierung":
-            aufschlaege += arbeitskosten * 0.25  # 25% für renovierungsbedürftig
+        faktor = self._zustand_faktoren.get(zustand)
+        if faktor is not None:
+            aufschlaege += arbeitskosten * faktor
         
-        # Raumhöhe
-        if request.raumhoehe == "hoch":
-            aufschlaege += arbeitskosten * self.config.zuschlag_raumhoehe_hoch
-        elif request.raumhoehe == "sehr-hoch":  # Falls es eine solche Option gibt
-            aufschlaege += arbeitskosten * 0.20
+        faktor = self._raumhoehe_faktoren.get(raumhoehe)
+        if faktor is not None:
+            aufschlaege += arbeitskosten * faktor
         
         return aufschlaege
 
 
-async def get_pricing_config(db):
-    """Holt aktuelle Preiskonfiguration aus DB"""
-    config_doc = await db.pricing_config.find_one({"id": "pricing_config"})
-    
-    if not config_doc:
-        # Erstelle Default-Config
-        default_config = PricingConfig()
-        await db.pricing_config.insert_one(default_config.dict())
-        return default_config
+# Aktiver Zeiger auf eine Version (pricing_config) und unveränderliche Versionen (pricing_config_versions)
+PRICING_CONFIG_POINTER = {"id": "pricing_config"}
+PRICING_CONFIG_FIELDS = tuple(name for name in PricingConfig.model_fields if name not in ("id", "version"))
+
+
+class PricingConfigConflict(Exception):
+    """The active version was changed concurrently"""
+
+
+def config_from_version_doc(doc: dict) -> PricingConfig:
+    return PricingConfig(**{name: doc[name] for name in PRICING_CONFIG_FIELDS if name in doc}, version=doc["version"])
+
+
+async def _insert_config_version(db, config: PricingConfig, based_on: Optional[int]) -> bool:
+    """Writes an immutable version document; False if the version number is taken"""
+    doc = {
+        **config.dict(),
+        "based_on": based_on,
+        "created_at": datetime.now(timezone.utc)
+    }
+    try:
+        await db.pricing_config_versions.insert_one(doc)
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+async def get_pricing_config_version(db, version: int) -> Optional[PricingConfig]:
+    """Immutable snapshot of one version (None if unknown)"""
+    doc = await db.pricing_config_versions.find_one({"version": version}, {"_id": 0})
+    return config_from_version_doc(doc) if doc else None
+
+
+async def get_active_pricing_version(db) -> Optional[int]:
+    doc = await db.pricing_config.find_one(PRICING_CONFIG_POINTER, {"_id": 0, "version": 1})
+    # Documents written before versioning have no version field (projection -> {})
+    return doc.get("version", 0) if doc is not None else None
+
+
+async def _get_active_config(db) -> Optional[PricingConfig]:
+    version = await get_active_pricing_version(db)
+    if version is None:
+        return None
+    return await get_pricing_config_version(db, version)
+
+
+async def _bootstrap_pricing_config(db) -> None:
+    """
+    First access: creates version 0 from the defaults, or migrates the
+    old single document (config fields stored in pricing_config) into
+    its first immutable version.
+    """
+    legacy = await db.pricing_config.find_one(PRICING_CONFIG_POINTER, {"_id": 0})
+    if legacy:
+        config = config_from_version_doc({"version": 0, **legacy})
+    else:
+        config = PricingConfig()
+    await _insert_config_version(db, config, based_on=None)
     
-    return PricingConfig(**config_doc)
+    if legacy:
+        # Zeiger behält die Version, die Felder liegen jetzt in der Version.
+        # None also matches a missing field (documents from before versioning)
+        await db.pricing_config.update_one(
+            {**PRICING_CONFIG_POINTER, "version": {"$in": [None, legacy.get("version", 0)]}},
+            {"$set": {"version": config.version}, "$unset": {name: "" for name in PRICING_CONFIG_FIELDS}}
+        )
+    else:
+        await db.pricing_config.update_one(
+            PRICING_CONFIG_POINTER,
+            {"$setOnInsert": {"version": config.version, "updated_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
 
 
-async def update_pricing_config(db, updates: dict):
-    """Aktualisiert Preiskonfiguration"""
+async def get_pricing_config(db):
+    """Holt aktive Preiskonfiguration aus DB (unveränderlicher Snapshot)"""
+    config = await _get_active_config(db)
+    if config:
+        return config
+    # Bei parallelem Bootstrap gewinnt der erste Schreiber; one attempt only
+    await _bootstrap_pricing_config(db)
+    config = await _get_active_config(db)
+    if config is None:
+        raise RuntimeError("Pricing config could not be initialized")
+    return config
+
+
+async def _activate_pricing_version(db, expected_version: int, version: int) -> bool:
+    """Atomically moves the active pointer, only if nobody else moved it meanwhile"""
+    if expected_version == version:
+        return True
     result = await db.pricing_config.update_one(
-        {"id": "pricing_config"},
-        {"$set": updates}
+        {**PRICING_CONFIG_POINTER, "version": expected_version},
+        {"$set": {"version": version, "updated_at": datetime.now(timezone.utc)}}
     )
+    if result.modified_count:
+        pricing_config_cache.invalidate()
     return result.modified_count > 0
+
+
+async def update_pricing_config(db, updates: dict) -> Optional[PricingConfig]:
+    """
+    Schreibt eine neue unveränderliche Version und aktiviert sie.
+    Raises PricingConfigConflict if another update won the race.
+    """
+    current = await get_pricing_config(db)
+    latest = await db.pricing_config_versions.find_one({}, {"_id": 0, "version": 1}, sort=[("version", -1)])
+    new_version = max(latest["version"] if latest else 0, current.version) + 1
+    
+    config = PricingConfig(**{**current.dict(), **updates, "version": new_version})
+    if not await _insert_config_version(db, config, based_on=current.version):
+        raise PricingConfigConflict()
+    if not await _activate_pricing_version(db, current.version, new_version):
+        # Nie aktiv gewesen, daher gefahrlos entfernbar
+        await db.pricing_config_versions.delete_one({"version": new_version})
+        raise PricingConfigConflict()
+    return config
+
+
+async def rollback_pricing_config(db, version: int) -> Optional[PricingConfig]:
+    """
+    Reactivates an existing version (rollback). Versions are immutable,
+    so caches and ETags keyed by the version number stay valid.
+    Returns None if the version does not exist.
+    """
+    config = await get_pricing_config_version(db, version)
+    if not config:
+        return None
+    current = await get_pricing_config(db)
+    if not await _activate_pricing_version(db, current.version, version):
+        raise PricingConfigConflict()
+    return config
+
+
+async def list_pricing_config_versions(db, limit: int = 50) -> dict:
+    """Newest versions first, with the active one marked"""
+    active = await get_active_pricing_version(db)
+    docs = await db.pricing_config_versions.find({}, {"_id": 0}).sort("version", -1).to_list(limit)
+    return {
+        "active_version": active,
+        "versions": [{**doc, "active": doc["version"] == active} for doc in docs]
+    }
+
+
+class PricingConfigCache:
+    """
+    In-process snapshots of the pricing config versions plus ready calculators.
+    Within the TTL no database access is needed; after it only the
+    active version number is read. Versions are immutable, so snapshots
+    are keyed by version and a rollback reuses the warm calculator.
+    Other workers therefore see an update after at most ttl_seconds.
+    """
+    
+    def __init__(self, ttl_seconds: int = PRICING_CACHE_TTL_SECONDS, max_versions: int = PRICING_CACHED_VERSIONS):
+        self.ttl_seconds = ttl_seconds
+        self.max_versions = max_versions
+        self._config: Optional[PricingConfig] = None
+        self._calculators: "OrderedDict[int, PricingCalculator]" = OrderedDict()
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+    
+    def invalidate(self) -> None:
+        """Force a version check on the next access (after a local update)"""
+        self._checked_at = 0.0
+    
+    @property
+    def version(self) -> Optional[int]:
+        return self._config.version if self._config else None
+    
+    def _is_fresh(self) -> bool:
+        return self._config is not None and time.monotonic() - self._checked_at < self.ttl_seconds
+    
+    def _activate(self, calculator: "PricingCalculator") -> PricingConfig:
+        self._calculators[calculator.config.version] = calculator
+        self._calculators.move_to_end(calculator.config.version)
+        while len(self._calculators) > self.max_versions:
+            self._calculators.popitem(last=False)
+        self._config = calculator.config
+        self._checked_at = time.monotonic()
+        return self._config
+    
+    async def get(self, db) -> PricingConfig:
+        """Current config snapshot (immutable)"""
+        if self._is_fresh():
+            return self._config
+        
+        async with self._lock:
+            if self._is_fresh():
+                return self._config
+            
+            # Cheap check: only the active version number
+            version = await get_active_pricing_version(db)
+            calculator = self._calculators.get(version) if version is not None else None
+            if calculator is not None:
+                return self._activate(calculator)
+            
+            config = await get_pricing_config(db)
+            calculator = self._calculators.get(config.version) or PricingCalculator(config)
+            logger.info(f"Pricing config loaded (version {config.version})")
+            return self._activate(calculator)
+    
+    async def get_calculator(self, db) -> PricingCalculator:
+        """Calculator bound to the current config snapshot"""
+        config = await self.get(db)
+        calculator = self._calculators.get(config.version)
+        # The snapshot may have been evicted between the two reads
+        if calculator is None or calculator.config is not config:
+            calculator = PricingCalculator(config)
+        return calculator
+
+
+class PricingResponseCache:
+    """
+    Bounded LRU of serialized price responses, keyed by ETag.
+    The ETag contains the config version, so entries of an old
+    config are simply never hit again and age out.
+    """
+    
+    def __init__(self, max_entries: int = PRICING_RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+    
+    def get(self, etag: str) -> Optional[bytes]:
+        body = self._entries.get(etag)
+        if body is not None:
+            self._entries.move_to_end(etag)
+        return body
+    
+    def put(self, etag: str, body: bytes) -> None:
+        self._entries[etag] = body
+        self._entries.move_to_end(etag)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# Singleton instances
+pricing_config_cache = PricingConfigCache()
+pricing_response_cache = PricingResponseCache()
@@ -1,10 +1,12 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 
 class PricingConfig(BaseModel):
     """Preisregeln Konfiguration"""
     id: str = "pricing_config"
+    # Incremented on every update, used for cache invalidation
+    version: int = 0
     
     # Basispreise (netto)
     wand_weiss: float = 8.10
@@ -29,6 +31,8 @@ class PricingConfig(BaseModel):
     spanne_max_faktor: float = 1.15
     
     class Config:
+        # Snapshots are shared between requests and must not be mutated
+        frozen = True
         json_schema_extra = {
             "example": {
                 "wand_weiss": 8.10,
@@ -81,6 +85,11 @@ class PriceCalculationRequest(BaseModel):
     zusatzoptionen: list[str] = []
 
 
+class BatchPriceCalculationRequest(BaseModel):
+    """Request für Batch-Preisberechnung (Vertrieb, Angebotslisten)"""
+    requests: List[PriceCalculationRequest]
+
+
 class PriceCalculationResponse(BaseModel):
     """Response für Preisberechnung"""
     success: bool
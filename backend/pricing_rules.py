@@ -0,0 +1,136 @@
+"""
+Pricing Rules Bundle - deklarative Preisregeln für den Rechner im Frontend
+Abgeleitet aus PricingConfig und den Formeln des PricingCalculator;
+frontend/src/lib/pricingRules.js rechnet damit exakt wie das Backend.
+"""
+
+import json
+import hashlib
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from pricing_models import PricingConfig
+from pricing_calculator import (
+    QM_PRO_RAUM,
+    WAND_ANTEIL,
+    DECKE_ANTEIL,
+    FLAECHEN_PAUSCHALEN,
+    SCHIMMEL_PAUSCHALE,
+    BODEN_PREIS_QM,
+    BODEN_AUFSCHLAG_FARBIG,
+    EPOXID_PREIS_QM,
+    EPOXID_AUFSCHLAG_FARBIG,
+    ZUSCHLAG_RENOVIERUNG,
+    ZUSCHLAG_RAUMHOEHE_SEHR_HOCH,
+    config_from_version_doc
+)
+
+# Bumped whenever the structure or the evaluation order changes
+RULES_SCHEMA_VERSION = 1
+# Older versions searched when a bundle is requested by hash
+RULES_LOOKUP_VERSIONS = 20
+
+
+def build_rules_bundle(config: PricingConfig) -> dict:
+    """
+    Rules in evaluation order. Prices are kept as in the config
+    (e.g. wall price and colour surcharge separately) so the client
+    performs the same float operations as PricingCalculator.
+    """
+    return {
+        "schema": RULES_SCHEMA_VERSION,
+        "config_version": config.version,
+        "flaeche": {
+            "qm_pro_raum": QM_PRO_RAUM
+        },
+        "waende_decken": {
+            "leistung": "waende-decken",
+            "wand_anteil": WAND_ANTEIL,
+            "decke_anteil": DECKE_ANTEIL,
+            "preis_wand": config.wand_weiss,
+            "preis_decke": config.decke_weiss,
+            "farbaufschlag": {"bunt": config.aufschlag_bunt}
+        },
+        "flaechen_pauschalen": [
+            {"leistung": leistung, "preis_qm": preis_qm} for leistung, preis_qm in FLAECHEN_PAUSCHALEN
+        ],
+        "pauschalen": [
+            {"leistung": "schimmel", "preis": SCHIMMEL_PAUSCHALE}
+        ],
+        "bodenflaechen": [
+            {"leistung": "boden", "flaeche": "boden_flaeche_qm", "preis_qm": BODEN_PREIS_QM,
+             "farbaufschlag": {"farbig": BODEN_AUFSCHLAG_FARBIG}},
+            {"leistung": "epoxid", "flaeche": "epoxid_flaeche_qm", "preis_qm": EPOXID_PREIS_QM,
+             "farbaufschlag": {"farbig": EPOXID_AUFSCHLAG_FARBIG}}
+        ],
+        "spachtel": {
+            "q2": config.spachtel_q2,
+            "q3": config.spachtel_q3,
+            "q4": config.spachtel_q4
+        },
+        "aufschlaege": {
+            "zustand": {"altbau": config.zuschlag_altbau, "renovierung": ZUSCHLAG_RENOVIERUNG},
+            "raumhoehe": {"hoch": config.zuschlag_raumhoehe_hoch, "sehr-hoch": ZUSCHLAG_RAUMHOEHE_SEHR_HOCH}
+        },
+        "interne_pauschale": config.interne_pauschale,
+        "mindestauftrag": config.mindestauftrag,
+        "spanne": {
+            "min_faktor": config.spanne_min_faktor,
+            "max_faktor": config.spanne_max_faktor
+        }
+    }
+
+
+def serialize_rules_bundle(config: PricingConfig) -> Tuple[str, bytes]:
+    """Canonical JSON of the bundle and its content hash (sha256, 16 hex chars)"""
+    bundle = build_rules_bundle(config)
+    canonical = json.dumps(bundle, sort_keys=True, separators=(",", ":"))
+    content_hash = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+    bundle["hash"] = content_hash
+    return content_hash, json.dumps(bundle, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+class RulesBundleCache:
+    """Serialized bundles by config version (versions are immutable)"""
+
+    def __init__(self, max_versions: int = 8):
+        self.max_versions = max_versions
+        self._bundles: "OrderedDict[int, Tuple[str, bytes]]" = OrderedDict()
+
+    def get(self, config: PricingConfig) -> Tuple[str, bytes]:
+        entry = self._bundles.get(config.version)
+        if entry is None:
+            entry = serialize_rules_bundle(config)
+            self._bundles[config.version] = entry
+            while len(self._bundles) > self.max_versions:
+                self._bundles.popitem(last=False)
+        else:
+            self._bundles.move_to_end(config.version)
+        return entry
+
+    def find(self, rules_hash: str) -> Optional[bytes]:
+        """Body of an already serialized bundle by its hash"""
+        for content_hash, body in self._bundles.values():
+            if content_hash == rules_hash:
+                return body
+        return None
+
+
+async def find_rules_bundle(db, rules_hash: str) -> Optional[bytes]:
+    """
+    Bundle by content hash, also for recent inactive versions
+    (e.g. a client that still holds the bundle of a rolled back config).
+    """
+    body = rules_bundle_cache.find(rules_hash)
+    if body is not None:
+        return body
+    cursor = db.pricing_config_versions.find({}, {"_id": 0}).sort("version", -1)
+    for doc in await cursor.to_list(RULES_LOOKUP_VERSIONS):
+        content_hash, body = serialize_rules_bundle(config_from_version_doc(doc))
+        if content_hash == rules_hash:
+            return body
+    return None
+
+
+# Singleton instance
+rules_bundle_cache = RulesBundleCache()
@@ -0,0 +1,190 @@
+"""
+Pricing Simulation - What-if-Neuberechnung gespeicherter Leads
+Bewertet alle (oder gefilterte) Leads mit aktueller und vorgeschlagener
+Preiskonfiguration und liefert aggregierte Abweichungen.
+"""
+
+import asyncio
+import logging
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from pricing_models import PricingConfig
+from pricing_batch import BatchPricingCalculator
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+SIMULATION_BATCH_SIZE = 5000
+
+# Area-priced services: leads stored before their area was persisted cannot be re-priced
+AREA_FIELDS = {"boden": "boden_flaeche_qm", "epoxid": "epoxid_flaeche_qm"}
+UNSIMULABLE_NOTE = (
+    "Leads mit Boden/Epoxid ohne gespeicherte Fläche (vor deren Speicherung erstellt) "
+    "sind nicht simulierbar und in keiner Summe enthalten."
+)
+
+# Only the fields the calculator needs are read from Mongo
+SIMULATION_PROJECTION = {
+    "_id": 0,
+    "groesse_typ": 1,
+    "anzahl_raeume": 1,
+    "wandflaeche_qm": 1,
+    "boden_flaeche_qm": 1,
+    "epoxid_flaeche_qm": 1,
+    "leistungen": 1,
+    "farbe": 1,
+    "spachtelstufe": 1,
+    "zustand": 1,
+    "raumhoehe": 1,
+}
+
+
+def apply_config_update(config: PricingConfig, updates: dict) -> PricingConfig:
+    """Proposed config = current config + non-None updates (nothing is saved)"""
+    data = config.dict()
+    data.update({k: v for k, v in updates.items() if v is not None})
+    return PricingConfig(**data)
+
+
+def _docs_to_columns(docs: List[dict]) -> Dict[str, list]:
+    columns = {field: [doc.get(field) for doc in docs] for field in SIMULATION_PROJECTION if field != "_id"}
+    columns["leistungen"] = [value or [] for value in columns["leistungen"]]
+    return columns
+
+
+def _missing_areas(columns: Dict[str, list]) -> Dict[str, np.ndarray]:
+    """Per area-priced service: rows that contain it but have no stored area"""
+    return {
+        leistung: np.array([leistung in leistungen and area is None
+                            for leistungen, area in zip(columns["leistungen"], columns[field])], dtype=bool)
+        for leistung, field in AREA_FIELDS.items()
+    }
+
+
+class RepricingAccumulator:
+    """Collects per-batch results; only price deltas are kept per lead"""
+
+    def __init__(self, current: PricingConfig, proposed: PricingConfig):
+        self.current = BatchPricingCalculator(current)
+        self.proposed = BatchPricingCalculator(proposed)
+        self.current_mindestauftrag = current.mindestauftrag
+        self.proposed_mindestauftrag = proposed.mindestauftrag
+
+        self.leads = 0
+        self.skipped = 0
+        self.unsimulable = 0
+        self.unsimulable_per_service = {leistung: 0 for leistung in AREA_FIELDS}
+        self.deltas: List[np.ndarray] = []
+        self.current_total = 0.0
+        self.proposed_total = 0.0
+        self.into_mindestauftrag = 0
+        self.out_of_mindestauftrag = 0
+        self.per_service: pd.DataFrame = pd.DataFrame(columns=["leads", "current", "proposed", "delta"], dtype=float)
+
+    def add_batch(self, docs: List[dict]) -> None:
+        """Prices one batch with both configs (blocking, run in a thread)"""
+        columns = _docs_to_columns(docs)
+        before = self.current.calculate_columns(columns)
+        after = self.proposed.calculate_columns(columns)
+
+        missing = _missing_areas(columns)
+        unsimulable = np.logical_or.reduce(list(missing.values()))
+        for leistung, rows in missing.items():
+            self.unsimulable_per_service[leistung] += int(rows.sum())
+        self.unsimulable += int(unsimulable.sum())
+
+        # Without the area they would be priced at 0 m² - kept out of every total
+        valid = before["valid"] & ~unsimulable
+        self.leads += int(valid.sum())
+        self.skipped += int((~before["valid"] & ~unsimulable).sum())
+
+        current = before["basispreis"][valid]
+        proposed = after["basispreis"][valid]
+        delta = proposed - current
+        self.deltas.append(delta)
+        self.current_total += float(current.sum())
+        self.proposed_total += float(proposed.sum())
+
+        was_minimum = before["basispreis_vor_mindest"][valid] < self.current_mindestauftrag
+        is_minimum = after["basispreis_vor_mindest"][valid] < self.proposed_mindestauftrag
+        self.into_mindestauftrag += int((is_minimum & ~was_minimum).sum())
+        self.out_of_mindestauftrag += int((was_minimum & ~is_minimum).sum())
+
+        # Revenue impact per service: a lead counts for every service it contains
+        frame = pd.DataFrame({
+            "leistung": [leistungen for leistungen, ok in zip(columns["leistungen"], valid) if ok],
+            "leads": 1.0,
+            "current": current,
+            "proposed": proposed,
+            "delta": delta,
+        }).explode("leistung").dropna(subset=["leistung"])
+        batch_services = frame.groupby("leistung")[["leads", "current", "proposed", "delta"]].sum()
+        self.per_service = batch_services.add(self.per_service, fill_value=0.0)
+
+    def result(self) -> dict:
+        deltas = np.concatenate(self.deltas) if self.deltas else np.zeros(0)
+        has_leads = deltas.size > 0
+
+        per_service = {
+            leistung: {
+                "leads": int(row["leads"]),
+                "umsatz_aktuell": round(float(row["current"]), 2),
+                "umsatz_neu": round(float(row["proposed"]), 2),
+                "differenz": round(float(row["delta"]), 2),
+            }
+            for leistung, row in self.per_service.sort_values("delta").iterrows()
+        }
+
+        return {
+            "leads": self.leads,
+            "skipped": self.skipped,
+            "nicht_simulierbar": {
+                "leads": self.unsimulable,
+                "pro_leistung": dict(self.unsimulable_per_service),
+                "hinweis": UNSIMULABLE_NOTE if self.unsimulable else None,
+            },
+            "umsatz_aktuell": round(self.current_total, 2),
+            "umsatz_neu": round(self.proposed_total, 2),
+            "differenz_gesamt": round(self.proposed_total - self.current_total, 2),
+            "differenz_prozent": round((self.proposed_total / self.current_total - 1) * 100, 2) if self.current_total else None,
+            "differenz_pro_lead": {
+                "mittelwert": round(float(deltas.mean()), 2) if has_leads else None,
+                "median": round(float(np.median(deltas)), 2) if has_leads else None,
+                "min": round(float(deltas.min()), 2) if has_leads else None,
+                "max": round(float(deltas.max()), 2) if has_leads else None,
+                "teurer": int((deltas > 0.005).sum()),
+                "guenstiger": int((deltas < -0.005).sum()),
+            },
+            "mindestauftrag": {
+                "neu_betroffen": self.into_mindestauftrag,
+                "nicht_mehr_betroffen": self.out_of_mindestauftrag,
+            },
+            "pro_leistung": per_service,
+        }
+
+
+async def simulate_repricing(leads_collection, current: PricingConfig, proposed: PricingConfig,
+                             query: dict, batch_size: int = SIMULATION_BATCH_SIZE) -> dict:
+    """
+    Streams the matching leads in batches and prices each batch with the
+    current and the proposed config. Prices are compared on basispreis
+    (after Mindestauftrag, before the min/max range).
+    """
+    accumulator = RepricingAccumulator(current, proposed)
+    cursor = leads_collection.find(query, SIMULATION_PROJECTION).batch_size(batch_size)
+
+    batch: List[dict] = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            await asyncio.to_thread(accumulator.add_batch, batch)
+            batch = []
+    if batch:
+        await asyncio.to_thread(accumulator.add_batch, batch)
+
+    result = accumulator.result()
+    logger.info(f"Repricing simulation: {result['leads']} leads, difference {result['differenz_gesamt']}")
+    return result
@@ -0,0 +1,140 @@
+"""
+Rate Limiting - Token Buckets pro Client-IP für öffentliche Schreib-Endpunkte
+Als ASGI-Middleware vor dem Routing: abgewiesene Requests lesen keinen Body
+(keine Uploads auf der Platte, keine Emails, keine Preisberechnung).
+"""
+
+import os
+import json
+import math
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() != 'false'
+# Upper bound for tracked clients per limiter (LRU)
+RATE_LIMIT_MAX_CLIENTS = int(os.environ.get('RATE_LIMIT_MAX_CLIENTS', '10000'))
+# Lead form: 3 submissions at once, then one every 10 seconds
+RATE_LIMIT_LEADS_BURST = int(os.environ.get('RATE_LIMIT_LEADS_BURST', '3'))
+RATE_LIMIT_LEADS_PER_MINUTE = float(os.environ.get('RATE_LIMIT_LEADS_PER_MINUTE', '6'))
+# Price calculation: live updates while the form is filled in
+RATE_LIMIT_PRICE_BURST = int(os.environ.get('RATE_LIMIT_PRICE_BURST', '30'))
+RATE_LIMIT_PRICE_PER_MINUTE = float(os.environ.get('RATE_LIMIT_PRICE_PER_MINUTE', '120'))
+# Reverse proxies in front of the app that append to X-Forwarded-For (ingress = 1).
+# 0: ignore the header and use the socket address.
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', '1'))
+
+
+def client_ip(client_host: Optional[str], forwarded_for: Optional[str], trusted_hops: int = TRUSTED_PROXY_HOPS) -> str:
+    """
+    Client IP as seen by the outermost trusted proxy: the entry `trusted_hops`
+    from the right of X-Forwarded-For. Entries further left are sent by the
+    client itself and can be forged.
+    """
+    entries = [entry.strip() for entry in (forwarded_for or "").split(",") if entry.strip()]
+    if trusted_hops > 0 and entries:
+        return entries[-min(trusted_hops, len(entries))]
+    return client_host or "unknown"
+
+
+def request_client_ip(request) -> str:
+    """client_ip for a Starlette request (all X-Forwarded-For headers, in order)"""
+    forwarded_for = ", ".join(request.headers.getlist("x-forwarded-for"))
+    return client_ip(request.client.host if request.client else None, forwarded_for)
+
+
+class TokenBucketLimiter:
+    """
+    One token bucket per key, refilled continuously at `rate` tokens per
+    second up to `burst`. Buckets live in a fixed-size LRU; an evicted
+    client simply starts with a full bucket again.
+    """
+
+    def __init__(self, rate: float, burst: int, max_clients: int = RATE_LIMIT_MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        # key -> [tokens, last refill (monotonic)]
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, key: str, now: Optional[float] = None) -> float:
+        """Takes one token. Returns 0 if allowed, else seconds until the next token."""
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [float(self.burst), now]
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            return 0.0
+        return (1.0 - bucket[0]) / self.rate
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware: limits (method, path) pairs, answers 429 with Retry-After.
+    limits: {("POST", "/api/leads"): TokenBucketLimiter(...)}
+    """
+
+    def __init__(self, app, limits: Dict[Tuple[str, str], TokenBucketLimiter], enabled: bool = RATE_LIMIT_ENABLED,
+                 trusted_hops: int = TRUSTED_PROXY_HOPS):
+        self.app = app
+        self.limits = limits
+        self.enabled = enabled
+        self.trusted_hops = trusted_hops
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limits.get((scope["method"], scope["path"]))
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Proxies may append a separate header instead of extending the first one
+        forwarded_for = ", ".join(
+            value.decode("latin-1") for name, value in scope["headers"] if name == b"x-forwarded-for"
+        )
+        client = scope.get("client")
+        ip = client_ip(client[0] if client else None, forwarded_for, self.trusted_hops)
+
+        retry_after = limiter.acquire(ip)
+        if not retry_after:
+            await self.app(scope, receive, send)
+            return
+
+        logger.warning(f"Rate limit exceeded: {scope['method']} {scope['path']}")
+        body = json.dumps({"detail": "Zu viele Anfragen. Bitte versuchen Sie es gleich erneut."}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(retry_after)).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def default_limits() -> Dict[Tuple[str, str], TokenBucketLimiter]:
+    """Limits for the public endpoints that write or compute"""
+    return {
+        ("POST", "/api/leads"): TokenBucketLimiter(RATE_LIMIT_LEADS_PER_MINUTE / 60, RATE_LIMIT_LEADS_BURST),
+        ("POST", "/api/calculate-price"): TokenBucketLimiter(RATE_LIMIT_PRICE_PER_MINUTE / 60, RATE_LIMIT_PRICE_BURST),
+    }
@@ -7,7 +7,8 @@ import os
 import uuid
 from pathlib import Path
 from auth_service import auth_service
-from media_service import media_service
+from media_service import media_service, MAX_UPLOAD_BYTES
+from media_cache import resize_cache
 
 # MongoDB connection
 mongo_url = os.environ.get('MONGO_URL')
@@ -17,6 +18,13 @@ db = client[os.environ.get('DB_NAME', 'ocean_color')]
 router = APIRouter(prefix="/api/references", tags=["references"])
 
 # Models
+class ImageVariant(BaseModel):
+    """One file of the srcset manifest (from /upload-image)"""
+    url: str
+    format: str
+    width: int
+    height: int
+
 class ReferenceBase(BaseModel):
     company: str
     title: str
@@ -36,6 +44,7 @@ class ReferenceCreate(ReferenceBase):
     image: Optional[str] = None
     image_webp: Optional[str] = None
     image_fallback: Optional[str] = None
+    image_variants: List[ImageVariant] = []
 
 class ReferenceUpdate(BaseModel):
     company: Optional[str] = None
@@ -51,6 +60,7 @@ class ReferenceUpdate(BaseModel):
     image: Optional[str] = None
     image_webp: Optional[str] = None
     image_fallback: Optional[str] = None
+    image_variants: Optional[List[ImageVariant]] = None
     before_image: Optional[str] = None
     after_image: Optional[str] = None
 
@@ -59,6 +69,7 @@ class ReferenceResponse(ReferenceBase):
     image: Optional[str] = None
     image_webp: Optional[str] = None
     image_fallback: Optional[str] = None
+    image_variants: List[ImageVariant] = []
     created_at: str
     updated_at: str
 
@@ -86,7 +97,9 @@ async def get_references_admin(_: bool = Depends(verify_admin_token)):
 @router.get("/media-stats")
 async def get_media_stats(_: bool = Depends(verify_admin_token)):
     """Get media storage statistics (admin only)"""
-    return media_service.get_media_stats()
+    stats = media_service.get_media_stats()
+    stats['resize_cache'] = resize_cache.stats()
+    return stats
 
 @router.get("/categories/list")
 async def get_categories():
@@ -245,8 +258,10 @@ async def upload_image(
     - Compresses for web (JPEG 85%, WebP 80%)
     - Generates WebP version by default for modern browsers
     - Keeps original format as fallback
+    - Generates a width ladder (srcset variants) in every format
+    - Checks type and pixel count from the file header before decoding
     
-    Returns both URLs for <picture> element usage.
+    Returns both URLs for <picture> element usage plus the variant manifest.
     """
     if not authorization:
         raise HTTPException(status_code=401, detail="Nicht autorisiert")
@@ -255,13 +270,12 @@ async def upload_image(
     if not auth_service.verify_token(token):
         raise HTTPException(status_code=401, detail="Ungültiger Token")
     
-    # Read file data
+    # The request body was already capped while streaming (BodySizeLimitMiddleware,
+    # server.py); file.size is the received size of the file part itself
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Datei zu groß (max. {MAX_UPLOAD_BYTES // (1024 * 1024)}MB)")
     file_data = await file.read()
     
-    # Validate file size (max 10MB)
-    if len(file_data) > 10 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="Datei zu groß (max. 10MB)")
-    
     try:
         result = await media_service.upload_reference_image(
             file_data=file_data,
@@ -1,4 +1,5 @@
 from fastapi import FastAPI, APIRouter
+from contextlib import asynccontextmanager
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
@@ -14,6 +15,16 @@ from datetime import datetime, timezone
 # Import leads routes
 from leads_routes import router as leads_router
 from references_routes import router as references_router
+from media_routes import router as media_router
+from lead_search import backfill_search_keys
+from db_indexes import ensure_indexes
+from email_outbox import outbox_worker
+from auth_service import auth_service
+from auth_store import create_auth_store
+from rate_limit import RateLimitMiddleware, default_limits
+from body_limit import BodySizeLimitMiddleware, MULTIPART_OVERHEAD_BYTES
+from media_service import media_service, MAX_UPLOAD_BYTES
+from leads_routes import MAX_UPLOAD_REQUEST_BYTES
 
 
 ROOT_DIR = Path(__file__).parent
@@ -24,8 +35,22 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: indexes first, then data migrations that rely on them
+    await ensure_indexes(db)
+    await backfill_search_keys(db.leads)
+    await auth_service.start(create_auth_store(db))
+    outbox_worker.start(db)
+    yield
+    # Shutdown
+    await outbox_worker.stop()
+    await auth_service.stop()
+    media_service.shutdown()
+    client.close()
+
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -75,6 +100,8 @@ async def get_status_checks():
 app.include_router(api_router)
 app.include_router(leads_router)
 app.include_router(references_router)
+# /media/r/{width}/{path} - must come before the /media static mount
+app.include_router(media_router)
 
 # Mount uploads directory for static file serving (legacy)
 UPLOAD_DIR = Path("/app/backend/uploads")
@@ -86,6 +113,15 @@ MEDIA_DIR = Path("/app/backend/media")
 MEDIA_DIR.mkdir(exist_ok=True)
 app.mount("/media", StaticFiles(directory=str(MEDIA_DIR)), name="media")
 
+# Upload bodies are capped before Starlette spools them to disk
+app.add_middleware(BodySizeLimitMiddleware, limits={
+    ("POST", "/api/references/upload-image"): MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES,
+    ("POST", "/api/leads"): MAX_UPLOAD_REQUEST_BYTES + MULTIPART_OVERHEAD_BYTES,
+})
+
+# Per-IP token buckets for public write endpoints (inside CORS, so 429s carry CORS headers)
+app.add_middleware(RateLimitMiddleware, limits=default_limits())
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -100,7 +136,3 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
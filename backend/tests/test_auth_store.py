@@ -0,0 +1,213 @@
+"""
+Auth Store Tests
+Two AuthService instances (= two workers) sharing one store: tokens,
+lockouts and revocations must hold across both, for every backend.
+Local stand-ins: mongomock_motor for MongoDB, fakeredis for Redis.
+Plus the in-memory building blocks (ExpiryMap, SlidingWindowCounter).
+"""
+
+import sys
+import asyncio
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+import fakeredis
+from mongomock_motor import AsyncMongoMockClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from auth_service import AuthService  # noqa: E402
+from auth_store import ExpiryMap, SlidingWindowCounter, MemoryAuthStore, MongoAuthStore, RedisAuthStore  # noqa: E402
+
+BACKENDS = {
+    "memory": lambda: MemoryAuthStore(),
+    "mongo": lambda: MongoAuthStore(AsyncMongoMockClient()["test_auth_store"]),
+    "redis": lambda: RedisAuthStore(client=fakeredis.FakeAsyncRedis()),
+}
+
+
+@pytest.fixture(autouse=True)
+def auth_env(monkeypatch):
+    monkeypatch.setenv("ADMIN_PASSWORD", "richtig")
+    # Signing key must come from the shared store
+    monkeypatch.delenv("JWT_SECRET", raising=False)
+
+
+def run_workers(backend: str, scenario):
+    """Runs scenario(worker_a, worker_b) with both services started on one store"""
+    async def main():
+        store = BACKENDS[backend]()
+        worker_a, worker_b = AuthService(), AuthService()
+        await worker_a.start(store)
+        await worker_b.start(store)
+        try:
+            await scenario(worker_a, worker_b)
+        finally:
+            await worker_a.stop()
+            await worker_b.stop()
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_token_issued_on_one_worker_verifies_on_the_other(backend):
+    async def scenario(worker_a, worker_b):
+        assert worker_a.jwt_secret == worker_b.jwt_secret
+        token = worker_a.generate_token()
+        assert worker_b.verify_token(token)
+        assert not worker_b.verify_token(token + "x")
+
+    run_workers(backend, scenario)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_lockout_applies_across_workers(backend):
+    async def scenario(worker_a, worker_b):
+        ip = "203.0.113.7"
+        # Failed attempts alternate between the workers
+        for attempt in range(AuthService.MAX_ATTEMPTS):
+            worker = worker_a if attempt % 2 == 0 else worker_b
+            success, _, _ = await worker.verify_password("falsch", ip)
+            assert not success
+
+        # Locked everywhere, even with the right password
+        for worker in (worker_a, worker_b):
+            success, error, remaining = await worker.verify_password("richtig", ip)
+            assert not success
+            assert remaining == 0
+            assert "Fehlversuche" in error
+
+        # Other clients are not affected
+        success, _, _ = await worker_b.verify_password("richtig", "198.51.100.1")
+        assert success
+
+    run_workers(backend, scenario)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_revocation_reaches_the_other_worker_after_sync(backend):
+    async def scenario(worker_a, worker_b):
+        token = worker_a.generate_token()
+        other_token = worker_a.generate_token()
+        assert worker_b.verify_token(token)
+
+        assert await worker_a.invalidate_token(token)
+        assert not worker_a.verify_token(token)
+        # Not invalidated twice
+        assert not await worker_a.invalidate_token(token)
+
+        await worker_b.sync_revocations()
+        assert not worker_b.verify_token(token)
+        assert worker_b.verify_token(other_token)
+
+    run_workers(backend, scenario)
+
+
+# ============= In-memory structures =============
+
+def test_expiry_map_purges_due_entries_only():
+    expiry = ExpiryMap()
+    expiry.set("a", 10.0)
+    expiry.set("b", 20.0)
+    expiry.set("c", 30.0)
+
+    assert expiry.get("a", now=5.0) == 10.0
+    assert expiry.items(now=20.0) == [("c", 30.0)]
+    assert "b" not in expiry
+
+
+def test_expiry_map_overwrite_keeps_the_new_expiry():
+    expiry = ExpiryMap()
+    expiry.set("a", 10.0)
+    expiry.set("a", 50.0)
+
+    # The stale heap entry (10.0) must not remove the renewed key
+    expiry.purge(now=20.0)
+    assert expiry.get("a", now=20.0) == 50.0
+    expiry.purge(now=50.0)
+    assert len(expiry) == 0
+
+
+def test_expiry_map_rebuilds_heap_of_stale_entries():
+    expiry = ExpiryMap()
+    for i in range(1000):
+        expiry.set("a", 100.0 + i)
+        expiry.set("b", 100.0 + i)
+
+    assert len(expiry) == 2
+    assert len(expiry._heap) <= 2 * len(expiry) + 64
+    assert expiry.items(now=0.0) == [("a", 1099.0), ("b", 1099.0)]
+
+
+def test_expiry_map_lru_cap():
+    expiry = ExpiryMap(max_entries=2)
+    expiry.set("a", 100.0)
+    expiry.set("b", 100.0)
+    expiry.set("a", 200.0)  # "a" renewed, "b" is now the oldest
+    expiry.set("c", 100.0)
+
+    assert "b" not in expiry
+    assert expiry.items(now=0.0) == [("a", 200.0), ("c", 100.0)]
+    # Evicted key's heap entry is skipped on purge
+    expiry.purge(now=150.0)
+    assert expiry.items(now=150.0) == [("a", 200.0)]
+
+
+def test_sliding_window_weights_the_previous_window():
+    counter = SlidingWindowCounter()
+    for _ in range(4):
+        counter.add("ip", now=10.0, window_seconds=100.0)
+
+    # 25% into the next window: 75% of the previous count still overlaps
+    assert counter.add("ip", now=125.0, window_seconds=100.0) == 1 + 3
+    # 90% in: 4 * 0.1 rounds up to 1
+    assert counter.add("ip", now=190.0, window_seconds=100.0) == 2 + 1
+    # Two windows later nothing is left
+    assert counter.add("ip", now=310.0, window_seconds=100.0) == 1
+
+
+def test_sliding_window_counts_a_burst_across_the_boundary():
+    counter = SlidingWindowCounter()
+    counts = [counter.add("ip", now=now, window_seconds=900.0) for now in (897.0, 898.0, 899.0, 900.5, 901.0)]
+    assert counts[-1] == 5
+
+
+def test_sliding_window_lru_cap_and_idle_keys():
+    counter = SlidingWindowCounter(max_keys=2)
+    counter.add("a", now=0.0, window_seconds=100.0)
+    counter.add("b", now=0.0, window_seconds=100.0)
+    counter.add("a", now=0.0, window_seconds=100.0)
+    counter.add("c", now=0.0, window_seconds=100.0)
+
+    assert len(counter) == 2
+    # "b" was evicted (least recently counted), "a" kept its count
+    assert counter.add("a", now=0.0, window_seconds=100.0) == 3
+    # Keys idle for more than two windows are dropped on the next add
+    counter.add("d", now=500.0, window_seconds=100.0)
+    assert len(counter) == 1
+
+
+def test_memory_lockout_triggers_at_max_attempts_across_a_window_boundary():
+    async def scenario():
+        store = MemoryAuthStore()
+        service = AuthService(store)
+        window = timedelta(minutes=AuthService.ATTEMPT_WINDOW_MINUTES)
+        # Attempts seconds apart, straddling the start of a fixed window
+        boundary = datetime.fromtimestamp(window.total_seconds() * 2_000_000, timezone.utc)
+        times = [boundary + timedelta(seconds=s) for s in (-3, -2, -1, 1, 2)]
+
+        counts = [await store.record_attempt("203.0.113.7", now, window) for now in times]
+        assert counts[-1] >= AuthService.MAX_ATTEMPTS
+
+        for _ in range(AuthService.MAX_ATTEMPTS - 1):
+            success, _, remaining = await service.verify_password("falsch", "198.51.100.1")
+            assert not success and remaining > 0
+        success, error, remaining = await service.verify_password("falsch", "198.51.100.1")
+        assert remaining == 0 and "gesperrt" in error
+        assert await store.get_lock("198.51.100.1") is not None
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
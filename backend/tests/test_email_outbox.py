@@ -0,0 +1,89 @@
+"""
+Email Outbox Tests
+Lead notifications survive a failed enqueue: the pending mark on the lead
+is picked up by the worker's sweep (mongomock_motor, no running MongoDB needed).
+"""
+
+import sys
+import asyncio
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import email_outbox  # noqa: E402
+from email_outbox import (  # noqa: E402
+    LEAD_NOTIFICATION_PENDING,
+    enqueue_lead_notification,
+    sweep_pending_notifications,
+    with_notification_pending,
+)
+
+
+def _db():
+    return AsyncMongoMockClient()["test_email_outbox"]
+
+
+def _lead(number: int) -> dict:
+    return {"id": f"lead-{number}", "plz": "20095", "name": f"Kunde {number}", "search_keys": ["kunde"]}
+
+
+def test_enqueue_clears_the_pending_mark():
+    async def scenario():
+        db = _db()
+        await db.leads.insert_one(with_notification_pending(_lead(1)))
+
+        message_id = await enqueue_lead_notification(db, _lead(1))
+
+        lead = await db.leads.find_one({"id": "lead-1"})
+        assert LEAD_NOTIFICATION_PENDING not in lead
+        message = await db.email_outbox.find_one({"id": message_id})
+        assert message["lead_id"] == "lead-1"
+        assert "search_keys" not in message["payload"]
+
+    asyncio.run(scenario())
+
+
+def test_enqueue_is_idempotent_per_lead():
+    async def scenario():
+        db = _db()
+        await db.leads.insert_one(with_notification_pending(_lead(1)))
+
+        first = await enqueue_lead_notification(db, _lead(1))
+        second = await enqueue_lead_notification(db, _lead(1))
+
+        assert first == second
+        assert await db.email_outbox.count_documents({}) == 1
+
+    asyncio.run(scenario())
+
+
+def test_sweep_queues_leads_whose_enqueue_failed(monkeypatch):
+    async def scenario():
+        db = _db()
+        # Request inserted the lead, then crashed before the outbox write
+        await db.leads.insert_one(with_notification_pending(_lead(1)))
+        await db.leads.insert_one(with_notification_pending(_lead(2)))
+        await enqueue_lead_notification(db, _lead(2))
+
+        # Still within the grace period: the request may be enqueueing right now
+        assert await sweep_pending_notifications(db) == 0
+
+        later = datetime.utcnow() + timedelta(seconds=email_outbox.OUTBOX_SWEEP_GRACE_SECONDS + 1)
+        assert await sweep_pending_notifications(db, now=later) == 1
+        assert await sweep_pending_notifications(db, now=later) == 0
+
+        messages = await db.email_outbox.find({}).to_list(10)
+        assert sorted(m["lead_id"] for m in messages) == ["lead-1", "lead-2"]
+        swept = next(m for m in messages if m["lead_id"] == "lead-1")
+        assert LEAD_NOTIFICATION_PENDING not in swept["payload"]
+        assert await db.leads.count_documents({LEAD_NOTIFICATION_PENDING: {"$exists": True}}) == 0
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,174 @@
+"""
+Email Service Tests
+SMTP session pool and digest mode against a local SMTP stand-in
+(plain SMTP + AUTH on 127.0.0.1, no TLS, no external server).
+"""
+
+import sys
+import socket
+import threading
+import socketserver
+from datetime import datetime
+from email import message_from_bytes
+from email.header import decode_header, make_header
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from email_service import EmailService  # noqa: E402
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP dialog: EHLO, AUTH PLAIN/LOGIN, MAIL, RCPT, DATA, NOOP, RSET, QUIT"""
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+            server.open_sockets.append(self.connection)
+        self._reply("220 localhost stand-in")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("ascii", "replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self.wfile.write(b"250-localhost\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+            elif verb == "AUTH":
+                if command.upper().startswith("AUTH LOGIN"):
+                    # Username and password prompts (base64 "Username:"/"Password:")
+                    if len(command.split()) < 3:
+                        self._reply("334 VXNlcm5hbWU6")
+                        self.rfile.readline()
+                    self._reply("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                self._reply("235 2.7.0 Authentication successful")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if data_line in (b".\r\n", b""):
+                        break
+                    data.append(data_line[1:] if data_line.startswith(b"..") else data_line)
+                with server.lock:
+                    server.messages.append(b"".join(data))
+                self._reply("250 2.0.0 Ok: queued")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                # MAIL, RCPT, NOOP, RSET, ...
+                self._reply("250 Ok")
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = []
+        self.open_sockets = []
+
+    def drop_connections(self) -> None:
+        """Server side hang-up, like an SMTP server closing idle sessions"""
+        with self.lock:
+            sockets, self.open_sockets = self.open_sockets, []
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+
+@pytest.fixture
+def smtp_server():
+    server = SMTPStandIn()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def email_service(smtp_server, monkeypatch):
+    monkeypatch.setenv("SMTP_HOST", "127.0.0.1")
+    monkeypatch.setenv("SMTP_PORT", str(smtp_server.server_address[1]))
+    monkeypatch.setenv("SMTP_USER", "test@example.com")
+    monkeypatch.setenv("SMTP_PASSWORD", "secret")
+    monkeypatch.setenv("SMTP_USE_TLS", "false")
+    monkeypatch.setenv("SMTP_POOL_SIZE", "1")
+    service = EmailService()
+    yield service
+    service.close()
+
+
+def _lead(number: int, plz: str = "20095") -> dict:
+    return {
+        "id": f"lead-{number}",
+        "created_at": datetime(2024, 5, 1, 12, number),
+        "plz": plz,
+        "objektart": "wohnung",
+        "leistungen": ["waende-decken"],
+        "groesse_typ": "raeume",
+        "anzahl_raeume": 3,
+        "raumhoehe": "normal",
+        "zustand": "gut",
+        "farbe": "weiss",
+        "spachtelstufe": "q2",
+        "name": f"Kunde {number}",
+        "telefon": "040 123456",
+        "email": f"kunde{number}@example.com",
+        "preis_min": 1000.0,
+        "preis_max": 1400.0,
+    }
+
+
+def _subject(raw: bytes) -> str:
+    return str(make_header(decode_header(message_from_bytes(raw)["Subject"])))
+
+
+def test_session_is_reused_across_sends(email_service, smtp_server):
+    for number in range(3):
+        assert email_service.send_lead_notification(_lead(number))
+
+    assert len(smtp_server.messages) == 3
+    assert smtp_server.connections == 1
+
+
+def test_reconnects_once_when_the_session_was_dropped(email_service, smtp_server):
+    assert email_service.send_lead_notification(_lead(1))
+    smtp_server.drop_connections()
+
+    # The pooled session is stale (still within the keepalive interval, so no NOOP check)
+    assert email_service.send_lead_notification(_lead(2))
+    assert len(smtp_server.messages) == 2
+    assert smtp_server.connections == 2
+
+
+def test_digest_is_sent_as_one_message(email_service, smtp_server):
+    leads = [_lead(1, "20095"), _lead(2, "22767"), _lead(3, "20095")]
+    assert email_service.send_lead_digest(leads)
+
+    assert len(smtp_server.messages) == 1
+    subject = _subject(smtp_server.messages[0])
+    assert "3 Leads" in subject
+    assert "20095, 22767" in subject
+    body = message_from_bytes(smtp_server.messages[0]).get_payload()[0].get_payload(decode=True).decode("utf-8")
+    for lead in leads:
+        assert lead["id"] in body
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
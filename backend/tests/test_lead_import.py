@@ -0,0 +1,59 @@
+"""
+Lead Import Tests
+Encoding handling of CSV uploads (mongomock_motor, no running MongoDB needed).
+"""
+
+import io
+import sys
+import asyncio
+from pathlib import Path
+
+from mongomock_motor import AsyncMongoMockClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lead_import import import_leads, FORMAT_CSV  # noqa: E402
+
+HEADER = "plz,objektart,leistungen,groesse_typ,raumhoehe,zustand,farbe,spachtelstufe,name,telefon,email,preis_min,preis_max,bemerkung\r\n"
+
+
+def _row(name: str, bemerkung: str) -> str:
+    return f'20095,wohnung,"waende-decken,spachteln",zimmer,normal,gut,weiss,q2,{name},040123,a@b.de,100,200,"{bemerkung}"\r\n'
+
+
+def _import(data: bytes) -> tuple:
+    async def scenario():
+        leads = AsyncMongoMockClient()["test_lead_import"].leads
+        result = await import_leads(leads, io.BytesIO(data), FORMAT_CSV)
+        docs = await leads.find({}, {"_id": 0, "name": 1, "bemerkung": 1}).to_list(None)
+        return result, docs
+    return asyncio.run(scenario())
+
+
+def test_windows_1252_csv_is_imported_completely():
+    # ASCII rows first, the first umlaut only after several batches would have been read
+    rows = [_row(f"Kunde {i}", "ohne") for i in range(2500)]
+    rows.append(_row("Jürgen Größe", "Außenwand, 5 € Rabatt"))
+    data = (HEADER + "".join(rows)).encode("cp1252")
+
+    result, docs = _import(data)
+    assert result["imported"] == 2501
+    assert result["failed"] == 0
+    assert {"name": "Jürgen Größe", "bemerkung": "Außenwand, 5 € Rabatt"} in docs
+
+
+def test_utf8_csv_with_bom():
+    data = (HEADER + _row("Jürgen", "Überstreichen")).encode("utf-8-sig")
+
+    result, docs = _import(data)
+    assert result["imported"] == 1
+    assert docs == [{"name": "Jürgen", "bemerkung": "Überstreichen"}]
+
+
+def test_broken_csv_row_is_reported_not_raised():
+    data = (HEADER + _row("Eins", "ok") + "20095,wohnung\x00kaputt\r\n" + _row("Zwei", "ok")).encode("utf-8")
+
+    result, docs = _import(data)
+    assert result["imported"] == 2
+    assert result["failed"] == 1
+    assert result["errors"][0]["row"] == 3
@@ -0,0 +1,100 @@
+"""
+Media Cache Tests
+On-demand resize cache: single render per variant, LRU by size and
+no eviction of files that were just handed to a response.
+Rendering is replaced by a fixed-size fake (no worker processes).
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import media_cache  # noqa: E402
+from media_cache import ResizeCache  # noqa: E402
+
+VARIANT_BYTES = 1000
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    for name in ("a.jpg", "b.jpg", "c.jpg"):
+        (uploads / name).write_bytes(b"original")
+    monkeypatch.setitem(media_cache.SOURCE_ROOTS, "uploads", uploads)
+
+    renders = []
+
+    async def fake_render(source_path, width, output_format):
+        renders.append((Path(source_path).name, width))
+        await asyncio.sleep(0.01)
+        return b"x" * VARIANT_BYTES
+
+    monkeypatch.setattr(media_cache.media_service, "render_resized", fake_render)
+    cache = ResizeCache(cache_dir=tmp_path / "cache", max_bytes=2 * VARIANT_BYTES)
+    cache.renders = renders
+    return cache
+
+
+def test_concurrent_requests_share_one_render(cache):
+    async def scenario():
+        return await asyncio.gather(*(cache.get("uploads/a.jpg", 400) for _ in range(10)))
+
+    paths = asyncio.run(scenario())
+    assert len(set(paths)) == 1
+    assert paths[0].read_bytes() == b"x" * VARIANT_BYTES
+    assert cache.renders == [("a.jpg", 400)]
+
+    # Later hits come from disk
+    assert asyncio.run(cache.get("uploads/a.jpg", 400)) == paths[0]
+    assert len(cache.renders) == 1
+
+
+def test_unknown_or_escaping_paths_are_rejected(cache):
+    async def scenario():
+        return [
+            await cache.get("uploads/missing.jpg", 400),
+            await cache.get("uploads/../../etc/passwd", 400),
+            await cache.get("other/a.jpg", 400),
+        ]
+
+    assert asyncio.run(scenario()) == [None, None, None]
+    assert cache.renders == []
+
+
+def test_least_recently_used_is_evicted(cache, monkeypatch):
+    # No grace period: plain LRU by size
+    monkeypatch.setattr(media_cache, "MEDIA_RESIZE_PIN_SECONDS", 0)
+
+    async def scenario():
+        a = await cache.get("uploads/a.jpg", 400)
+        b = await cache.get("uploads/b.jpg", 400)
+        await cache.get("uploads/a.jpg", 400)  # a is now more recent than b
+        c = await cache.get("uploads/c.jpg", 400)
+        return a, b, c
+
+    a, b, c = asyncio.run(scenario())
+    assert a.exists() and c.exists()
+    assert not b.exists()
+    assert cache.stats()["total_size_bytes"] == 2 * VARIANT_BYTES
+
+
+def test_served_files_are_not_evicted_by_a_concurrent_render(cache):
+    async def scenario():
+        served = await cache.get("uploads/a.jpg", 400)
+        # Renders finishing while `served` is still being sent
+        await asyncio.gather(cache.get("uploads/b.jpg", 400), cache.get("uploads/c.jpg", 400))
+        return served
+
+    served = asyncio.run(scenario())
+    assert served.exists()
+    # Over budget until the pins expire, then evicted again on the next insert
+    assert cache.stats()["total_size_bytes"] == 3 * VARIANT_BYTES
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,147 @@
+"""
+Media Service Tests
+Header sniffing, decompression bomb guard and reduced JPEG decoding
+before any upload reaches the worker pool.
+"""
+
+import io
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import media_service  # noqa: E402
+from media_service import sniff_image, decode_image, process_image  # noqa: E402
+from body_limit import BodySizeLimitMiddleware  # noqa: E402
+
+
+def _encode(image: Image.Image, fmt: str, **params) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **params)
+    return buffer.getvalue()
+
+
+def _mpo(size=(4000, 3000)) -> bytes:
+    """Multi-picture JPEG as written by many phone cameras"""
+    image = Image.new("RGB", size, (30, 90, 160))
+    return _encode(image, "MPO", save_all=True, append_images=[image])
+
+
+@pytest.mark.parametrize("fmt, mime_type", [
+    ("JPEG", "image/jpeg"),
+    ("PNG", "image/png"),
+    ("GIF", "image/gif"),
+    ("WEBP", "image/webp"),
+])
+def test_sniff_identifies_format_from_bytes(fmt, mime_type):
+    data = _encode(Image.new("RGB", (120, 80)), fmt)
+    assert sniff_image(data) == (mime_type, 120, 80)
+
+
+def test_multi_picture_jpeg_is_accepted():
+    data = _mpo()
+    assert Image.open(io.BytesIO(data)).format == "MPO"
+    assert sniff_image(data) == ("image/jpeg", 4000, 3000)
+
+    processed = process_image(data, ["JPEG", "WEBP"])
+    assert (processed["width"], processed["height"]) == (1600, 1200)
+    assert set(processed["outputs"]) == {"JPEG", "WEBP"}
+
+
+@pytest.mark.parametrize("data", [
+    b"<html>kein Bild</html>",
+    b"%PDF-1.7\n" + b"0" * 100,
+    b"",
+])
+def test_non_images_are_rejected(data):
+    with pytest.raises(ValueError, match="Ungültiges Bildformat"):
+        sniff_image(data)
+
+
+def test_truncated_header_is_rejected():
+    data = _encode(Image.new("RGB", (120, 80)), "PNG")
+    with pytest.raises(ValueError, match="beschädigt"):
+        sniff_image(data[:20])
+
+
+def test_pixel_cap_rejects_before_decoding(monkeypatch):
+    monkeypatch.setattr(media_service, "MEDIA_MAX_IMAGE_PIXELS", 1_000_000)
+    # 2000x2000 1-bit PNG: a few KB on disk, 4 MP when decoded
+    data = _encode(Image.new("1", (2000, 2000)), "PNG")
+    assert len(data) < 10_000
+
+    with pytest.raises(ValueError, match="Bild zu groß"):
+        sniff_image(data)
+    # The worker path checks as well (on-demand resizes of stored files)
+    with pytest.raises(ValueError, match="Bild zu groß"):
+        decode_image(data)
+
+
+def test_pillow_bomb_limit_is_reported_as_too_large():
+    # Above Pillow's own hard limit (2x MAX_IMAGE_PIXELS): Image.open itself refuses
+    side = int((2 * Image.MAX_IMAGE_PIXELS) ** 0.5) + 100
+    data = _encode(Image.new("1", (side, side)), "PNG")
+    with pytest.raises(ValueError, match="Bild zu groß"):
+        sniff_image(data)
+
+
+@pytest.mark.parametrize("make, expected", [
+    # 4000x3000 into 1600x1200: DCT scale 1/2 is still above the target
+    (lambda: _encode(Image.new("RGB", (4000, 3000)), "JPEG"), (2000, 1500)),
+    (_mpo, (2000, 1500)),
+    # Less than 2x larger than the target: full decode
+    (lambda: _encode(Image.new("RGB", (2400, 1800)), "JPEG"), (2400, 1800)),
+    # No draft mode for other formats
+    (lambda: _encode(Image.new("RGB", (4000, 3000)), "PNG"), (4000, 3000)),
+])
+def test_large_jpegs_decode_at_reduced_scale(make, expected):
+    assert decode_image(make()).size == expected
+
+
+def test_reduced_decode_never_goes_below_the_target():
+    data = _encode(Image.new("RGB", (6000, 4000)), "JPEG")
+    image = decode_image(data, max_width=400, max_height=10_000)
+    assert image.width >= 400
+    assert image.width < 6000
+
+
+def _upload_app(limit: int) -> TestClient:
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    app.add_middleware(BodySizeLimitMiddleware, limits={("POST", "/upload"): limit})
+    return TestClient(app)
+
+
+def test_body_limit_rejects_announced_size():
+    client = _upload_app(limit=10_000)
+    assert client.post("/upload", files={"file": ("a.jpg", b"x" * 5_000)}).json() == {"size": 5_000}
+
+    response = client.post("/upload", files={"file": ("a.jpg", b"x" * 20_000)})
+    assert response.status_code == 413
+
+
+def test_body_limit_stops_streamed_body():
+    client = _upload_app(limit=10_000)
+
+    def body():
+        yield b'--xx\r\nContent-Disposition: form-data; name="file"; filename="a.jpg"\r\n\r\n'
+        for _ in range(10):
+            yield b"x" * 4_000
+        yield b"\r\n--xx--\r\n"
+
+    # Generator body: no Content-Length, counted while streaming
+    response = client.post("/upload", content=body(), headers={"Content-Type": "multipart/form-data; boundary=xx"})
+    assert response.status_code == 413
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
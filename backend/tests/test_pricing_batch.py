@@ -0,0 +1,107 @@
+"""
+Batch Pricing Tests
+BatchPricingCalculator must return exactly what PricingCalculator.calculate_price
+returns, over randomized requests and configs (fixed seeds, reproducible).
+"""
+
+import sys
+import random
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pricing_models import PricingConfig, PriceCalculationRequest  # noqa: E402
+from pricing_calculator import PricingCalculator  # noqa: E402
+from pricing_batch import BatchPricingCalculator, round2  # noqa: E402
+
+LEISTUNGEN = ["waende-decken", "lackierung", "tapezieren", "schimmel", "boden", "epoxid", "spachteln", "sonstiges"]
+# Unknown values must be ignored the same way by both paths
+GROESSE_TYPEN = ["raeume", "flaeche", "unbekannt"]
+RAUMHOEHEN = ["niedrig", "normal", "hoch", "sehr-hoch", "riesig"]
+FARBEN = ["weiss", "bunt", "farbig", "grau"]
+SPACHTELSTUFEN = ["keine", "q2", "q3", "q4", "q9"]
+ZUSTAENDE = [None, "normal", "altbau", "renovierung", "ruine"]
+
+
+def _area(rng: random.Random):
+    """None, whole and x.xx5 values (rounding ties after scaling) and plain random ones"""
+    choice = rng.random()
+    if choice < 0.15:
+        return None
+    if choice < 0.4:
+        return rng.randint(0, 400) + rng.choice([0.005, 0.125, 0.375, 0.5, 0.625, 0.875])
+    if choice < 0.55:
+        return float(rng.randint(0, 400))
+    return round(rng.uniform(0, 800), rng.randint(0, 4))
+
+
+def _random_request(rng: random.Random) -> PriceCalculationRequest:
+    return PriceCalculationRequest(
+        plz="20095",
+        objektart="wohnung",
+        leistungen=rng.sample(LEISTUNGEN, rng.randint(0, 5)),
+        groesse_typ=rng.choice(GROESSE_TYPEN),
+        anzahl_raeume=rng.choice([None, rng.randint(0, 20)]),
+        wandflaeche_qm=_area(rng),
+        boden_flaeche_qm=_area(rng),
+        epoxid_flaeche_qm=_area(rng),
+        raumhoehe=rng.choice(RAUMHOEHEN),
+        zustand=rng.choice(ZUSTAENDE),
+        farbe=rng.choice(FARBEN),
+        spachtelstufe=rng.choice(SPACHTELSTUFEN),
+    )
+
+
+def _random_config(rng: random.Random) -> PricingConfig:
+    return PricingConfig(
+        wand_weiss=round(rng.uniform(5, 15), 2),
+        decke_weiss=round(rng.uniform(5, 15), 2),
+        aufschlag_bunt=round(rng.uniform(0, 5), 2),
+        spachtel_q2=round(rng.uniform(3, 10), 2),
+        spachtel_q3=round(rng.uniform(8, 18), 2),
+        spachtel_q4=round(rng.uniform(15, 30), 2),
+        zuschlag_altbau=round(rng.uniform(0, 0.3), 3),
+        zuschlag_raumhoehe_hoch=round(rng.uniform(0, 0.3), 3),
+        mindestauftrag=rng.choice([0.0, 300.0, 1500.0]),
+        interne_pauschale=round(rng.uniform(0, 100), 2),
+        spanne_min_faktor=round(rng.uniform(0.8, 1.0), 3),
+        spanne_max_faktor=round(rng.uniform(1.0, 1.3), 3),
+    )
+
+
+def _scalar(calculator: PricingCalculator, request: PriceCalculationRequest):
+    """Scalar result, None where the area is missing (the batch marks those rows invalid)"""
+    try:
+        return calculator.calculate_price(request)
+    except TypeError:
+        return None
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_matches_scalar_on_random_requests(seed):
+    rng = random.Random(seed)
+    config = PricingConfig() if seed == 0 else _random_config(rng)
+    requests = [_random_request(rng) for _ in range(2000)]
+
+    batch = BatchPricingCalculator(config).calculate_prices(requests)
+    scalar = PricingCalculator(config)
+
+    assert len(batch) == len(requests)
+    assert any(result is None for result in batch)
+    for request, result in zip(requests, batch):
+        assert result == _scalar(scalar, request), request
+
+
+def test_round2_matches_round_on_ties():
+    rng = random.Random(7)
+    values = [rng.randint(-10**6, 10**6) / 1000 for _ in range(20000)]
+    values += [i + 0.005 for i in range(1000)] + [i + 0.125 for i in range(1000)] + [0.0, -0.0, 1e-12]
+
+    assert round2(np.array(values)) == [round(value, 2) for value in values]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,111 @@
+"""
+Pricing Config Versioning Tests
+Migration of the pre-versioning single document, updates and rollback
+(mongomock_motor, no running MongoDB needed).
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pricing_models import PricingConfig  # noqa: E402
+from pricing_calculator import (  # noqa: E402
+    get_pricing_config,
+    get_active_pricing_version,
+    update_pricing_config,
+    rollback_pricing_config,
+    list_pricing_config_versions,
+    pricing_config_cache,
+)
+
+
+def _db():
+    return AsyncMongoMockClient()["test_pricing_config"]
+
+
+def _baseline_doc(**overrides) -> dict:
+    """Document as written before versioning: config fields, no version"""
+    doc = PricingConfig(**overrides).model_dump()
+    doc.pop("version")
+    return doc
+
+
+def run(coro):
+    pricing_config_cache.invalidate()
+    return asyncio.run(coro)
+
+
+def test_fresh_database_bootstraps_version_zero():
+    async def scenario():
+        db = _db()
+        config = await get_pricing_config(db)
+        assert config.version == 0
+        assert config == PricingConfig()
+        assert await get_active_pricing_version(db) == 0
+        assert await db.pricing_config_versions.count_documents({}) == 1
+
+    run(scenario())
+
+
+def test_baseline_document_is_migrated():
+    async def scenario():
+        db = _db()
+        await db.pricing_config.insert_one(_baseline_doc(wand_weiss=9.99))
+
+        config = await get_pricing_config(db)
+        assert config.version == 0
+        assert config.wand_weiss == 9.99
+
+        # Pointer now only holds the version, the fields live in version 0
+        pointer = await db.pricing_config.find_one({"id": "pricing_config"}, {"_id": 0})
+        assert pointer["version"] == 0
+        assert "wand_weiss" not in pointer
+        assert (await get_pricing_config(db)).wand_weiss == 9.99
+        assert await db.pricing_config_versions.count_documents({}) == 1
+
+    run(scenario())
+
+
+def test_update_and_rollback_after_migration():
+    async def scenario():
+        db = _db()
+        await db.pricing_config.insert_one(_baseline_doc(wand_weiss=9.99))
+
+        updated = await update_pricing_config(db, {"wand_weiss": 11.0})
+        assert updated.version == 1
+        assert (await get_pricing_config(db)).wand_weiss == 11.0
+
+        restored = await rollback_pricing_config(db, 0)
+        assert restored.version == 0
+        assert (await get_pricing_config(db)).wand_weiss == 9.99
+
+        listing = await list_pricing_config_versions(db)
+        assert listing["active_version"] == 0
+        assert [v["version"] for v in listing["versions"]] == [1, 0]
+
+        assert await rollback_pricing_config(db, 42) is None
+
+    run(scenario())
+
+
+def test_versioned_single_document_keeps_its_version():
+    """Single document from before the version collection, with a version counter"""
+    async def scenario():
+        db = _db()
+        await db.pricing_config.insert_one({**_baseline_doc(decke_weiss=7.5), "version": 3})
+
+        config = await get_pricing_config(db)
+        assert config.version == 3
+        assert config.decke_weiss == 7.5
+        assert (await update_pricing_config(db, {"decke_weiss": 8.0})).version == 4
+
+    run(scenario())
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
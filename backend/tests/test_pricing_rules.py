@@ -0,0 +1,119 @@
+"""
+Pricing Rules Conformance Tests
+Backend side of the conformance check between PricingCalculator and the
+rules bundle evaluated in the browser (frontend/src/lib/pricingRules.js).
+The same fixture is checked by frontend/src/lib/pricingRules.test.js.
+
+Regenerate the fixture and the frontend default bundle after changing
+the default config or the formulas:
+    python tests/test_pricing_rules.py
+"""
+
+import sys
+import json
+import itertools
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+from pricing_models import PricingConfig, PriceCalculationRequest  # noqa: E402
+from pricing_calculator import PricingCalculator  # noqa: E402
+from pricing_rules import serialize_rules_bundle  # noqa: E402
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "pricing_conformance.json"
+FRONTEND_DEFAULT_RULES_PATH = BACKEND_DIR.parent / "frontend" / "src" / "lib" / "pricingRules.default.json"
+
+
+def _conformance_requests():
+    """Deterministic spread over all rules, including x.xx5 rounding ties"""
+    leistungen_sets = [
+        ["waende-decken"],
+        ["waende-decken", "spachteln"],
+        ["lackierung", "tapezieren"],
+        ["schimmel"],
+        ["boden"],
+        ["epoxid", "boden"],
+        ["waende-decken", "lackierung", "tapezieren", "schimmel", "boden", "epoxid"],
+    ]
+    groessen = [
+        {"groesse_typ": "raeume", "anzahl_raeume": 1},
+        {"groesse_typ": "raeume", "anzahl_raeume": 7},
+        {"groesse_typ": "flaeche", "wandflaeche_qm": 12.125},
+        {"groesse_typ": "flaeche", "wandflaeche_qm": 333.3},
+    ]
+    varianten = [
+        {"farbe": "weiss", "spachtelstufe": "keine", "zustand": "normal", "raumhoehe": "normal"},
+        {"farbe": "bunt", "spachtelstufe": "q2", "zustand": "altbau", "raumhoehe": "hoch"},
+        {"farbe": "farbig", "spachtelstufe": "q4", "zustand": "renovierung", "raumhoehe": "sehr-hoch"},
+    ]
+    flaechen = [
+        {},
+        {"boden_flaeche_qm": 41.375, "epoxid_flaeche_qm": 17.5},
+    ]
+
+    for leistungen, groesse, variante, boden in itertools.product(leistungen_sets, groessen, varianten, flaechen):
+        yield {
+            "plz": "20095",
+            "objektart": "wohnung",
+            "leistungen": leistungen,
+            **groesse,
+            **variante,
+            **boden,
+        }
+
+
+def build_fixture() -> dict:
+    config = PricingConfig()
+    calculator = PricingCalculator(config)
+    _, bundle = serialize_rules_bundle(config)
+    return {
+        "rules": json.loads(bundle),
+        "cases": [
+            {"request": request, "expected": calculator.calculate_price(PriceCalculationRequest(**request))}
+            for request in _conformance_requests()
+        ],
+    }
+
+
+@pytest.fixture(scope="module")
+def fixture():
+    with open(FIXTURE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class TestPricingRulesConformance:
+    """Fixture must reflect the current backend formulas and defaults"""
+
+    def test_fixture_rules_match_default_bundle(self, fixture):
+        _, bundle = serialize_rules_bundle(PricingConfig())
+        assert fixture["rules"] == json.loads(bundle), "Run: python tests/test_pricing_rules.py"
+
+    def test_fixture_results_match_calculator(self, fixture):
+        calculator = PricingCalculator(PricingConfig())
+        for case in fixture["cases"]:
+            result = calculator.calculate_price(PriceCalculationRequest(**case["request"]))
+            assert result == case["expected"], case["request"]
+
+    def test_fixture_covers_all_requests(self, fixture):
+        assert len(fixture["cases"]) == len(list(_conformance_requests()))
+
+    def test_frontend_default_rules_are_current(self, fixture):
+        with open(FRONTEND_DEFAULT_RULES_PATH, encoding="utf-8") as f:
+            assert json.load(f) == fixture["rules"], "Run: python tests/test_pricing_rules.py"
+
+
+if __name__ == "__main__":
+    data = build_fixture()
+    FIXTURE_PATH.parent.mkdir(exist_ok=True)
+    with open(FIXTURE_PATH, "w", encoding="utf-8") as f:
+        # One case per line keeps diffs readable
+        f.write('{"rules": ' + json.dumps(data["rules"], sort_keys=True) + ',\n "cases": [\n')
+        f.write(",\n".join("  " + json.dumps(case, sort_keys=True) for case in data["cases"]))
+        f.write("\n]}\n")
+    with open(FRONTEND_DEFAULT_RULES_PATH, "w", encoding="utf-8") as f:
+        json.dump(data["rules"], f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"{len(data['cases'])} cases written to {FIXTURE_PATH}")
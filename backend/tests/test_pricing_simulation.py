@@ -0,0 +1,70 @@
+"""
+Pricing Simulation Tests
+Boden/Epoxid leads are re-priced with their stored area; older leads
+without it are reported as not simulable (mongomock_motor).
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pricing_models import PricingConfig  # noqa: E402
+from pricing_simulation import simulate_repricing  # noqa: E402
+
+
+def _lead(number: int, leistungen, **fields) -> dict:
+    return {
+        "id": f"lead-{number}",
+        "groesse_typ": "raeume",
+        "anzahl_raeume": 3,
+        "leistungen": leistungen,
+        "farbe": "weiss",
+        "spachtelstufe": "keine",
+        "zustand": "normal",
+        "raumhoehe": "normal",
+        **fields,
+    }
+
+
+def _simulate(leads) -> dict:
+    async def scenario():
+        collection = AsyncMongoMockClient()["test_pricing_simulation"].leads
+        await collection.insert_many(leads)
+        return await simulate_repricing(collection, PricingConfig(), PricingConfig(), {})
+
+    return asyncio.run(scenario())
+
+
+def test_leads_without_stored_floor_area_are_not_simulable():
+    result = _simulate([
+        _lead(1, ["waende-decken"]),
+        _lead(2, ["waende-decken", "boden"], boden_flaeche_qm=40.0),
+        _lead(3, ["waende-decken", "boden"]),
+        _lead(4, ["epoxid"]),
+    ])
+
+    assert result["leads"] == 2
+    assert result["skipped"] == 0
+    assert result["nicht_simulierbar"]["leads"] == 2
+    assert result["nicht_simulierbar"]["pro_leistung"] == {"boden": 1, "epoxid": 1}
+    assert result["nicht_simulierbar"]["hinweis"]
+    # Only the lead with a stored area counts for "boden"
+    assert result["pro_leistung"]["boden"]["leads"] == 1
+    assert "epoxid" not in result["pro_leistung"]
+
+
+def test_stored_floor_area_is_priced():
+    with_area = _simulate([_lead(1, ["waende-decken", "boden"], boden_flaeche_qm=40.0)])
+    without_service = _simulate([_lead(1, ["waende-decken"])])
+
+    assert with_area["nicht_simulierbar"] == {"leads": 0, "pro_leistung": {"boden": 0, "epoxid": 0}, "hinweis": None}
+    assert with_area["umsatz_aktuell"] > without_service["umsatz_aktuell"]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,109 @@
+"""
+Rate Limiting Tests
+Token bucket refill, Retry-After, LRU cap, X-Forwarded-For trust and the
+429 answer of the middleware (small FastAPI app, no server needed).
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from rate_limit import TokenBucketLimiter, RateLimitMiddleware, client_ip  # noqa: E402
+
+
+def test_bucket_allows_burst_then_refills():
+    limiter = TokenBucketLimiter(rate=0.5, burst=2)
+    assert limiter.acquire("a", now=0.0) == 0
+    assert limiter.acquire("a", now=0.0) == 0
+    # Empty: one token takes 1 / rate seconds
+    assert limiter.acquire("a", now=0.0) == pytest.approx(2.0)
+    assert limiter.acquire("a", now=1.0) == pytest.approx(1.0)
+    assert limiter.acquire("a", now=2.0) == 0
+    # Refill never exceeds the burst
+    assert limiter.acquire("a", now=100.0) == 0
+    assert limiter.acquire("a", now=100.0) == 0
+    assert limiter.acquire("a", now=100.0) > 0
+
+
+def test_buckets_are_per_key():
+    limiter = TokenBucketLimiter(rate=1.0, burst=1)
+    assert limiter.acquire("a", now=0.0) == 0
+    assert limiter.acquire("a", now=0.0) > 0
+    assert limiter.acquire("b", now=0.0) == 0
+
+
+def test_least_recently_used_client_is_evicted():
+    limiter = TokenBucketLimiter(rate=0.001, burst=1, max_clients=2)
+    limiter.acquire("a", now=0.0)
+    limiter.acquire("b", now=0.0)
+    limiter.acquire("a", now=0.0)  # "a" used again, "b" is now the oldest
+    limiter.acquire("c", now=0.0)
+
+    assert len(limiter) == 2
+    # "a" is still limited, "b" was evicted and starts with a full bucket
+    assert limiter.acquire("a", now=0.0) > 0
+    assert limiter.acquire("b", now=0.0) == 0
+
+
+@pytest.mark.parametrize("forwarded_for, hops, expected", [
+    ("203.0.113.7", 1, "203.0.113.7"),
+    # Forged entry on the left is ignored
+    ("1.2.3.4, 203.0.113.7", 1, "203.0.113.7"),
+    ("1.2.3.4, 203.0.113.7, 10.0.0.2", 2, "203.0.113.7"),
+    # Fewer entries than proxies: the leftmost one was written by a trusted proxy
+    ("203.0.113.7", 2, "203.0.113.7"),
+    # Header not trusted at all
+    ("1.2.3.4", 0, "10.0.0.1"),
+    ("", 1, "10.0.0.1"),
+    (None, 1, "10.0.0.1"),
+])
+def test_client_ip_counts_trusted_hops_from_the_right(forwarded_for, hops, expected):
+    assert client_ip("10.0.0.1", forwarded_for, hops) == expected
+
+
+def _app(limiter: TokenBucketLimiter) -> TestClient:
+    app = FastAPI()
+
+    @app.post("/api/leads")
+    async def create():
+        return {"ok": True}
+
+    @app.get("/api/other")
+    async def other():
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware, limits={("POST", "/api/leads"): limiter}, enabled=True, trusted_hops=1)
+    return TestClient(app)
+
+
+def test_middleware_answers_429_with_retry_after():
+    client = _app(TokenBucketLimiter(rate=0.1, burst=2))
+    headers = {"X-Forwarded-For": "203.0.113.7"}
+
+    assert client.post("/api/leads", headers=headers).status_code == 200
+    assert client.post("/api/leads", headers=headers).status_code == 200
+    response = client.post("/api/leads", headers=headers)
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["retry-after"]) <= 10
+    assert "detail" in response.json()
+
+    # Other clients and unlimited routes are not affected
+    assert client.post("/api/leads", headers={"X-Forwarded-For": "198.51.100.1"}).status_code == 200
+    assert client.get("/api/other", headers=headers).status_code == 200
+
+
+def test_middleware_ignores_forged_forwarded_for():
+    client = _app(TokenBucketLimiter(rate=0.1, burst=1))
+
+    assert client.post("/api/leads", headers={"X-Forwarded-For": "1.1.1.1, 203.0.113.7"}).status_code == 200
+    # A new fake entry on the left does not give the client a fresh bucket
+    assert client.post("/api/leads", headers={"X-Forwarded-For": "2.2.2.2, 203.0.113.7"}).status_code == 429
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
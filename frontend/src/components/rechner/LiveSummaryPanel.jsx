@@ -8,6 +8,7 @@ import { Euro, Check, AlertCircle, Paintbrush, Layers, Grid3X3, AlertTriangle }
 import { Card, CardContent, CardHeader, CardTitle } from '../../components/ui/card';
 import { AnimatedPrice } from './SharedComponents';
 import { computeEstimate, calculateWandflaeche, analyzeLeistungen, PRICES } from '../../lib/pricingEngine';
+import { usePricingRules } from '../../hooks/usePricingRules';
 
 const LEISTUNG_ICONS = {
   'waende-decken': Paintbrush,
@@ -36,7 +37,8 @@ const OBJEKTART_LABELS = {
 };
 
 const LiveSummaryPanel = ({ formData, currentStep }) => {
-  const estimate = computeEstimate(formData);
+  const pricingRules = usePricingRules();
+  const estimate = computeEstimate(formData, pricingRules);
   const analysis = analyzeLeistungen(formData.leistungen || []);
   const wandFlaeche = calculateWandflaeche(formData);
   const isAltbau = formData.zustand === 'altbau';
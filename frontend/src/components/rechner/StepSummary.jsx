@@ -6,6 +6,7 @@ import React from 'react';
 import { Check, MapPin, Home, Paintbrush, Calendar, Euro } from 'lucide-react';
 import { StepHeader, AnimatedPrice } from './SharedComponents';
 import { computeEstimate, analyzeLeistungen, PRICES } from '../../lib/pricingEngine';
+import { usePricingRules } from '../../hooks/usePricingRules';
 
 const OBJEKTART_LABELS = {
   wohnung: 'Wohnung',
@@ -24,7 +25,8 @@ const LEISTUNG_LABELS = {
 };
 
 const StepSummary = ({ formData }) => {
-  const estimate = computeEstimate(formData);
+  const pricingRules = usePricingRules();
+  const estimate = computeEstimate(formData, pricingRules);
   const analysis = analyzeLeistungen(formData.leistungen);
 
   const formatWandflaeche = () => {
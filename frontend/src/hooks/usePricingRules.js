@@ -0,0 +1,29 @@
+import { useEffect, useState } from 'react';
+import DEFAULT_PRICING_RULES from '../lib/pricingRules.default.json';
+import { getStoredPricingRules, loadPricingRules } from '../lib/pricingRules';
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL || '';
+
+/**
+ * usePricingRules Hook
+ * Returns the pricing rules bundle for client-side pricing:
+ * last stored copy (or the bundled defaults) right away,
+ * then the current version from the backend.
+ */
+export const usePricingRules = () => {
+  const [rules, setRules] = useState(() => getStoredPricingRules() || DEFAULT_PRICING_RULES);
+
+  useEffect(() => {
+    let active = true;
+    loadPricingRules(BACKEND_URL).then((loaded) => {
+      if (active && loaded) {
+        setRules((current) => (current.hash === loaded.hash ? current : loaded));
+      }
+    });
+    return () => {
+      active = false;
+    };
+  }, []);
+
+  return rules;
+};
@@ -0,0 +1,23 @@
+/**
+ * Image Variants
+ * srcset helpers for the variant manifest of uploaded images
+ * (image_variants of /api/references: { url, format, width, height }).
+ */
+
+export const isWebp = (variant) => variant.format === 'webp';
+
+export const isFallback = (variant) => variant.format !== 'webp';
+
+/**
+ * "url 400w, url 800w, ..." for the variants matching `predicate`,
+ * undefined if there are none (so the attribute is omitted)
+ */
+export function buildSrcSet(variants, predicate = () => true) {
+  const entries = (variants || [])
+    .filter(predicate)
+    .sort((a, b) => a.width - b.width);
+  if (entries.length === 0) {
+    return undefined;
+  }
+  return entries.map((variant) => `${variant.url} ${variant.width}w`).join(', ');
+}
@@ -2,8 +2,15 @@
  * Pricing Engine for Ocean Color Calculator
  * Pure functions for price calculation - no UI dependencies
  * All prices are NET (excluding VAT)
+ *
+ * With a rules bundle from the backend (see pricingRules.js) the estimate
+ * is computed exactly like /api/calculate-price. The PRICES table below is
+ * only used for selections the backend rules cannot price (no wall area,
+ * e.g. Lackierung-only or Boden-only requests).
  */
 
+import { calculatePrice, toPriceRequest } from './pricingRules.js';
+
 // Price constants
 export const PRICES = {
   // Wände & Decken
@@ -231,13 +238,27 @@ export function calculateBreakdown(formData) {
 /**
  * Main pricing function - computes estimate from form state
  * @param {Object} formData - Complete form state
+ * @param {Object} [rules] - Pricing rules bundle from the backend
  * @returns {Object|null} - { min, max, breakdown } or null if no services
  */
-export function computeEstimate(formData) {
+export function computeEstimate(formData, rules = null) {
   if (!formData.leistungen || formData.leistungen.length === 0) {
     return null;
   }
 
+  if (rules) {
+    const result = calculatePrice(rules, toPriceRequest(formData));
+    if (result) {
+      // Whole euros for display; cents as in the backend result are in breakdown
+      return {
+        min: Math.round(result.preis_min),
+        max: Math.round(result.preis_max),
+        breakdown: result.berechnungsdetails,
+        subtotal: Math.round(result.berechnungsdetails.basispreis_final)
+      };
+    }
+  }
+
   const breakdown = calculateBreakdown(formData);
   const isAltbau = formData.zustand === 'altbau';
 
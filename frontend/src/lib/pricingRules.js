@@ -0,0 +1,178 @@
+/**
+ * Pricing Rules Engine
+ * Evaluates the versioned rules bundle published by the backend
+ * (GET /api/pricing/rules) with the same arithmetic as
+ * backend/pricing_calculator.py, so prices match the API exactly.
+ * Pure functions plus a small cached loader - no UI dependencies.
+ */
+
+export const SUPPORTED_RULES_SCHEMA = 1;
+
+const STORAGE_KEY = 'oceancolor.pricingRules';
+
+const lookup = (table, key) =>
+  (table && Object.prototype.hasOwnProperty.call(table, key) ? table[key] : undefined);
+
+/**
+ * Round to 2 decimals like Python's round(x, 2).
+ * toFixed works on the exact binary value; only exact ties
+ * (x.xx5 - possible for multiples of 1/8) round half-even in Python.
+ */
+export function roundPrice(value) {
+  const eighths = value * 8;
+  if (Number.isInteger(eighths) && eighths % 2 !== 0) {
+    const lower = Math.floor(value * 100);
+    return (lower % 2 === 0 ? lower : lower + 1) / 100;
+  }
+  return Number(value.toFixed(2));
+}
+
+/**
+ * Map calculator form state to the backend request fields
+ * (same mapping as POST /api/leads uses for the stored lead)
+ */
+export function toPriceRequest(formData) {
+  return {
+    groesse_typ: formData.groesseOption || 'raeume',
+    anzahl_raeume: formData.anzahlRaeume ? parseInt(formData.anzahlRaeume) : null,
+    wandflaeche_qm: formData.wandflaeche ? parseFloat(formData.wandflaeche) : null,
+    boden_flaeche_qm: formData.bodenFlaeche ? parseFloat(formData.bodenFlaeche) : null,
+    epoxid_flaeche_qm: formData.epoxidFlaeche ? parseFloat(formData.epoxidFlaeche) : null,
+    leistungen: formData.leistungen || [],
+    farbe: formData.farbe || 'weiss',
+    spachtelstufe: formData.spachtelstufe || 'keine',
+    zustand: formData.zustand || 'normal',
+    raumhoehe: formData.raumhoehe || 'normal'
+  };
+}
+
+/**
+ * Price a request with a rules bundle
+ * @returns {Object|null} - same shape as the /api/calculate-price result
+ *   ({ preis_min, preis_max, berechnungsdetails }), null without an area
+ */
+export function calculatePrice(rules, request) {
+  const isRaeume = request.groesse_typ === 'raeume';
+  const menge = isRaeume ? request.anzahl_raeume : request.wandflaeche_qm;
+  if (menge === null || menge === undefined || Number.isNaN(menge)) {
+    return null;
+  }
+  const leistungen = request.leistungen || [];
+  const farbe = request.farbe;
+
+  // 1. Fläche
+  const flaeche = isRaeume ? menge * rules.flaeche.qm_pro_raum : menge;
+
+  // 2. Arbeitskosten
+  let arbeitskosten = 0.0;
+  const wd = rules.waende_decken;
+  if (leistungen.includes(wd.leistung)) {
+    const aufschlag = lookup(wd.farbaufschlag, farbe);
+    const preisWand = aufschlag !== undefined ? wd.preis_wand + aufschlag : wd.preis_wand;
+    const preisDecke = aufschlag !== undefined ? wd.preis_decke + aufschlag : wd.preis_decke;
+    arbeitskosten += (flaeche * wd.wand_anteil * preisWand) + (flaeche * wd.decke_anteil * preisDecke);
+  }
+  for (const { leistung, preis_qm } of rules.flaechen_pauschalen) {
+    if (leistungen.includes(leistung)) {
+      arbeitskosten += flaeche * preis_qm;
+    }
+  }
+  for (const { leistung, preis } of rules.pauschalen) {
+    if (leistungen.includes(leistung)) {
+      arbeitskosten += preis;
+    }
+  }
+  for (const boden of rules.bodenflaechen) {
+    if (leistungen.includes(boden.leistung)) {
+      const bodenFlaeche = request[boden.flaeche] || 0;
+      arbeitskosten += bodenFlaeche * boden.preis_qm;
+      const aufschlag = lookup(boden.farbaufschlag, farbe);
+      if (aufschlag !== undefined) {
+        arbeitskosten += bodenFlaeche * aufschlag;
+      }
+    }
+  }
+
+  // 3. Spachtelkosten
+  const spachtelRate = lookup(rules.spachtel, request.spachtelstufe);
+  const spachtelkosten = spachtelRate !== undefined ? flaeche * spachtelRate : 0.0;
+
+  // 4. Aufschläge
+  let aufschlaege = 0.0;
+  const zustandFaktor = lookup(rules.aufschlaege.zustand, request.zustand);
+  if (zustandFaktor !== undefined) {
+    aufschlaege += arbeitskosten * zustandFaktor;
+  }
+  const raumhoeheFaktor = lookup(rules.aufschlaege.raumhoehe, request.raumhoehe);
+  if (raumhoeheFaktor !== undefined) {
+    aufschlaege += arbeitskosten * raumhoeheFaktor;
+  }
+
+  // 5.-7. Summe, interne Pauschale, Mindestauftrag
+  let basispreis = arbeitskosten + spachtelkosten + aufschlaege;
+  basispreis += rules.interne_pauschale;
+  if (basispreis < rules.mindestauftrag) {
+    basispreis = rules.mindestauftrag;
+  }
+
+  // 8. Preisspanne
+  return {
+    preis_min: roundPrice(basispreis * rules.spanne.min_faktor),
+    preis_max: roundPrice(basispreis * rules.spanne.max_faktor),
+    berechnungsdetails: {
+      flaeche_qm: roundPrice(flaeche),
+      arbeitskosten: roundPrice(arbeitskosten),
+      spachtelkosten: roundPrice(spachtelkosten),
+      aufschlaege: roundPrice(aufschlaege),
+      interne_pauschale: rules.interne_pauschale,
+      basispreis_vor_mindest: roundPrice(arbeitskosten + spachtelkosten + aufschlaege + rules.interne_pauschale),
+      basispreis_final: roundPrice(basispreis),
+      mindestauftrag_angewendet: basispreis === rules.mindestauftrag
+    }
+  };
+}
+
+export function isSupportedRules(rules) {
+  return Boolean(rules && rules.schema === SUPPORTED_RULES_SCHEMA && rules.hash);
+}
+
+/**
+ * Last known bundle from localStorage (works offline)
+ */
+export function getStoredPricingRules() {
+  try {
+    const rules = JSON.parse(window.localStorage.getItem(STORAGE_KEY));
+    return isSupportedRules(rules) ? rules : null;
+  } catch (e) {
+    return null;
+  }
+}
+
+let pendingLoad = null;
+
+/**
+ * Fetch the current bundle (revalidated by the browser cache via ETag).
+ * Falls back to the last stored copy when offline.
+ */
+export function loadPricingRules(backendUrl = '') {
+  if (!pendingLoad) {
+    pendingLoad = fetch(`${backendUrl}/api/pricing/rules`)
+      .then((response) => (response.ok ? response.json() : null))
+      .then((rules) => {
+        if (!isSupportedRules(rules)) {
+          return getStoredPricingRules();
+        }
+        try {
+          window.localStorage.setItem(STORAGE_KEY, JSON.stringify(rules));
+        } catch (e) {
+          // Storage full or disabled - keep using the in-memory copy
+        }
+        return rules;
+      })
+      .catch(() => getStoredPricingRules())
+      .finally(() => {
+        pendingLoad = null;
+      });
+  }
+  return pendingLoad;
+}
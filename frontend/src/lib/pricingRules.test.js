@@ -0,0 +1,73 @@
+/**
+ * Pricing Rules Conformance Test
+ * Run: node src/lib/pricingRules.test.js
+ *
+ * Prices every case of backend/tests/fixtures/pricing_conformance.json with
+ * the rules engine and expects exactly the PricingCalculator results.
+ * The backend side (backend/tests/test_pricing_rules.py) checks that the
+ * fixture matches the current backend formulas.
+ */
+
+import { readFileSync } from 'fs';
+import { calculatePrice, roundPrice } from './pricingRules.js';
+
+const readJson = (path) => JSON.parse(readFileSync(new URL(path, import.meta.url), 'utf-8'));
+
+const fixture = readJson('../../../backend/tests/fixtures/pricing_conformance.json');
+const defaultRules = readJson('./pricingRules.default.json');
+
+let failures = 0;
+
+// JSON with sorted keys (the fixture is written with sort_keys)
+const canonical = (value) => JSON.stringify(value, (key, val) =>
+  (val && typeof val === 'object' && !Array.isArray(val)
+    ? Object.fromEntries(Object.keys(val).sort().map((k) => [k, val[k]]))
+    : val));
+
+// Test helper
+function assertEqual(actual, expected, testName, quiet = false) {
+  const pass = canonical(actual) === canonical(expected);
+  if (pass) {
+    if (!quiet) console.log(`✓ ${testName}`);
+    return true;
+  }
+  failures += 1;
+  console.error(`✗ ${testName}`);
+  console.error(`  Expected: ${JSON.stringify(expected)}`);
+  console.error(`  Actual:   ${JSON.stringify(actual)}`);
+  return false;
+}
+
+console.log('\n=== Rounding (Python round(x, 2)) ===\n');
+
+assertEqual(roundPrice(0.125), 0.12, 'Tie rounds half-even: 0.125');
+assertEqual(roundPrice(0.375), 0.38, 'Tie rounds half-even: 0.375');
+assertEqual(roundPrice(2.675), 2.67, 'Binary below half: 2.675');
+assertEqual(roundPrice(1924.9749999), 1924.97, 'Regular rounding');
+assertEqual(roundPrice(-1.125), -1.12, 'Negative tie');
+
+console.log('\n=== Bundle ===\n');
+
+assertEqual(defaultRules, fixture.rules, 'Bundled default rules match the backend bundle');
+
+console.log('\n=== Conformance with PricingCalculator ===\n');
+
+let passed = 0;
+fixture.cases.forEach(({ request, expected }, index) => {
+  if (assertEqual(calculatePrice(fixture.rules, request), expected, `Case ${index + 1}: ${JSON.stringify(request)}`, true)) {
+    passed += 1;
+  }
+});
+console.log(`${passed}/${fixture.cases.length} cases identical`);
+
+assertEqual(
+  calculatePrice(fixture.rules, { groesse_typ: 'raeume', anzahl_raeume: null, leistungen: ['waende-decken'] }),
+  null,
+  'Missing area cannot be priced'
+);
+
+console.log('\n=== All Tests Complete ===\n');
+
+if (failures > 0) {
+  process.exitCode = 1;
+}
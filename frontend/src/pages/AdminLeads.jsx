@@ -35,6 +35,8 @@ const AdminLeads = () => {
   const [statusFilter, setStatusFilter] = useState('all');
   const [distanceFilter, setDistanceFilter] = useState('all');
   const [stats, setStats] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const navigate = useNavigate();
 
   const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
@@ -42,17 +44,31 @@ const AdminLeads = () => {
   const MAX_SERVICE_DISTANCE = 200;
 
   useEffect(() => {
-    fetchLeads();
     fetchStats();
   }, []);
 
+  // Server-side search (debounced), restarts pagination
+  useEffect(() => {
+    const timeout = setTimeout(() => fetchLeads(), 300);
+    return () => clearTimeout(timeout);
+  }, [searchTerm]);
+
   useEffect(() => {
     filterLeads();
-  }, [leads, searchTerm, statusFilter, distanceFilter]);
+  }, [leads, statusFilter, distanceFilter]);
+
+  const fetchLeads = async (cursor = null) => {
+    const params = new URLSearchParams({ page_size: '100' });
+    if (searchTerm.trim()) {
+      params.set('search', searchTerm.trim());
+    }
+    if (cursor) {
+      params.set('cursor', cursor);
+      setLoadingMore(true);
+    }
 
-  const fetchLeads = async () => {
     try {
-      const response = await fetch(`${BACKEND_URL}/api/admin/leads`, {
+      const response = await fetch(`${BACKEND_URL}/api/admin/leads?${params}`, {
         headers: {
           'Authorization': `Bearer ${token}`
         }
@@ -65,13 +81,15 @@ const AdminLeads = () => {
 
       const data = await response.json();
       if (data.success) {
-        setLeads(data.leads);
+        setLeads(prev => (cursor ? [...prev, ...data.leads] : data.leads));
+        setNextCursor(data.next_cursor || null);
       }
     } catch (error) {
       console.error('Error fetching leads:', error);
       toast.error('Fehler beim Laden der Leads');
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -95,16 +113,6 @@ const AdminLeads = () => {
   const filterLeads = () => {
     let filtered = [...leads];
 
-    // Search filter
-    if (searchTerm) {
-      filtered = filtered.filter(lead =>
-        lead.name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        lead.plz?.includes(searchTerm) ||
-        lead.telefon?.includes(searchTerm) ||
-        lead.email?.toLowerCase().includes(searchTerm.toLowerCase())
-      );
-    }
-
     // Status filter
     if (statusFilter !== 'all') {
       filtered = filtered.filter(lead => lead.status === statusFilter);
@@ -153,6 +161,11 @@ const AdminLeads = () => {
   };
 
   const handleLogout = () => {
+    // Revoke the token server-side; logging out locally works regardless
+    fetch(`${BACKEND_URL}/api/admin/logout`, {
+      method: 'POST',
+      headers: { 'Authorization': `Bearer ${token}` }
+    }).catch(() => {});
     localStorage.removeItem('adminToken');
     navigate('/admin/login');
     toast.info('Abgemeldet');
@@ -449,6 +462,17 @@ const AdminLeads = () => {
                 </table>
               </div>
             )}
+            {nextCursor && (
+              <div className="text-center pt-6">
+                <Button
+                  onClick={() => fetchLeads(nextCursor)}
+                  variant="outline"
+                  disabled={loadingMore}
+                >
+                  {loadingMore ? 'Lade...' : 'Weitere Leads laden'}
+                </Button>
+              </div>
+            )}
           </CardContent>
         </Card>
       </div>
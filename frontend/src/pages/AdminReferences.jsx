@@ -72,7 +72,8 @@ const ReferenceForm = ({ reference, onSave, onCancel, isNew }) => {
     active: reference?.active !== false,
     image: reference?.image || '',
     image_webp: reference?.image_webp || '',
-    image_fallback: reference?.image_fallback || ''
+    image_fallback: reference?.image_fallback || '',
+    image_variants: reference?.image_variants || []
   });
   const [uploading, setUploading] = useState(false);
   const [saving, setSaving] = useState(false);
@@ -122,6 +123,8 @@ const ReferenceForm = ({ reference, onSave, onCancel, isNew }) => {
         handleChange('image', buildUrl(data.url));
         handleChange('image_webp', buildUrl(data.url_webp));
         handleChange('image_fallback', buildUrl(data.url_fallback));
+        // Responsive widths for srcset
+        handleChange('image_variants', (data.variants || []).map(v => ({ ...v, url: buildUrl(v.url) })));
         
         const savings = data.url_webp ? ' + WebP' : '';
         toast.success(`Bild hochgeladen (${data.format?.toUpperCase()}${savings}, ${Math.round(data.size / 1024)}KB)`);
@@ -167,7 +170,10 @@ const ReferenceForm = ({ reference, onSave, onCancel, isNew }) => {
               />
               <button
                 type="button"
-                onClick={() => handleChange('image', '')}
+                onClick={() => {
+                  handleChange('image', '');
+                  handleChange('image_variants', []);
+                }}
                 className="absolute -top-2 -right-2 bg-red-500 text-white rounded-full p-1 hover:bg-red-600"
               >
                 <X className="h-3 w-3" />
@@ -208,7 +214,10 @@ const ReferenceForm = ({ reference, onSave, onCancel, isNew }) => {
             <Input
               type="url"
               value={formData.image}
-              onChange={(e) => handleChange('image', e.target.value)}
+              onChange={(e) => {
+                handleChange('image', e.target.value);
+                handleChange('image_variants', []);
+              }}
               placeholder="https://..."
               className="mt-1"
             />
@@ -35,6 +35,7 @@ import {
 
 // Import pricing engine
 import { computeEstimate, analyzeLeistungen, isValidPLZ } from '../lib/pricingEngine';
+import { usePricingRules } from '../hooks/usePricingRules';
 
 // Backend URL
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL || '';
@@ -140,6 +141,7 @@ const RechnerNeu = () => {
   const [showSuccess, setShowSuccess] = useState(false);
   const [loading, setLoading] = useState(false);
   const [formData, setFormData] = useState(INITIAL_FORM_STATE);
+  const pricingRules = usePricingRules();
 
   // Calculate total steps dynamically based on selected services
   const analysis = analyzeLeistungen(formData.leistungen);
@@ -225,7 +227,7 @@ const RechnerNeu = () => {
     setLoading(true);
 
     try {
-      const estimate = computeEstimate(formData);
+      const estimate = computeEstimate(formData, pricingRules);
       
       const submitData = new FormData();
       
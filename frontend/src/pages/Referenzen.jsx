@@ -19,6 +19,7 @@ import {
 import { ScrollReveal, useAnimatedCounter } from '../hooks/useScrollReveal';
 import { references as mockReferences } from '../data/mock';
 import { WHATSAPP_URL } from '../components/FloatingWhatsApp';
+import { buildSrcSet, isWebp, isFallback } from '../lib/imageVariants';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 
@@ -39,26 +40,37 @@ const AnimatedStat = ({ end, suffix = '', label, icon: Icon }) => {
   );
 };
 
+// Card width in the 1/2/3 column grid
+const CARD_IMAGE_SIZES = '(min-width: 1024px) 384px, (min-width: 768px) 50vw, 100vw';
+
 // Referenz Card Component
 const ReferenzCard = ({ referenz }) => {
   // Determine image sources for <picture> element
   const imageWebp = referenz.image_webp;
   const imageFallback = referenz.image_fallback || referenz.image;
   const altText = `${referenz.title} - ${referenz.company}`;
+  // Responsive variants (uploads) - browser picks the width for the card
+  const variants = referenz.image_variants || [];
+  const webpSrcSet = buildSrcSet(variants, isWebp) || imageWebp;
+  const fallbackSrcSet = buildSrcSet(variants, isFallback);
+  const sizes = variants.length > 0 ? CARD_IMAGE_SIZES : undefined;
   
   return (
     <Card className="group overflow-hidden border hover:border-[#1e328b]/30 transition-all duration-300 h-full flex flex-col hover:shadow-lg">
       {/* Bild mit WebP + Fallback */}
       <div className="relative h-48 md:h-56 overflow-hidden">
         <picture>
-          {imageWebp && (
+          {webpSrcSet && (
             <source 
-              srcSet={imageWebp} 
+              srcSet={webpSrcSet} 
+              sizes={sizes}
               type="image/webp" 
             />
           )}
           <img
             src={imageFallback}
+            srcSet={fallbackSrcSet}
+            sizes={sizes}
             alt={altText}
             className="w-full h-full object-cover group-hover:scale-105 transition-transform duration-500"
             loading="lazy"